@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Benchmark auction creation latency by upload size.
+
+Posts multipart auction-creation requests carrying a few images of a given
+size to two versions of CreateAuctionView on a throwaway test database and
+media directory:
+
+  * before: the old flow, which created the auction, saved each image with
+    AuctionImage.objects.create and re-saved image_urls, all inside one
+    transaction (so every file write happened with the transaction open);
+  * after: the current view, which writes files to storage first and only
+    bulk-inserts the rows inside the transaction.
+
+For each size it reports median request latency and how long the database
+transaction stayed open. ``--storage-latency-ms`` adds a delay to every
+file write to model remote storage. Variant rendering is switched off so
+both versions do the same work in the request.
+
+Usage:
+    python bench_auction_upload.py --sizes-kb 256 1024 4096 16384 --images 4 --storage-latency-ms 0 50
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bounties.auction_views import CreateAuctionView
+from bounties.bidding import publish_high_water_mark
+from bounties.lifecycle import notify_schedule_changed
+from bounties.models import AuctionImage
+from bounties.serializers import AuctionSerializer
+
+
+class LegacyCreateAuctionView(CreateAuctionView):
+    """The pre-change request flow, kept here as the baseline."""
+
+    def post(self, request):
+        serializer = AuctionSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            auction = serializer.save(created_by=request.user)
+            now = timezone.now()
+            auction.status = 'active' if auction.starts_at <= now < auction.ends_at else 'upcoming'
+            auction.save(update_fields=['status'])
+            publish_high_water_mark(auction)
+            notify_schedule_changed(auction.id)
+
+            stored_image_urls = []
+            for index, image_file in enumerate(request.FILES.getlist('images')):
+                auction_image = AuctionImage.objects.create(auction=auction, image=image_file, order=index)
+                stored_image_urls.append(auction_image.image.url)
+            if stored_image_urls:
+                auction.image_urls = stored_image_urls
+                auction.save(update_fields=['image_urls'])
+            return Response(AuctionSerializer(auction, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+
+class TransactionTimer:
+    """Measures how long the outermost atomic block on the default connection stays open."""
+
+    def __init__(self):
+        self.durations = []
+        self._opened = None
+
+    def __enter__(self):
+        real_enter, real_exit = transaction.Atomic.__enter__, transaction.Atomic.__exit__
+        timer = self
+
+        def enter(atomic):
+            if not connection.in_atomic_block:
+                timer._opened = time.perf_counter()
+            return real_enter(atomic)
+
+        def exit(atomic, *exc):
+            result = real_exit(atomic, *exc)
+            if not connection.in_atomic_block and timer._opened is not None:
+                timer.durations.append(time.perf_counter() - timer._opened)
+                timer._opened = None
+            return result
+
+        self._patches = [
+            mock.patch.object(transaction.Atomic, '__enter__', enter),
+            mock.patch.object(transaction.Atomic, '__exit__', exit),
+        ]
+        for patch in self._patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        for patch in self._patches:
+            patch.stop()
+
+
+def measure(view, admin, size_kb, images, rounds, write_latency):
+    """Return (median latency, median transaction time) in milliseconds."""
+    payload = os.urandom(size_kb * 1024)
+    factory = APIRequestFactory()
+    real_save = FileSystemStorage._save
+
+    def slow_save(storage, name, content):
+        time.sleep(write_latency)
+        return real_save(storage, name, content)
+
+    latencies = []
+    with mock.patch.object(FileSystemStorage, '_save', slow_save), TransactionTimer() as timer:
+        for index in range(rounds):
+            now = timezone.now()
+            request = factory.post('/api/auctions/create/', {
+                'title': f'Upload {size_kb} KiB #{index}', 'description': 'Upload benchmark', 'minimum_bid': 1,
+                'starts_at': (now - timedelta(minutes=1)).isoformat(),
+                'ends_at': (now + timedelta(hours=1)).isoformat(),
+                'images': [SimpleUploadedFile(f'lot_{n}.jpg', payload, 'image/jpeg') for n in range(images)],
+            }, format='multipart')
+            force_authenticate(request, user=admin)
+            started = time.perf_counter()
+            response = view(request)
+            latencies.append(time.perf_counter() - started)
+            request.close()  # what the request handler does: releases the spooled uploads
+            assert response.status_code == 201, response.data
+    return statistics.median(latencies) * 1000, statistics.median(timer.durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes-kb', type=int, nargs='+', default=[256, 1024, 4096, 16384])
+    parser.add_argument('--images', type=int, default=4, help='Images per request')
+    parser.add_argument('--storage-latency-ms', type=float, nargs='+', default=[0, 50])
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    media_root = tempfile.mkdtemp()
+    media_override = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=[])
+    media_override.enable()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        admin = User.objects.create(username='upload-admin', is_superuser=True)
+        views = (('before', LegacyCreateAuctionView.as_view()), ('after', CreateAuctionView.as_view()))
+        print(f"{args.images} images per request, median of {args.rounds} requests\n")
+        print(f"{'storage write':>13} {'image size':>11} {'handler':<7} {'latency ms':>11} {'transaction ms':>15}")
+        for latency_ms in args.storage_latency_ms:
+            for size_kb in args.sizes_kb:
+                for name, view in views:
+                    latency, held = measure(view, admin, size_kb, args.images, args.rounds, latency_ms / 1000)
+                    print(f"{latency_ms:>10.0f} ms {size_kb:>7} KiB {name:<7} {latency:>11.1f} {held:>15.1f}")
+            print()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        media_override.disable()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Benchmark the lock-based bid path against the per-auction bid sequencer.
+
+Spins up a throwaway test database, creates one live auction and N funded
+bidders, then fires one bid per bidder concurrently through each engine and
+reports bids/sec and latency percentiles. Point DATABASE_URL at Postgres to
+measure real row-lock contention; SQLite serializes all writers.
+
+Usage:
+    python bench_bid_sequencer.py --bidders 1000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from bounties.models import Auction, UserProfile
+from bounties.bidding import place_bid
+from bounties.bid_sequencer import BidSequencer
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def create_fixture(bidders, label):
+    admin = User.objects.create(username=f'bench-admin-{label}')
+    now = timezone.now()
+    auction = Auction.objects.create(
+        title=f'Benchmark auction ({label})',
+        description='Bid engine benchmark',
+        minimum_bid=1,
+        starts_at=now - timedelta(minutes=1),
+        ends_at=now + timedelta(hours=1),
+        status='active',
+        created_by=admin,
+    )
+    users = User.objects.bulk_create(
+        [User(username=f'bench-{label}-{i}') for i in range(bidders)]
+    )
+    if not users or users[0].pk is None:
+        users = list(User.objects.filter(username__startswith=f'bench-{label}-').order_by('id'))
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=user, coin_balance=1_000_000) for user in users]
+    )
+    return auction, users
+
+
+def run(engine, auction, users, concurrency):
+    rng = random.Random(42)
+    amounts = [rng.randint(1, len(users) * 10) for _ in users]
+    latencies = []
+    outcomes = {}
+
+    def bid(args):
+        user, amount = args
+        started = time.perf_counter()
+        try:
+            _, status_code = engine(user, auction.id, amount)
+        finally:
+            close_old_connections()
+        return time.perf_counter() - started, status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, status_code in pool.map(bid, zip(users, amounts)):
+            latencies.append(latency)
+            outcomes[status_code] = outcomes.get(status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    auction.refresh_from_db()
+    return {
+        'bids_per_sec': len(users) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'outcomes': outcomes,
+        'final_high': auction.current_highest_bid,
+        'total_bids': auction.total_bids,
+    }
+
+
+def report(name, result):
+    print(f"{name}")
+    print(f"  bids/sec:     {result['bids_per_sec']:.1f}")
+    print(f"  p50 latency:  {result['p50_ms']:.1f} ms")
+    print(f"  p99 latency:  {result['p99_ms']:.1f} ms")
+    print(f"  outcomes:     {dict(sorted(result['outcomes'].items()))}")
+    print(f"  final high:   {result['final_high']} after {result['total_bids']} accepted bids")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bidders', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Worker threads (defaults to one per bidder)')
+    parser.add_argument('--batch-size', type=int, default=settings.BID_SEQUENCER_BATCH_SIZE)
+    args = parser.parse_args()
+    concurrency = args.concurrency or args.bidders
+
+    # Failed bids are counted in the outcomes; keep their tracebacks out of the report.
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        # Worker threads need a shared on-disk database, not per-connection memory.
+        test_db = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = test_db
+        connection.settings_dict['OPTIONS']['timeout'] = 60
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        print(f"Database: {connection.vendor}, bidders: {args.bidders}, concurrency: {concurrency}\n")
+
+        auction, users = create_fixture(args.bidders, 'locked')
+        report('Lock-based path (select_for_update per bid)', run(place_bid, auction, users, concurrency))
+        print()
+
+        sequencer = BidSequencer(batch_size=args.batch_size)
+        auction, users = create_fixture(args.bidders, 'sequenced')
+        report(f'Bid sequencer (batch size {args.batch_size})', run(sequencer.submit, auction, users, concurrency))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
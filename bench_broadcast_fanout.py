@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Benchmark the CPU cost of fanning one broadcast out to many sockets.
+
+Delivers one frame to N subscribers the way each channel layer does and
+runs every subscriber's consumer handler, either:
+
+  * encoding the frame per socket (``json.dumps(event['data'])`` in every
+    handler, the old path), or
+  * encoding it once in the publisher (bounties.publisher.frame_message)
+    and sending the same text from every handler.
+
+Delivery is modelled with the layers' own code and no network: the
+in-memory layer deep-copies the message for every member, channels_redis
+serializes it once per worker process and each worker deserializes it once
+for all of its local sockets. Reports process CPU time per broadcast and per
+subscriber for a new_bid frame and a top-10 leaderboard diff.
+
+Usage:
+    python bench_broadcast_fanout.py --subscribers 1000 10000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from copy import deepcopy
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from channels_redis.core import RedisChannelLayer
+
+from bounties.publisher import frame_message, frame_text, orjson
+
+
+def new_bid_frame():
+    return {
+        'type': 'new_bid',
+        'auction_id': 1,
+        'user': 'bidder0042',
+        'amount': 1250,
+        'timestamp': '2026-10-17T12:00:00.123456+00:00',
+        'current_highest_bid': 1250,
+        'bid_count': 8123,
+        'auction_extended': True,
+        'extension_minutes': 3,
+        'new_end_time': '2026-10-17T12:03:00+00:00',
+        'extension_message': 'A new highest bid placed 3 mins before the end will extend the auction by 3 min',
+    }
+
+
+def leaderboard_diff_frame():
+    moved = [
+        {'user__username': f'bidder{rank:04d}', 'total_bids': 40 - rank, 'highest_bid': 1250 - rank * 10, 'rank': rank}
+        for rank in range(1, 11)
+    ]
+    return {
+        'type': 'leaderboard_diff',
+        'auction_id': 1,
+        'base_version': 8122,
+        'version': 8123,
+        'current_highest_bid': 1250,
+        'current_highest_bidder': 'bidder0001',
+        'total_bids': 8123,
+        'inserted': moved[:1],
+        'moved': moved[1:],
+        'removed': ['bidder0999'],
+    }
+
+
+def handle_per_socket(event):
+    return json.dumps(event['data'])
+
+
+def handle_pre_encoded(event):
+    return frame_text(event)
+
+
+def deliver_in_memory(channels, message):
+    for _ in channels:
+        yield deepcopy(message)
+
+
+def deliver_redis(layer, channels, message):
+    # Never connects: only the layer's serialization and channel mapping run.
+    _, payloads, _ = layer._map_channel_keys_to_connection(channels, message)
+    for payload in payloads.values():
+        event = layer.deserialize(payload)
+        for _ in event.pop('__asgi_channel__'):
+            yield event
+
+
+def measure(layer, subscribers, workers, rounds, frame, pre_encoded):
+    """Return CPU seconds per broadcast."""
+    channels = [f'specific.worker{index % workers}!{index}' for index in range(subscribers)]
+    handler = handle_pre_encoded if pre_encoded else handle_per_socket
+
+    started = time.process_time()
+    for _ in range(rounds):
+        if pre_encoded:
+            message = frame_message('auction_update', frame)
+        else:
+            message = {'type': 'auction_update', 'data': frame}
+        if layer is None:
+            events = deliver_in_memory(channels, message)
+        else:
+            events = deliver_redis(layer, channels, message)
+        for event in events:
+            handler(event)
+    return (time.process_time() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--workers', type=int, default=4, help='server processes holding the sockets')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    layers = (
+        ('in-memory', None),
+        ('redis', RedisChannelLayer(hosts=['redis://localhost:6379'])),
+    )
+    frames = (('new_bid', new_bid_frame()), ('leaderboard_diff', leaderboard_diff_frame()))
+
+    print(f"Encoder for pre-encoded frames: {'orjson' if orjson else 'json'}")
+    print(
+        f"{'layer':<10} {'frame':<17} {'sockets':>8} "
+        f"{'per-socket ms':>14} {'pre-encoded ms':>15} {'us/socket':>10} {'speed-up':>9}"
+    )
+    for layer_name, layer in layers:
+        for frame_name, frame in frames:
+            for subscribers in args.subscribers:
+                old = measure(layer, subscribers, args.workers, args.rounds, frame, pre_encoded=False)
+                new = measure(layer, subscribers, args.workers, args.rounds, frame, pre_encoded=True)
+                print(
+                    f"{layer_name:<10} {frame_name:<17} {subscribers:>8} "
+                    f"{old * 1000:>14.2f} {new * 1000:>15.2f} "
+                    f"{old / subscribers * 1e6:>4.2f}->{new / subscribers * 1e6:<4.2f} {old / new:>8.1f}x"
+                )
+
+
+if __name__ == '__main__':
+    main()
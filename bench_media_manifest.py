@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Benchmark serializing an auction list with and without the media manifest.
+
+Creates N auctions (100 by default) with a few uploaded images each, plus
+the legacy ``image_urls`` CreateAuctionView stores next to them, in a
+throwaway test database and media directory. It then serializes the list
+the way AuctionListView does, two ways:
+
+  * storage per image: the manifest is bypassed (zero TTL) so every image
+    costs storage calls on every request, as the serializers did before;
+  * manifest: the warm manifest answers every lookup from memory.
+
+``--storage-latency-ms`` adds a delay to each storage call to model a
+remote backend (S3 and friends answer ``exists`` over the network).
+
+Usage:
+    python bench_media_manifest.py --auctions 100 --images 3 --storage-latency-ms 0 5
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from bounties.media_manifest import media_manifest
+from bounties.models import Auction, AuctionImage
+from bounties.serializers import AuctionSerializer
+
+
+def create_auctions(count, images):
+    admin = User.objects.create(username='media-admin')
+    now = timezone.now()
+    for index in range(count):
+        auction = Auction.objects.create(
+            title=f'Gallery #{index}', description='Media manifest benchmark', minimum_bid=1,
+            starts_at=now - timedelta(minutes=1), ends_at=now + timedelta(hours=1),
+            status='active', created_by=admin,
+        )
+        urls = []
+        for order in range(images):
+            image = AuctionImage(auction=auction, order=order)
+            image.image.save(f'gallery_{index}_{order}.jpg', ContentFile(b'\xff\xd8' + b'0' * 2048), save=True)
+            urls.append(image.image.url)
+        auction.image_urls = urls
+        auction.save(update_fields=['image_urls'])
+
+
+def serialize(request):
+    queryset = Auction.objects.all().prefetch_related('images').order_by('-created_at')
+    return AuctionSerializer(queryset, many=True, context={'request': request}).data
+
+
+def measure(request, rounds, latency):
+    """Return (ms per list, storage calls per list, queries per list)."""
+    calls = []
+    real_exists = FileSystemStorage.exists
+
+    def counting_exists(storage, name):
+        calls.append(name)
+        if latency:
+            time.sleep(latency)
+        return real_exists(storage, name)
+
+    with mock.patch.object(FileSystemStorage, 'exists', counting_exists):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(rounds):
+                serialize(request)
+            elapsed = time.perf_counter() - started
+    return elapsed * 1000 / rounds, len(calls) / rounds, len(queries) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--auctions', type=int, default=100)
+    parser.add_argument('--images', type=int, default=3, help='Uploaded images per auction')
+    parser.add_argument('--storage-latency-ms', type=float, nargs='+', default=[0, 5])
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    media_root = tempfile.mkdtemp()
+    # Resized copies are rendered in the background; keep them out of the timings.
+    media_override = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=[])
+    media_override.enable()
+    # Only the manifest under test; the shared cache would hide the bypass.
+    media_manifest.shared = False
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        create_auctions(args.auctions, args.images)
+        request = APIRequestFactory().get('/api/bounties/auctions/')
+        print(f"{args.auctions} auctions x {args.images} images, {args.rounds} rounds per row\n")
+        print(f"{'storage latency':>16} {'mode':<18} {'ms/list':>10} {'storage calls':>14} {'queries':>8}")
+
+        for latency_ms in args.storage_latency_ms:
+            latency = latency_ms / 1000
+            rows = []
+
+            media_manifest.clear()
+            media_manifest.local_ttl = 0
+            rows.append(('storage per image', measure(request, args.rounds, latency)))
+
+            media_manifest.local_ttl = settings.MEDIA_MANIFEST_LOCAL_TTL_SECONDS
+            serialize(request)  # warm the manifest
+            rows.append(('manifest', measure(request, args.rounds, latency)))
+
+            for mode, (ms, calls, queries) in rows:
+                print(f"{latency_ms:>13.1f} ms {mode:<18} {ms:>10.1f} {calls:>14.0f} {queries:>8.0f}")
+            print(f"{'':>16} speed-up: {rows[0][1][0] / rows[1][1][0]:.1f}x\n")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        media_override.disable()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Benchmark bytes served to returning visitors with and without cache headers.
+
+Uploads a gallery of auction images (most through AuctionImage, so they get
+unique stored names, plus some legacy files with plain names) to a
+throwaway test database and media directory, then replays page visits
+from a simulated browser cache against two handlers:
+
+  * before: a bare FileResponse, as serve_auction_image returned before,
+    with no validators or Cache-Control, so every visit downloads
+    everything again;
+  * after: bounties.views.serve_media, whose ETag, Last-Modified and
+    Cache-Control the browser honours (fresh entries are not requested at
+    all, stale ones are revalidated with If-None-Match).
+
+Each handler sees a first visit, a repeat visit ten minutes later and one
+a day later (past MEDIA_CACHE_MAX_AGE_SECONDS), then a download that was
+interrupted halfway and resumed with a Range request.
+
+Usage:
+    python bench_media_serving.py --images 100 --legacy 20 --image-kb 150
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import FileResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings, setup_test_environment
+from django.utils import timezone
+from django.utils.cache import get_max_age
+
+from bounties.models import Auction, AuctionImage
+from bounties.views import serve_media
+
+VISITS = (('first visit', 0), ('repeat after 10 min', 600), ('repeat after 1 day', 86400))
+
+
+def legacy_serve(request, path):
+    return FileResponse(default_storage.open(path, 'rb'))
+
+
+def create_gallery(images, legacy, image_kb):
+    admin = User.objects.create(username='gallery-admin')
+    now = timezone.now()
+    auction = Auction.objects.create(
+        title='Gallery', description='Media serving benchmark', minimum_bid=1,
+        starts_at=now, ends_at=now + timedelta(hours=1), status='active', created_by=admin,
+    )
+    paths = []
+    for index in range(images):
+        image = AuctionImage(auction=auction, order=index)
+        image.image.save(f'lot_{index}.jpg', ContentFile(os.urandom(image_kb * 1024)), save=True)
+        paths.append(image.image.name)
+    for index in range(legacy):
+        paths.append(default_storage.save(f'auction_images/legacy-{index}.jpg', ContentFile(os.urandom(image_kb * 1024))))
+    return paths
+
+
+class Browser:
+    """A private browser cache that follows Cache-Control max-age and ETag revalidation."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.factory = RequestFactory()
+        self.entries = {}
+
+    def fetch(self, path, now, headers=None):
+        """Return (requests made, body bytes received, status or None)."""
+        headers = dict(headers or {})
+        entry = self.entries.get(path)
+        if entry and now < entry['fresh_until'] and not headers:
+            return 0, 0, None
+        if entry and entry['etag'] and not headers:
+            headers['HTTP_IF_NONE_MATCH'] = entry['etag']
+
+        response = self.handler(self.factory.get(f'/media/{path}', **headers), path)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        if response.status_code in (200, 304):
+            self.entries[path] = {
+                'etag': response.get('ETag'),
+                'fresh_until': now + (get_max_age(response) or 0),
+            }
+        return 1, len(body), response.status_code
+
+
+def run(handler, paths):
+    browser = Browser(handler)
+    rows = []
+    for name, now in VISITS:
+        totals = {'requests': 0, 'bytes': 0, 'statuses': {}}
+        for path in paths:
+            requests, received, status = browser.fetch(path, now)
+            totals['requests'] += requests
+            totals['bytes'] += received
+            if status:
+                totals['statuses'][status] = totals['statuses'].get(status, 0) + 1
+        rows.append((name, totals))
+
+    # A download cut off halfway: with Range support only the rest is sent.
+    size = default_storage.size(paths[0])
+    requests, received, status = Browser(handler).fetch(paths[0], 0, {'HTTP_RANGE': f'bytes={size // 2}-'})
+    rows.append(('resume half-downloaded', {'requests': requests, 'bytes': received, 'statuses': {status: 1}}))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--images', type=int, default=100, help='Uploaded images (unique stored names)')
+    parser.add_argument('--legacy', type=int, default=20, help='Legacy files with plain names')
+    parser.add_argument('--image-kb', type=int, default=150)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    media_root = tempfile.mkdtemp()
+    # Resized copies are rendered in the background; keep them out of the timings.
+    media_override = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=[])
+    media_override.enable()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        paths = create_gallery(args.images, args.legacy, args.image_kb)
+        print(f"{len(paths)} images of {args.image_kb} KiB ({args.images} uploaded, {args.legacy} legacy)\n")
+        print(f"{'visit':<24} {'handler':<7} {'requests':>9} {'KiB served':>11}  statuses")
+        before, after = run(legacy_serve, paths), run(serve_media, paths)
+        for (name, old), (_, new) in zip(before, after):
+            for label, totals in (('before', old), ('after', new)):
+                statuses = ', '.join(f'{count}x{status}' for status, count in sorted(totals['statuses'].items()))
+                print(f"{name:<24} {label:<7} {totals['requests']:>9} {totals['bytes'] / 1024:>11.0f}  {statuses}")
+        repeat_old = sum(totals['bytes'] for _, totals in before[1:3])
+        repeat_new = sum(totals['bytes'] for _, totals in after[1:3])
+        print(f"\nRepeat-visit bytes: {repeat_old / 1024:.0f} KiB -> {repeat_new / 1024:.0f} KiB")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        media_override.disable()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
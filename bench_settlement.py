@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Benchmark closing an auction with many outbid bidders.
+
+Spins up a throwaway test database with one ended auction per strategy, each
+holding one deducted bid per bidder, and settles it with:
+
+  * one UserProfile.add_coins transaction per outbid bidder (the naive loop),
+  * bounties.settlement.settle_auctions (one aggregate plus bulk statements).
+
+Reports the SQL statements issued and wall time for each.
+
+Usage:
+    python bench_settlement.py --bidders 10000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from bounties.models import Auction, UserProfile
+from bounties.auction_models import AuctionBid, AuctionWinner
+from bounties.settlement import settle_auctions
+
+START_BALANCE = 100000
+
+
+class QueryCounter:
+    """Count SQL statements issued from any thread."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._original = CursorWrapper._execute_with_wrappers
+
+    def install(self):
+        counter = self
+
+        def counted(cursor, *args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return counter._original(cursor, *args, **kwargs)
+
+        CursorWrapper._execute_with_wrappers = counted
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+def create_closed_auction(label, bidders):
+    """Create an ended auction where every bidder paid for one bid; the last one won."""
+    now = timezone.now()
+    admin = User.objects.create(username=f'{label}-admin')
+    auction = Auction.objects.create(
+        title=label, description=label, starts_at=now - timedelta(hours=1),
+        ends_at=now, status='ended', created_by=admin,
+    )
+    User.objects.bulk_create([User(username=f'{label}-{i}') for i in range(bidders)], batch_size=1000)
+    users = list(User.objects.filter(username__startswith=f'{label}-').exclude(id=admin.id).order_by('id'))
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=user, coin_balance=START_BALANCE - (i + 1)) for i, user in enumerate(users)],
+        batch_size=1000,
+    )
+    AuctionBid.objects.bulk_create([
+        AuctionBid(
+            auction=auction, user=user, amount=i + 1, minimum_required=i + 1,
+            status='accepted' if i == len(users) - 1 else 'outbid',
+            coins_reserved=True, coins_deducted=True,
+        )
+        for i, user in enumerate(users)
+    ], batch_size=1000)
+    AuctionWinner.objects.create(auction=auction, winner=users[-1], winning_amount=len(users))
+    return auction
+
+
+def naive_settle(auction):
+    """Refund each outbid bid in its own transaction."""
+    for bid in AuctionBid.objects.filter(auction=auction, status='outbid').select_related('user__profile'):
+        bid.user.profile.add_coins(bid.amount, 'auction_refund', auction.id, 'Refund for outbid bid')
+        bid.coins_deducted = False
+        bid.save(update_fields=['coins_deducted'])
+    auction.settled_at = timezone.now()
+    auction.save(update_fields=['settled_at'])
+
+
+def run(name, settle, auction, counter):
+    counter.reset()
+    started = time.perf_counter()
+    settle(auction)
+    elapsed = time.perf_counter() - started
+    statements = counter.count
+    refunded = UserProfile.objects.filter(
+        user__auction_bids__auction=auction, coin_balance=START_BALANCE
+    ).count()
+    print(name)
+    print(f"  refunded bidders: {refunded}")
+    print(f"  SQL statements:   {statements}")
+    print(f"  wall time:        {elapsed * 1000:.1f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bidders', type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        test_db = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = test_db
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        naive = create_closed_auction('naive', args.bidders)
+        batch = create_closed_auction('batch', args.bidders)
+        counter = QueryCounter()
+        counter.install()
+        print(f"Database: {connection.vendor}, bidders per auction: {args.bidders}\n")
+
+        run('Per-bidder add_coins transactions', naive_settle, naive, counter)
+        report = {}
+        run('settle_auctions (bulk)', lambda auction: report.update(settle_auctions([auction.id])), batch, counter)
+        print('settle_auctions phases: ' + ', '.join(
+            f'{phase} {elapsed:.1f} ms' for phase, elapsed in report['timings_ms'].items()
+        ))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure how many concurrent WebSocket connections one server worker holds.
+
+Opens sockets in steps against a running ASGI server, keeps every socket
+open, and reports handshake latency, failures and how many sockets are still
+answering pings at each step. Stops at the first step whose failure rate or
+p99 handshake latency crosses the limits, and divides the last healthy level
+by the number of server workers.
+
+Usage:
+    WEB_CONCURRENCY=1 gunicorn playmarket.asgi:application -c gunicorn.conf.py
+    python bench_socket_capacity.py --url ws://localhost:8000/ws/test/ --workers 1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def open_socket(url, timeout):
+    started = time.perf_counter()
+    socket = await asyncio.wait_for(websockets.connect(url, open_timeout=timeout), timeout)
+    # Wait for the consumer's greeting so the connection is fully accepted.
+    await asyncio.wait_for(socket.recv(), timeout)
+    return socket, time.perf_counter() - started
+
+
+async def ping_all(sockets, timeout):
+    async def ping(socket):
+        try:
+            await asyncio.wait_for(socket.send(json.dumps({'type': 'ping'})), timeout)
+            return True
+        except Exception:
+            return False
+
+    results = await asyncio.gather(*(ping(socket) for socket in sockets))
+    return sum(results)
+
+
+async def run(args):
+    sockets = []
+    last_healthy = 0
+    print(f"Target: {args.url} ({args.workers} worker(s))")
+    print(f"{'sockets':>8} {'opened':>7} {'failed':>7} {'p50 ms':>8} {'p99 ms':>8} {'alive':>7}")
+
+    try:
+        while len(sockets) < args.max_sockets:
+            batch = min(args.step, args.max_sockets - len(sockets))
+            semaphore = asyncio.Semaphore(args.parallel)
+
+            async def attempt():
+                async with semaphore:
+                    try:
+                        return await open_socket(args.url, args.timeout)
+                    except Exception:
+                        return None
+
+            results = await asyncio.gather(*(attempt() for _ in range(batch)))
+            opened = [result for result in results if result]
+            failed = batch - len(opened)
+            latencies = [latency for _, latency in opened]
+            sockets.extend(socket for socket, _ in opened)
+
+            alive = await ping_all(sockets, args.timeout)
+            p99 = percentile(latencies, 99) * 1000
+            print(
+                f"{len(sockets):>8} {len(opened):>7} {failed:>7} "
+                f"{percentile(latencies, 50) * 1000:>8.1f} {p99:>8.1f} {alive:>7}"
+            )
+
+            if failed / batch > args.max_failure_rate or p99 > args.max_p99_ms or alive < len(sockets):
+                break
+            last_healthy = len(sockets)
+    finally:
+        await asyncio.gather(*(socket.close() for socket in sockets), return_exceptions=True)
+
+    print()
+    print(f"Healthy concurrent sockets: {last_healthy}")
+    print(f"Per worker: {last_healthy / args.workers:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure concurrent WebSocket capacity per worker')
+    parser.add_argument('--url', default='ws://localhost:8000/ws/test/',
+                        help='WebSocket URL (append ?token=<jwt> for authenticated routes)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes behind the URL')
+    parser.add_argument('--step', type=int, default=500, help='Sockets opened per step')
+    parser.add_argument('--max-sockets', type=int, default=20000)
+    parser.add_argument('--parallel', type=int, default=200, help='Concurrent handshakes in flight')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--max-p99-ms', type=float, default=1000.0)
+    parser.add_argument('--max-failure-rate', type=float, default=0.01)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+Benchmark WebSocket reconnect storms through the JWT auth middleware.
+
+Spins up a throwaway test database with one user per socket, then reconnects
+every socket at once to the authenticated updates endpoint in-process and
+reports how many SQL queries the handshakes issued and handshake latency
+percentiles for:
+
+  * the old resolver (one User.objects.get per socket),
+  * the cached resolver with a cold cache (first storm after a deploy),
+  * the cached resolver with a warm cache (repeat storm).
+
+Usage:
+    python bench_ws_reconnect.py --sockets 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test.utils import setup_test_environment
+
+from bounties.auth_views import generate_jwt_token
+from bounties.authentication import decode_jwt_token, user_cache
+from bounties.routing import websocket_urlpatterns
+from bounties.ws_auth import JwtAuthMiddleware
+
+ENDPOINT = 'ws/auction/updates/'
+
+
+class QueryCounter:
+    """Count SQL statements issued from any thread."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._original = CursorWrapper._execute_with_wrappers
+
+    def install(self):
+        counter = self
+
+        def counted(cursor, *args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return counter._original(cursor, *args, **kwargs)
+
+        CursorWrapper._execute_with_wrappers = counted
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+class UncachedJwtAuthMiddleware(BaseMiddleware):
+    """The resolver the ASGI stack used before: one user query per handshake."""
+
+    async def __call__(self, scope, receive, send):
+        token = scope['query_string'].decode().split('token=', 1)[1]
+        payload = decode_jwt_token(token)
+        user = await database_sync_to_async(User.objects.filter(id=payload['user_id']).first)()
+        scope['user'] = user or AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def create_users(count):
+    User.objects.bulk_create([User(username=f'socket-{i}') for i in range(count)])
+    users = User.objects.filter(username__startswith='socket-').order_by('id')
+    return [generate_jwt_token(user) for user in users]
+
+
+async def storm(application, tokens, parallel):
+    semaphore = asyncio.Semaphore(parallel)
+    latencies = []
+    failures = 0
+
+    async def handshake(token):
+        nonlocal failures
+        async with semaphore:
+            communicator = WebsocketCommunicator(application, f'{ENDPOINT}?token={token}')
+            started = time.perf_counter()
+            connected, _ = await communicator.connect(timeout=30)
+            if connected:
+                await communicator.receive_from(timeout=30)
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures += 1
+            await communicator.disconnect()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handshake(token) for token in tokens))
+    return latencies, failures, time.perf_counter() - started
+
+
+def run(name, application, tokens, parallel, counter):
+    counter.reset()
+    latencies, failures, elapsed = asyncio.run(storm(application, tokens, parallel))
+    print(name)
+    print(f"  sockets:      {len(tokens)} ({failures} rejected) in {elapsed:.2f} s")
+    print(f"  SQL queries:  {counter.count}")
+    print(f"  p50 latency:  {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"  p99 latency:  {percentile(latencies, 99) * 1000:.1f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sockets', type=int, default=5000)
+    parser.add_argument('--parallel', type=int, default=500, help='Handshakes in flight at once')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        # The async executor thread needs a shared on-disk database.
+        test_db = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = test_db
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        tokens = create_users(args.sockets)
+        counter = QueryCounter()
+        counter.install()
+        print(f"Database: {connection.vendor}, sockets: {args.sockets}, parallel: {args.parallel}\n")
+
+        router = URLRouter(websocket_urlpatterns)
+        run('Uncached resolver (User.objects.get per socket)',
+            UncachedJwtAuthMiddleware(router), tokens, args.parallel, counter)
+
+        cache.clear()
+        user_cache.clear()
+        cached = JwtAuthMiddleware(router)
+        run('Cached resolver, cold cache (batched lookups)', cached, tokens, args.parallel, counter)
+        run('Cached resolver, warm cache', cached, tokens, args.parallel, counter)
+        print(f"User cache metrics: {user_cache.metrics()}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
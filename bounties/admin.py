@@ -4,11 +4,16 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import path
 from django.shortcuts import redirect, render
+from django.db import transaction
 from django.db.models import Sum, Count
 from django.http import HttpResponse
 from django.utils.html import format_html
 from .models import UserProfile, CoinTransaction, PointTransfer, Bounty, BountyClaim, RedeemCode, Auction, AuctionImage
-from .auction_models import AuctionBid, AuctionWinner
+from .auction_models import AuctionBid, AuctionEvent, AuctionWinner
+from .bidding import clear_high_water_mark
+from .clock import publish_clock
+from .events import record_event
+from .lifecycle import end_auction, notify_schedule_changed
 
 
 # Inline for UserProfile in User admin
@@ -123,14 +128,14 @@ class BountyAdmin(admin.ModelAdmin):
     list_filter = ['status', 'created_at', 'expires_at']
     search_fields = ['title', 'description']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at', 'claims_left']
+    readonly_fields = ['created_at', 'updated_at', 'claims_left', 'claims_count']
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'description', 'reward')
         }),
         ('Availability', {
-            'fields': ('status', 'claims_left', 'max_claims', 'expires_at')
+            'fields': ('status', 'claims_left', 'claims_count', 'max_claims', 'expires_at')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -138,9 +143,6 @@ class BountyAdmin(admin.ModelAdmin):
         }),
     )
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('claims')
-
 
 @admin.register(BountyClaim)
 class BountyClaimAdmin(admin.ModelAdmin):
@@ -191,6 +193,11 @@ class BountyClaimAdmin(admin.ModelAdmin):
         self.message_user(request, f"Rejected {queryset.count()} claims.")
     reject_claims.short_description = "Reject selected claims"
 
+    def delete_queryset(self, request, queryset):
+        bounty_ids = list(queryset.values_list('bounty_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        Bounty.recount_claims(Bounty.objects.filter(id__in=bounty_ids))
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('bounty', 'user')
 
@@ -500,7 +507,7 @@ class AuctionAdmin(admin.ModelAdmin):
     list_filter = ['status', 'starts_at', 'ends_at', 'created_at']
     search_fields = ['title', 'description']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at', 'current_highest_bid', 'current_highest_bidder', 'total_bids']
+    readonly_fields = ['created_at', 'updated_at', 'current_highest_bid', 'current_highest_bidder', 'total_bids', 'settled_at']
     inlines = [AuctionImageInline]
     
     fieldsets = (
@@ -512,13 +519,13 @@ class AuctionAdmin(admin.ModelAdmin):
             'description': 'Enter image URLs as a JSON array, e.g., ["https://example.com/image1.jpg", "https://example.com/image2.jpg"]'
         }),
         ('Timing', {
-            'fields': ('starts_at', 'ends_at')
+            'fields': ('starts_at', 'ends_at', 'extension_window_seconds', 'extension_seconds')
         }),
         ('Status & Management', {
             'fields': ('status', 'created_by')
         }),
         ('Current State', {
-            'fields': ('current_highest_bid', 'current_highest_bidder', 'total_bids'),
+            'fields': ('current_highest_bid', 'current_highest_bidder', 'total_bids', 'settled_at'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -529,39 +536,66 @@ class AuctionAdmin(admin.ModelAdmin):
     
     actions = ['activate_auctions', 'deactivate_auctions', 'end_auctions']
 
+    def _clear_high_water_marks(self, queryset):
+        for auction_id in queryset.values_list('id', flat=True):
+            clear_high_water_mark(auction_id)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        changed = set(form.changed_data) if change else set()
+        # Log hand edits of snapshot columns, or a rebuild from the event log
+        # would revert them. The form has already saved the values.
+        if 'ends_at' in changed:
+            record_event(obj, 'rescheduled', ends_at=obj.ends_at)
+        if 'status' in changed:
+            record_event(obj, 'status_changed', status=obj.status)
+        # The published mark carries the window and the minimum bid, so the
+        # pre-check would keep rejecting against the old values.
+        if {'starts_at', 'ends_at', 'status', 'minimum_bid'} & changed:
+            clear_high_water_mark(obj.id)
+        if {'starts_at', 'ends_at', 'status'} & changed:
+            notify_schedule_changed(obj.id)
+            publish_clock(obj)
+
+    def _reschedule(self, queryset):
+        for auction_id in queryset.values_list('id', flat=True):
+            notify_schedule_changed(auction_id)
+
+    def _set_status(self, queryset, status):
+        """Change the status of every auction in ``queryset`` through the event log."""
+        with transaction.atomic():
+            auctions = list(queryset.select_for_update())
+            for auction in auctions:
+                auction.save(update_fields=record_event(auction, 'status_changed', status=status) + ['updated_at'])
+        return len(auctions)
+
     def activate_auctions(self, request, queryset):
-        updated = queryset.filter(status='pending').update(status='active')
+        updated = self._set_status(queryset.filter(status='pending'), 'active')
+        self._clear_high_water_marks(queryset)
+        self._reschedule(queryset)
         self.message_user(request, f"Activated {updated} pending auctions.")
     activate_auctions.short_description = "Activate selected pending auctions"
 
     def deactivate_auctions(self, request, queryset):
-        updated = queryset.filter(status='active').update(status='pending')
+        updated = self._set_status(queryset.filter(status='active'), 'pending')
+        self._clear_high_water_marks(queryset)
+        self._reschedule(queryset)
         self.message_user(request, f"Deactivated {updated} active auctions.")
     deactivate_auctions.short_description = "Deactivate selected active auctions"
 
     def end_auctions(self, request, queryset):
-        # This would trigger the end auction logic
         ended_count = 0
-        for auction in queryset.filter(status='active'):
-            # Find highest bid
-            highest_bid = AuctionBid.objects.filter(
-                auction=auction,
-                status='accepted'
-            ).order_by('-amount').first()
-            
-            if highest_bid:
-                # Create winner record
-                AuctionWinner.objects.create(
-                    auction=auction,
-                    winner=highest_bid.user,
-                    winning_amount=highest_bid.amount,
-                    coins_transferred=False,
-                )
-                ended_count += 1
-        
+        winner_count = 0
+        for auction_id in queryset.filter(status='active').values_list('id', flat=True):
+            try:
+                _, winner = end_auction(auction_id, force=True)
+            except (Auction.DoesNotExist, ValueError):
+                continue
+            ended_count += 1
+            winner_count += winner is not None
+
         if ended_count > 0:
-            queryset.filter(status='active').update(status='ended')
-            self.message_user(request, f"Ended {ended_count} auctions and determined winners.")
+            self.message_user(request, f"Ended {ended_count} auctions and determined {winner_count} winners.")
         else:
             self.message_user(request, "No active auctions found to end.")
     end_auctions.short_description = "End selected active auctions and determine winners"
@@ -605,6 +639,22 @@ class AuctionWinnerAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AuctionEvent)
+class AuctionEventAdmin(admin.ModelAdmin):
+    list_display = ['auction', 'kind', 'user', 'amount', 'ends_at', 'status', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['auction__title', 'user__username']
+    ordering = ['-id']
+    readonly_fields = ['auction', 'kind', 'bid', 'user', 'amount', 'ends_at', 'status', 'created_at']
+
+    # The log is append-only; snapshots are rebuilt from it.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Unregister the default User admin and register our custom one
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
@@ -4,7 +4,7 @@ from .auth_views import firebase_login, verify_token, logout, get_user_profile
 from .views import (
     UserBalanceView, UserTransactionsView, AdminUserBalanceAdjustmentView,
     UserDetailView, UserListView, BountyClaimApprovalView, PointTransferView,
-    AdminBountyClaimsView,
+    AdminBountyClaimsView, AuthCacheMetricsView,
 )
 from .auction_views import (
     AuctionListView, AuctionDetailView, CreateAuctionView, DeleteAuctionView, PlaceBidView,
@@ -33,6 +33,7 @@ urlpatterns = [
     path('bounties/admin/users/', UserListView.as_view(), name='admin_users'),
     path('bounties/admin/adjust-balance/', AdminUserBalanceAdjustmentView.as_view(), name='admin_adjust_balance'),
     path('bounties/admin/bounty-claims/', AdminBountyClaimsView.as_view(), name='admin_bounty_claims'),
+    path('bounties/admin/auth-cache-metrics/', AuthCacheMetricsView.as_view(), name='admin_auth_cache_metrics'),
     path('bounties/claims/<int:claim_id>/approve/', BountyClaimApprovalView.as_view(), name='approve_bounty_claim'),
     
     # Auction endpoints
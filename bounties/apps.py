@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BountiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bounties'
+
+    def ready(self):
+        from . import authentication, checks, image_variants, media_manifest  # noqa: F401
@@ -11,6 +11,8 @@ from django.utils import timezone
 from django.db import transaction
 import json
 
+from .balances import publish_balance
+
 
 class AuctionBid(models.Model):
     """
@@ -115,6 +117,7 @@ class AuctionBid(models.Model):
             # Reserve coins
             profile.coin_balance -= self.amount
             profile.save(update_fields=['coin_balance'])
+            publish_balance(profile, -self.amount)
             
             # Update previous highest bid status to 'outbid'
             if auction.current_highest_bidder:
@@ -127,18 +130,17 @@ class AuctionBid(models.Model):
                     previous_bid.status = 'outbid'
                     previous_bid.save()
             
-            # Update auction with new highest bid
-            auction.current_highest_bid = self.amount
-            auction.current_highest_bidder = self.user
-            auction.total_bids += 1
-            auction.save()
-            
             # Save this bid
             self.status = 'accepted'
             self.coins_reserved = True
             self.coins_deducted = True
-            self.previous_highest_bid = auction.current_highest_bid - self.amount
+            self.previous_highest_bid = auction.current_highest_bid
             self.save()
+
+            # Append to the event log, which moves the auction's highest bid
+            from .events import record_event
+            update_fields = record_event(auction, 'bid_accepted', bid=self, user=self.user, amount=self.amount)
+            auction.save(update_fields=update_fields + ['updated_at'])
             
             return True
     
@@ -147,12 +149,15 @@ class AuctionBid(models.Model):
         with transaction.atomic():
             if self.status not in ['pending', 'accepted']:
                 raise ValueError("Cannot cancel this bid")
+            if self.auction.settled_at:
+                raise ValueError("Cannot cancel a bid on a settled auction")
             
             # Refund coins
             from .models import UserProfile
             profile = UserProfile.objects.select_for_update().get(user=self.user)
             profile.coin_balance += self.amount
             profile.save(update_fields=['coin_balance'])
+            publish_balance(profile, self.amount)
             
             # Update bid status
             self.status = 'cancelled'
@@ -160,21 +165,20 @@ class AuctionBid(models.Model):
             self.coins_deducted = False
             self.save()
             
-            # Update auction if this was the highest bid
-            if self.auction.current_highest_bidder == self.user:
-                # Find new highest bid
-                new_highest = self.auction.bids.filter(
-                    status='accepted'
-                ).exclude(pk=self.pk).order_by('-amount').first()
-                
-                if new_highest:
-                    self.auction.current_highest_bid = new_highest.amount
-                    self.auction.current_highest_bidder = new_highest.user
-                else:
-                    self.auction.current_highest_bid = 0
-                    self.auction.current_highest_bidder = None
-                
-                self.auction.save()
+            # Append to the event log; if this was the highest bid the
+            # projector falls back to the next standing bid.
+            from .models import Auction
+            from .events import record_event
+            auction = Auction.objects.select_for_update().get(pk=self.auction_id)
+            update_fields = record_event(auction, 'bid_cancelled', bid=self, user=self.user, amount=self.amount)
+            if update_fields:
+                auction.save(update_fields=update_fields + ['updated_at'])
+
+                # The high bid went down, so cached marks would reject valid bids.
+                from .bidding import clear_high_water_mark
+                from .bid_sequencer import bid_sequencer
+                clear_high_water_mark(self.auction.id)
+                bid_sequencer.invalidate(self.auction.id)
 
 
 class AuctionWinner(models.Model):
@@ -204,25 +208,24 @@ class AuctionWinner(models.Model):
         return f"{self.winner.username} won {self.auction.title} for {self.winning_amount} coins"
     
     def complete_transfer(self):
-        """Complete the coin transfer from winner to system."""
+        """
+        Record the winner's payment.
+
+        The coins already left the winner's balance when the winning bid was
+        placed, so this only writes the ledger entry and flags the transfer.
+        Batch settlement (bounties.settlement) does the same for many
+        auctions at once. Returns False when the payment was already recorded.
+        """
         with transaction.atomic():
-            # Lock winner's profile
-            from .models import UserProfile
-            profile = UserProfile.objects.select_for_update().get(user=self.winner)
-            
-            # Verify winner still has the coins (they might have spent them)
-            if profile.coin_balance < self.winning_amount:
-                raise ValueError("Winner no longer has sufficient coins")
-            
-            # Transfer coins (deduct from winner - admin will handle receiving)
-            profile.coin_balance -= self.winning_amount
-            profile.save(update_fields=['coin_balance'])
-            
+            winner = AuctionWinner.objects.select_for_update().get(pk=self.pk)
+            if winner.coins_transferred:
+                return False
+
             # Mark transfer as completed
             self.coins_transferred = True
             self.transfer_completed_at = timezone.now()
-            self.save()
-            
+            self.save(update_fields=['coins_transferred', 'transfer_completed_at'])
+
             # Create transaction record
             from .models import CoinTransaction
             CoinTransaction.objects.create(
@@ -232,5 +235,43 @@ class AuctionWinner(models.Model):
                 reference_id=str(self.auction.id),
                 description=f"Payment for winning auction: {self.auction.title}"
             )
-            
-            return True
\ No newline at end of file
+
+            return True
+
+
+class AuctionEvent(models.Model):
+    """
+    Append-only log of changes to an auction's bidding state.
+
+    The snapshot columns on Auction (current_highest_bid,
+    current_highest_bidder, total_bids, ends_at, status) are a projection
+    of this log; see bounties.events.
+    """
+
+    KIND_CHOICES = [
+        ('bid_accepted', 'Bid accepted'),
+        ('bid_cancelled', 'Bid cancelled'),
+        ('extended', 'Extended'),
+        ('ended', 'Ended'),
+        ('cancelled', 'Cancelled'),
+        ('rescheduled', 'Rescheduled'),
+        ('status_changed', 'Status changed'),
+    ]
+
+    auction = models.ForeignKey('bounties.Auction', on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    bid = models.ForeignKey(AuctionBid, on_delete=models.SET_NULL, null=True, blank=True, related_name='events')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='auction_events')
+    amount = models.IntegerField(null=True, blank=True, help_text="Bid or winning amount in coins")
+    ends_at = models.DateTimeField(null=True, blank=True, help_text="New end time for extended and rescheduled events")
+    status = models.CharField(max_length=20, blank=True, help_text="New status for status_changed events")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['auction', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.auction_id} #{self.id} {self.kind}"
@@ -15,19 +15,22 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q, Count, Max
+from django.db.models import Q
 from django.contrib.auth.decorators import login_required
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import logging
-import django.db.models as models
-from datetime import timedelta
 
 from .models import UserProfile
-from .models import Auction, AuctionImage
+from .models import Auction
 from .auction_models import AuctionBid, AuctionWinner
 from .serializers import AuctionSerializer, AuctionBidSerializer, AuctionWinnerSerializer
 from .authentication import FirebaseAuthentication
+from .bidding import submit_bid, publish_high_water_mark, clear_high_water_mark
+from .leaderboard import leaderboards
+from .lifecycle import cancel_auction, end_auction, notify_schedule_changed, start_auction
+from .publisher import frame_message
+from .uploads import attach_uploads, discard_uploads, store_uploads
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +90,22 @@ class AuctionDetailView(RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
+def _broadcast_auction_created(auction, request):
+    """Tell every connected client about a new auction."""
+    try:
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            'auction_updates',
+            frame_message('auction_broadcast', {
+                'type': 'auction_created',
+                'auction': AuctionSerializer(auction, context={'request': request}).data,
+                'timestamp': timezone.now().isoformat()
+            })
+        )
+    except Exception as e:
+        logger.error(f"Error broadcasting creation of auction {auction.id}: {str(e)}")
+
+
 class CreateAuctionView(APIView):
     """
     Create a new auction (Admin only).
@@ -125,82 +144,58 @@ class CreateAuctionView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if there's already an active auction
-        active_auction = Auction.objects.filter(status='active').first()
-        if active_auction:
-            return Response(
-                {
-                    'error': 'Cannot create new auction while another auction is active',
-                    'active_auction': {
-                        'id': active_auction.id,
-                        'title': active_auction.title,
-                        'ends_at': active_auction.ends_at
-                    }
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         serializer = AuctionSerializer(data=request.data, context={'request': request})
         
         if serializer.is_valid():
+            uploaded_files = request.FILES.getlist('images') or request.FILES.getlist('image_files')
+            try:
+                # Written before the transaction opens, so slow disk or
+                # network writes of large uploads never hold database locks.
+                images = store_uploads(uploaded_files)
+            except Exception as e:
+                logger.error(f"Error storing auction images: {str(e)}")
+                return Response(
+                    {'error': 'Failed to store auction images'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+
+            now = timezone.now()
+            starts_at = serializer.validated_data['starts_at']
+            ends_at = serializer.validated_data['ends_at']
+            if starts_at <= now < ends_at:
+                auction_status = 'active'
+            elif now < starts_at:
+                auction_status = 'upcoming'
+            else:
+                auction_status = 'ended'
+
             try:
                 with transaction.atomic():
-                    auction = serializer.save(created_by=user)
-
-                    now = timezone.now()
-                    if auction.starts_at <= now < auction.ends_at:
-                        auction.status = 'active'
-                    elif now < auction.starts_at:
-                        auction.status = 'upcoming'
-                    else:
-                        auction.status = 'ended'
-                    auction.save(update_fields=['status'])
-
-                    uploaded_images = request.FILES.getlist('images') or request.FILES.getlist('image_files')
-                    stored_image_urls = []
-
-                    for index, image_file in enumerate(uploaded_images):
-                        auction_image = AuctionImage.objects.create(
-                            auction=auction,
-                            image=image_file,
-                            order=index
-                        )
-                        if auction_image.image:
-                            # Store relative media path so URLs remain valid across
-                            # environments/domains (localhost, Render, custom domains).
-                            stored_image_urls.append(auction_image.image.url)
-
-                    if stored_image_urls:
-                        auction.image_urls = stored_image_urls
-                        auction.save(update_fields=['image_urls'])
-                    
-                    # Broadcast auction creation to all connected clients
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        'auction_updates',
-                        {
-                            'type': 'auction_broadcast',
-                            'data': {
-                                'type': 'auction_created',
-                                'auction': AuctionSerializer(auction, context={'request': request}).data,
-                                'timestamp': timezone.now().isoformat()
-                            }
-                        }
-                    )
-                    
-                    logger.info(f"Auction created by admin {user.username}: {auction.title}")
-                    
-                    return Response(
-                        AuctionSerializer(auction, context={'request': request}).data,
-                        status=status.HTTP_201_CREATED
+                    auction = serializer.save(
+                        created_by=user,
+                        status=auction_status,
+                        # Relative media paths keep URLs valid across
+                        # environments/domains (localhost, Render, custom domains).
+                        image_urls=[image.image.url for image in images],
                     )
-                    
+                    attach_uploads(auction, images)
+                    publish_high_water_mark(auction)
+                    notify_schedule_changed(auction.id)
+                    transaction.on_commit(lambda: _broadcast_auction_created(auction, request))
             except Exception as e:
+                discard_uploads(images)
                 logger.error(f"Error creating auction: {str(e)}")
                 return Response(
                     {'error': 'Failed to create auction'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
+
+            logger.info(f"Auction created by admin {user.username}: {auction.title}")
+
+            return Response(
+                AuctionSerializer(auction, context={'request': request}).data,
+                status=status.HTTP_201_CREATED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -227,20 +222,19 @@ class DeleteAuctionView(APIView):
             auction_title = auction.title
             deleted_auction_id = auction.id
             auction.delete()
+            clear_high_water_mark(deleted_auction_id)
+            leaderboards.discard(deleted_auction_id)
 
             # Broadcast auction deletion to connected clients
             channel_layer = get_channel_layer()
             async_to_sync(channel_layer.group_send)(
                 'auction_updates',
-                {
-                    'type': 'auction_broadcast',
-                    'data': {
-                        'type': 'auction_deleted',
-                        'auction_id': deleted_auction_id,
-                        'title': auction_title,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                }
+                frame_message('auction_broadcast', {
+                    'type': 'auction_deleted',
+                    'auction_id': deleted_auction_id,
+                    'title': auction_title,
+                    'timestamp': timezone.now().isoformat()
+                })
             )
 
             logger.info(f"Auction deleted by admin {user.username}: {auction_title} (ID: {deleted_auction_id})")
@@ -265,202 +259,8 @@ class PlaceBidView(APIView):
     authentication_classes = [FirebaseAuthentication]
     
     def post(self, request, auction_id):
-        user = request.user
-        
-        try:
-            with transaction.atomic():
-                # Get user profile (locked for safe balance updates)
-                user_profile = UserProfile.objects.select_for_update().get(user=user)
-
-                # Get auction (locked to prevent race conditions on highest bid updates)
-                auction = Auction.objects.select_for_update().get(id=auction_id)
-                now = timezone.now()
-
-                # Auto-sync auction status with actual time window
-                if auction.status == 'upcoming' and auction.starts_at <= now < auction.ends_at:
-                    auction.status = 'active'
-                    auction.save(update_fields=['status'])
-                elif auction.status == 'active' and auction.ends_at <= now:
-                    auction.status = 'ended'
-                    auction.save(update_fields=['status'])
-
-                # Validate auction status
-                if auction.status != 'active':
-                    return Response(
-                        {
-                            'error': 'Auction is not active',
-                            'status': auction.status,
-                        },
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Validate auction start time
-                if auction.starts_at > now:
-                    return Response(
-                        {'error': 'Auction has not started yet'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Validate auction end time
-                if auction.ends_at <= now:
-                    return Response(
-                        {'error': 'Auction has ended'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Get bid amount from request
-                bid_amount = request.data.get('amount')
-                try:
-                    bid_amount = int(bid_amount)
-                except (TypeError, ValueError):
-                    bid_amount = 0
-
-                if bid_amount <= 0:
-                    return Response(
-                        {'error': 'Invalid bid amount'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Validate user has enough coins
-                if user_profile.coin_balance < bid_amount:
-                    return Response(
-                        {'error': 'Insufficient coins'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Validate minimum bid
-                current_highest_bid = auction.current_highest_bid
-                min_bid = current_highest_bid + 1 if current_highest_bid else auction.minimum_bid
-
-                if bid_amount < min_bid:
-                    return Response(
-                        {'error': f'Bid must be at least {min_bid} coins'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Mark previous accepted bid(s) as outbid before creating a new accepted bid
-                AuctionBid.objects.filter(
-                    auction=auction,
-                    user=user,
-                    status='accepted'
-                ).update(status='outbid')
-
-                if auction.current_highest_bidder and auction.current_highest_bidder != user:
-                    AuctionBid.objects.filter(
-                        auction=auction,
-                        user=auction.current_highest_bidder,
-                        status='accepted'
-                    ).update(status='outbid')
-
-                # Create bid record with required auction bid fields
-                bid = AuctionBid.objects.create(
-                    auction=auction,
-                    user=user,
-                    amount=bid_amount,
-                    status='accepted',
-                    minimum_required=int(min_bid),
-                    previous_highest_bid=int(current_highest_bid or 0),
-                    coins_reserved=True,
-                    coins_deducted=True,
-                )
-
-                # Deduct coins from user
-                user_profile.coin_balance -= bid_amount
-                user_profile.save(update_fields=['coin_balance'])
-
-                # Update auction state
-                extension_applied = False
-                extension_message = None
-                extension_threshold_seconds = 3 * 60
-                extension_delta = timedelta(minutes=3)
-
-                # Anti-snipe: extend auction by 3 minutes only when bid is placed
-                # at exactly 3 minutes remaining (second-level precision).
-                remaining_seconds = round((auction.ends_at - now).total_seconds())
-                if remaining_seconds == extension_threshold_seconds:
-                    auction.ends_at = auction.ends_at + extension_delta
-                    extension_applied = True
-                    extension_message = 'A new highest bid placed 3 mins before the end will extend the auction by 3 min'
-
-                auction.current_highest_bid = bid_amount
-                auction.current_highest_bidder = user
-                auction.total_bids += 1
-                auction_update_fields = ['current_highest_bid', 'current_highest_bidder', 'total_bids']
-                if extension_applied:
-                    auction_update_fields.append('ends_at')
-                auction.save(update_fields=auction_update_fields)
-
-                # Broadcast bid update to auction group
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'auction_{auction.id}',
-                    {
-                        'type': 'auction_update',
-                        'data': {
-                            'type': 'new_bid',
-                            'auction_id': auction.id,
-                            'user': user.username,
-                            'amount': bid_amount,
-                            'timestamp': timezone.now().isoformat(),
-                            'current_highest_bid': bid_amount,
-                            'bid_count': auction.total_bids,
-                            'auction_extended': extension_applied,
-                            'extension_minutes': 3 if extension_applied else 0,
-                            'new_end_time': auction.ends_at.isoformat() if extension_applied else None,
-                            'extension_message': extension_message,
-                        }
-                    }
-                )
-
-                # Broadcast to leaderboard group
-                async_to_sync(channel_layer.group_send)(
-                    f'leaderboard_{auction.id}',
-                    {
-                        'type': 'leaderboard_update',
-                        'data': {
-                            'type': 'bid_update',
-                            'auction_id': auction.id,
-                            'current_highest_bid': bid_amount,
-                            'highest_bidder': user.username,
-                            'bid_count': auction.total_bids,
-                            'auction_extended': extension_applied,
-                            'extension_minutes': 3 if extension_applied else 0,
-                            'new_end_time': auction.ends_at.isoformat() if extension_applied else None,
-                        }
-                    }
-                )
-
-                logger.info(f"Bid placed by {user.username} on auction {auction.title}: {bid_amount} coins")
-
-                return Response(
-                    {
-                        'message': 'Bid placed successfully',
-                        'bid': AuctionBidSerializer(bid).data,
-                        'remaining_coins': user_profile.coin_balance,
-                        'extension_applied': extension_applied,
-                        'extension_minutes': 3 if extension_applied else 0,
-                        'new_ends_at': auction.ends_at.isoformat() if extension_applied else None,
-                        'extension_message': extension_message,
-                    },
-                    status=status.HTTP_201_CREATED
-                )
-                
-        except Auction.DoesNotExist:
-            return Response(
-                {'error': 'Auction not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except UserProfile.DoesNotExist:
-            return Response(
-                {'error': 'User profile not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Exception as e:
-            logger.exception(f"Error placing bid: {str(e)}")
-            return Response(
-                {'error': 'Failed to place bid'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        payload, status_code = submit_bid(request.user, auction_id, request.data.get('amount'))
+        return Response(payload, status=status_code)
 
 
 class AuctionStatusView(APIView):
@@ -480,50 +280,44 @@ class AuctionStatusView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        try:
-            auction = Auction.objects.get(id=auction_id)
-            
-            new_status = request.data.get('status')
-            valid_statuses = ['active', 'upcoming', 'ended', 'cancelled']
-            
-            if new_status not in valid_statuses:
-                return Response(
-                    {'error': f'Invalid status. Valid options: {", ".join(valid_statuses)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            old_status = auction.status
-            auction.status = new_status
-            auction.save()
-            
-            # Broadcast status change
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f'auction_{auction.id}',
-                {
-                    'type': 'auction_update',
-                    'data': {
-                        'type': 'status_changed',
-                        'auction_id': auction.id,
-                        'old_status': old_status,
-                        'new_status': new_status,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                }
+        new_status = request.data.get('status')
+        # Only the transitions the lifecycle functions perform, so winners,
+        # events, broadcasts and the high-water mark stay consistent.
+        valid_statuses = ['active', 'ended', 'cancelled']
+        if new_status not in valid_statuses:
+            return Response(
+                {'error': f'Invalid status. Valid options: {", ".join(valid_statuses)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            logger.info(f"Auction status changed by admin {user.username}: {auction.title} {old_status} -> {new_status}")
-            
+
+        try:
+            if new_status == 'active':
+                auction = start_auction(auction_id, force=True)
+                if auction is None:
+                    Auction.objects.get(id=auction_id)
+                    raise ValueError('Only an upcoming auction before its end time can be started')
+            elif new_status == 'ended':
+                auction, _ = end_auction(auction_id, force=True)
+            else:
+                auction = cancel_auction(auction_id)
+        except ValueError as e:
             return Response(
-                {'message': 'Auction status updated', 'status': new_status},
-                status=status.HTTP_200_OK
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
         except Auction.DoesNotExist:
             return Response(
                 {'error': 'Auction not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        notify_schedule_changed(auction.id)
+
+        logger.info(f"Auction status changed by admin {user.username}: {auction.title} -> {new_status}")
+
+        return Response(
+            {'message': 'Auction status updated', 'status': new_status},
+            status=status.HTTP_200_OK
+        )
 
 
 class EndAuctionView(APIView):
@@ -544,66 +338,12 @@ class EndAuctionView(APIView):
             )
         
         try:
-            with transaction.atomic():
-                auction = Auction.objects.select_for_update().get(id=auction_id)
-                
-                if auction.status != 'active':
-                    return Response(
-                        {'error': 'Auction is not active'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Get highest bid
-                highest_bid = AuctionBid.objects.filter(
-                    auction=auction,
-                    status='accepted'
-                ).order_by('-amount').first()
-                if not highest_bid:
-                    return Response(
-                        {'error': 'No bids found for this auction'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Create winner record
-                winner = AuctionWinner.objects.create(
-                    auction=auction,
-                    winner=highest_bid.user,
-                    winning_amount=highest_bid.amount,
-                    coins_transferred=False,
-                )
-                
-                # Update auction status
-                auction.status = 'ended'
-                auction.save()
-                
-                # Broadcast auction end and winner
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'auction_{auction.id}',
-                    {
-                        'type': 'auction_update',
-                        'data': {
-                            'type': 'auction_ended',
-                            'auction_id': auction.id,
-                            'winner': {
-                                'username': winner.winner.username,
-                                'winning_bid': winner.winning_amount
-                            },
-                            'timestamp': timezone.now().isoformat()
-                        }
-                    }
-                )
-                
-                logger.info(f"Auction ended by admin {user.username}: {auction.title}, winner: {winner.winner.username}")
-                
-                return Response(
-                    {
-                        'message': 'Auction ended successfully',
-                        'winner': AuctionWinnerSerializer(winner).data
-                    },
-                    status=status.HTTP_200_OK
-                )
-                
+            auction, winner = end_auction(auction_id, force=True, require_winner=True)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Auction.DoesNotExist:
             return Response(
                 {'error': 'Auction not found'},
@@ -616,6 +356,16 @@ class EndAuctionView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        logger.info(f"Auction ended by admin {user.username}: {auction.title}, winner: {winner.winner.username}")
+
+        return Response(
+            {
+                'message': 'Auction ended successfully',
+                'winner': AuctionWinnerSerializer(winner).data
+            },
+            status=status.HTTP_200_OK
+        )
+
 
 class AuctionLeaderboardView(APIView):
     """
@@ -624,42 +374,14 @@ class AuctionLeaderboardView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, auction_id):
-        try:
-            auction = Auction.objects.get(id=auction_id)
-            
-            # Get top 10 bidders by highest bid amount
-            top_bidders = AuctionBid.objects.filter(
-                auction=auction
-            ).values('user__username').annotate(
-                total_bids=models.Count('id'),
-                highest_bid=models.Max('amount')
-            ).order_by('-highest_bid')[:10]
-            
-            # Get current highest bid
-            current_highest_bid = auction.current_highest_bid
-            current_highest_bidder = None
-            
-            if current_highest_bid:
-                latest_bid = AuctionBid.objects.filter(
-                    auction=auction,
-                    amount=current_highest_bid
-                ).first()
-                if latest_bid:
-                    current_highest_bidder = latest_bid.user.username
-            
-            return Response({
-                'auction_id': auction_id,
-                'current_highest_bid': current_highest_bid,
-                'current_highest_bidder': current_highest_bidder,
-                'total_bids': auction.total_bids,
-                'top_bidders': list(top_bidders)
-            })
-            
-        except Auction.DoesNotExist:
+        # Served from the worker's in-process board; no queries once it is current.
+        board = leaderboards.get(auction_id)
+        if board is None:
             return Response(
                 {'error': 'Auction not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        return Response(board.snapshot())
 
 
 class UserAuctionHistoryView(APIView):
@@ -688,58 +410,24 @@ class UserAuctionHistoryView(APIView):
 # Utility function to check auction timers and end auctions
 def check_auction_timers():
     """
-    Utility function to check and end auctions that have expired.
-    This should be called periodically (e.g., via Celery beat).
+    One-off sweep that ends every active auction past its end time.
+
+    The lifecycle scheduler (bounties.lifecycle) ends auctions at their
+    deadlines; this is kept for recovery after downtime and for scripts.
+    Returns the number of auctions ended.
     """
-    now = timezone.now()
-    
-    # Find auctions that should be ended
-    expiring_auctions = Auction.objects.filter(
+    expired_ids = Auction.objects.filter(
         status='active',
-        ends_at__lte=now
-    )
-    
-    for auction in expiring_auctions:
+        ends_at__lte=timezone.now()
+    ).values_list('id', flat=True)
+
+    ended = 0
+    for auction_id in expired_ids:
         try:
-            with transaction.atomic():
-                # Get highest bid
-                highest_bid = AuctionBid.objects.filter(
-                    auction=auction,
-                    status='accepted'
-                ).order_by('-amount').first()
-                
-                if highest_bid:
-                    # Create winner record
-                    winner = AuctionWinner.objects.create(
-                        auction=auction,
-                        winner=highest_bid.user,
-                        winning_amount=highest_bid.amount,
-                        coins_transferred=False,
-                    )
-                
-                # Update auction status
-                auction.status = 'ended'
-                auction.save()
-                
-                # Broadcast auction end
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'auction_{auction.id}',
-                    {
-                        'type': 'auction_update',
-                        'data': {
-                            'type': 'auction_ended',
-                            'auction_id': auction.id,
-                            'winner': {
-                                'username': winner.winner.username if highest_bid else None,
-                                'winning_bid': winner.winning_amount if highest_bid else None
-                            },
-                            'timestamp': now.isoformat()
-                        }
-                    }
-                )
-                
-                logger.info(f"Auction expired and ended: {auction.title}")
-                
+            end_auction(auction_id)
+            ended += 1
+        except (Auction.DoesNotExist, ValueError):
+            continue
         except Exception as e:
-            logger.error(f"Error ending expired auction {auction.id}: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error ending expired auction {auction_id}: {str(e)}")
+    return ended
@@ -15,6 +15,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from .models import UserProfile
+from .authentication import verify_jwt_token
 
 logger = logging.getLogger(__name__)
 
@@ -131,24 +132,6 @@ def generate_jwt_token(user):
     return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
 
 
-def verify_jwt_token(token):
-    """Verify JWT token and return user"""
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY,
-            algorithms=['HS256']
-        )
-        user = User.objects.get(id=payload['user_id'])
-        return user
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
-    except User.DoesNotExist:
-        return None
-
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def firebase_login(request):
@@ -238,25 +221,6 @@ def logout(request):
     return Response({'message': 'Logout successful'})
 
 
-class FirebaseAuthentication:
-    """Custom authentication class for Firebase JWT tokens"""
-    
-    def authenticate(self, request):
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        
-        if not token:
-            return None
-            
-        user = verify_jwt_token(token)
-        if user:
-            return (user, None)
-        
-        return None
-    
-    def authenticate_header(self, request):
-        return 'Bearer'
-
-
 @api_view(['GET'])
 def get_user_profile(request):
     """Get current user profile"""
@@ -1,43 +1,219 @@
-import os
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+# Fields copied into a cached user snapshot; enough to rebuild a usable User
+# for authentication, permission checks and profile responses.
+USER_SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+)
 
-def verify_jwt_token(token):
-    """Verify JWT token and return user"""
+
+def user_snapshot(user):
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+
+def user_from_snapshot(snapshot):
+    """Rebuild a User instance from a snapshot without touching the database."""
+    user = User(**snapshot)
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+class UserSnapshotCache:
+    """
+    Two-level cache of user_id -> user snapshot for token authentication.
+
+    A process-local LRU answers repeat requests without any I/O; behind it an
+    optional shared cache (Redis in production) lets workers reuse each
+    other's lookups. Saving a user drops both entries for that user; copies
+    held in other workers' LRUs expire after ``local_ttl`` seconds.
+    """
+
+    KEY = 'auth:user:{}'
+
+    def __init__(self, max_size=10000, ttl=300, local_ttl=15, shared=False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl)
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'lookup_seconds': 0.0}
+
+    def get_local(self, user_id):
+        """Return the user from the process-local LRU only, or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            snapshot, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats['local_hits'] += 1
+        return user_from_snapshot(snapshot)
+
+    def get(self, user_id):
+        return self.get_many([user_id]).get(user_id)
+
+    def get_many(self, user_ids):
+        """Resolve users by id, hitting the database at most once."""
+        started = time.perf_counter()
+        users = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.get_local(user_id)
+            if user is not None:
+                users[user_id] = user
+            else:
+                missing.append(user_id)
+
+        if missing and self.shared:
+            found = cache.get_many([self.KEY.format(user_id) for user_id in missing])
+            still_missing = []
+            for user_id in missing:
+                snapshot = found.get(self.KEY.format(user_id))
+                if snapshot is None:
+                    still_missing.append(user_id)
+                    continue
+                self._store_local(user_id, snapshot)
+                users[user_id] = user_from_snapshot(snapshot)
+            self._count('shared_hits', len(missing) - len(still_missing))
+            missing = still_missing
+
+        if missing:
+            self._count('misses', len(missing))
+            snapshots = {}
+            for user in User.objects.filter(id__in=missing):
+                snapshot = user_snapshot(user)
+                self._store_local(user.id, snapshot)
+                snapshots[self.KEY.format(user.id)] = snapshot
+                users[user.id] = user
+            if snapshots and self.shared:
+                cache.set_many(snapshots, self.ttl)
+
+        self._count('lookup_seconds', time.perf_counter() - started)
+        return users
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.shared:
+            cache.delete(self.KEY.format(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        hits = stats['local_hits'] + stats['shared_hits']
+        lookups = hits + stats['misses']
+        return {
+            'local_hits': stats['local_hits'],
+            'shared_hits': stats['shared_hits'],
+            'misses': stats['misses'],
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'lookup_seconds_total': round(stats['lookup_seconds'], 6),
+            'avg_lookup_ms': round(stats['lookup_seconds'] * 1000 / lookups, 4) if lookups else None,
+            'local_size': size,
+            'max_size': self.max_size,
+            'shared': self.shared,
+        }
+
+    def _store_local(self, user_id, snapshot):
+        with self._lock:
+            self._entries[user_id] = (snapshot, time.monotonic() + self.local_ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, name, amount):
+        if amount:
+            with self._lock:
+                self._stats[name] += amount
+
+
+user_cache = UserSnapshotCache(
+    max_size=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    local_ttl=settings.AUTH_USER_CACHE_LOCAL_TTL_SECONDS,
+    shared=settings.AUTH_USER_CACHE_SHARED,
+)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch fields outside the snapshot (e.g. last_login on
+    # admin sign-in) keep the cached copy.
+    if update_fields is None or set(update_fields) & set(USER_SNAPSHOT_FIELDS):
+        _invalidate_now_and_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(instance.pk)
+
+
+def _invalidate_now_and_on_commit(user_id):
+    # Drop again on commit so a lookup racing the open transaction cannot
+    # leave the pre-save row cached.
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+def decode_jwt_token(token):
+    """Return the JWT payload, or None if the token is invalid or expired."""
     try:
-        payload = jwt.decode(
-            token, 
+        return jwt.decode(
+            token,
             settings.SECRET_KEY,
             algorithms=['HS256']
         )
-        user = User.objects.get(id=payload['user_id'])
-        return user
-    except jwt.ExpiredSignatureError:
-        return None
     except jwt.InvalidTokenError:
         return None
-    except User.DoesNotExist:
+
+
+def verify_jwt_token(token):
+    """Verify JWT token and return user"""
+    payload = decode_jwt_token(token)
+    if payload is None or 'user_id' not in payload:
         return None
+    return user_cache.get(payload['user_id'])
 
 
 class FirebaseAuthentication(BaseAuthentication):
     """Custom authentication class for Firebase JWT tokens"""
-    
+
     def authenticate(self, request):
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        
+
         if not token:
             return None
-            
+
         user = verify_jwt_token(token)
         if user:
             return (user, None)
-        
+
         return None
-    
+
     def authenticate_header(self, request):
-        return 'Bearer'
\ No newline at end of file
+        return 'Bearer'
@@ -0,0 +1,95 @@
+"""
+Cached and pushed coin balances.
+
+Every ledger write (coin grants, bids, bid refunds, settlement refunds) pushes
+the new balance into the cache once its transaction commits, so polling the
+balance endpoint is answered from the cache and revalidated with an ETag.
+The same write is pushed to the owner's ``user_<id>`` WebSocket group,
+coalesced to at most one update per user per publisher tick.
+
+Cached balances carry a version: the time the ledger write was published,
+taken while its transaction held the profile row lock, so versions follow
+commit order. After-commit callbacks of different transactions can run in
+any order, and an older balance never replaces a newer one.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .publisher import CoalescingPublisher
+
+BALANCE_KEY = 'user:{}:balance'
+
+balance_publisher = CoalescingPublisher(interval=settings.BALANCE_PUSH_INTERVAL_MS / 1000)
+
+
+def user_group_name(user_id):
+    return f'user_{user_id}'
+
+
+def balance_etag(user_id, balance):
+    return f'"balance-{user_id}-{balance}"'
+
+
+def _merge_balance_updates(queued, latest):
+    return dict(latest, delta=queued['delta'] + latest['delta'])
+
+
+def publish_balance(profile, delta):
+    """
+    Write the profile's balance through to the cache and push it to the user.
+
+    Both happen once the surrounding transaction commits so a rolled back
+    ledger write never shows up in the cache or on a socket.
+    """
+    publish_balances({profile.user_id: (profile.coin_balance, delta)})
+
+
+def _cached_version(entry):
+    # Entries are (version, balance); a bare balance predates versioning.
+    return entry[0] if isinstance(entry, tuple) else 0
+
+
+def publish_balances(updates):
+    """Bulk form of publish_balance for ``{user_id: (balance, delta)}``."""
+    if not updates:
+        return
+    # Callers hold the profile row locks, so this orders the writes.
+    version = time.time()
+
+    def write_through():
+        keys = {BALANCE_KEY.format(user_id): balance for user_id, (balance, _) in updates.items()}
+        cached = cache.get_many(list(keys))
+        newer = {
+            key: (version, balance) for key, balance in keys.items()
+            if key not in cached or _cached_version(cached[key]) < version
+        }
+        if newer:
+            cache.set_many(newer, settings.BALANCE_CACHE_TTL_SECONDS)
+        for user_id, (balance, delta) in updates.items():
+            balance_publisher.publish(
+                user_group_name(user_id),
+                'balance_update',
+                {'type': 'balance_update', 'balance': balance, 'delta': delta},
+                merge=_merge_balance_updates,
+            )
+
+    transaction.on_commit(write_through)
+
+
+def get_balance(user):
+    """Return the user's balance, reading the profile only on a cache miss."""
+    entry = cache.get(BALANCE_KEY.format(user.id))
+    if entry is not None:
+        return entry[1] if isinstance(entry, tuple) else entry
+
+    from .models import UserProfile
+    profile, created = UserProfile.objects.get_or_create(user=user)
+    # add() rather than set(): a write that committed after our read has
+    # already stored the newer balance and must win. Version 0 lets any
+    # ledger write still in flight replace this read.
+    cache.add(BALANCE_KEY.format(user.id), (0, profile.coin_balance), settings.BALANCE_CACHE_TTL_SECONDS)
+    return profile.coin_balance
@@ -0,0 +1,376 @@
+"""
+Bid engine for the PlayMarket auction system.
+
+This module contains the validation and persistence steps used to place a
+bid, shared by the REST bid endpoint and the bid sequencer.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .models import UserProfile, Auction
+from .auction_models import AuctionBid
+from .balances import publish_balance
+from .events import record_event
+from .publisher import CoalescingPublisher
+from .serializers import AuctionBidSerializer
+
+logger = logging.getLogger(__name__)
+
+HIGH_WATER_MARK_KEY = 'auction:{}:high_water_mark'
+HIGH_WATER_MARK_TTL_SECONDS = 60
+
+EXTENSION_FIELDS = ('auction_extended', 'extension_minutes', 'new_end_time', 'extension_message')
+
+auction_publisher = CoalescingPublisher(interval=settings.AUCTION_BROADCAST_INTERVAL_MS / 1000)
+
+
+def parse_bid_amount(raw_amount):
+    """Return the bid amount as an int, or 0 when it cannot be parsed."""
+    try:
+        return int(raw_amount)
+    except (TypeError, ValueError):
+        return 0
+
+
+def minimum_bid_for(current_highest_bid, minimum_bid):
+    """Return the smallest acceptable bid given the auction state."""
+    return current_highest_bid + 1 if current_highest_bid else minimum_bid
+
+
+def quantize_coins(value):
+    """Normalize a coin amount to the two-decimal form stored on ``Auction``."""
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def _high_water_mark_state(auction):
+    return {
+        'status': auction.status,
+        'starts_at': auction.starts_at,
+        'ends_at': auction.ends_at,
+        'minimum_bid': quantize_coins(auction.minimum_bid),
+        'current_highest_bid': quantize_coins(auction.current_highest_bid),
+    }
+
+
+def publish_high_water_mark(auction):
+    """
+    Publish the auction's current high bid for the lock-free pre-check.
+
+    The value is written once the surrounding transaction commits so a rolled
+    back bid never raises the mark.
+    """
+    state = _high_water_mark_state(auction)
+    transaction.on_commit(
+        lambda: cache.set(HIGH_WATER_MARK_KEY.format(auction.id), state, HIGH_WATER_MARK_TTL_SECONDS)
+    )
+
+
+def clear_high_water_mark(auction_id):
+    """Forget the published mark, e.g. after a bid is cancelled or an auction deleted."""
+    transaction.on_commit(lambda: cache.delete(HIGH_WATER_MARK_KEY.format(auction_id)))
+
+
+def precheck_bid(auction_id, raw_amount):
+    """
+    Reject an obviously stale bid without opening a transaction.
+
+    Returns the same ``(payload, status_code)`` the locked path would return
+    for a bid below the current high, or None when the bid must go through the
+    locked path. Only applies while the published mark shows the auction
+    inside its bidding window, so every other error keeps its usual message.
+    """
+    if not getattr(settings, 'BID_PRECHECK_ENABLED', True):
+        return None
+
+    state = cache.get(HIGH_WATER_MARK_KEY.format(auction_id))
+    if not state:
+        return None
+
+    now = timezone.now()
+    if state['status'] != 'active' or not (state['starts_at'] <= now < state['ends_at']):
+        return None
+
+    bid_amount = parse_bid_amount(raw_amount)
+    if bid_amount <= 0:
+        return None
+
+    min_bid = minimum_bid_for(state['current_highest_bid'], state['minimum_bid'])
+    if bid_amount < min_bid:
+        return {'error': f'Bid must be at least {min_bid} coins'}, status.HTTP_400_BAD_REQUEST
+    return None
+
+
+def anti_snipe_deadline(ends_at, now, window_seconds, extension_seconds):
+    """
+    Return the new end time for a bid accepted at ``now``, or None.
+
+    A bid landing within ``window_seconds`` of ``ends_at`` moves the end back
+    by ``extension_seconds``. Callers pass the ``ends_at`` read under the
+    auction row lock, so concurrent last-second bids extend from each other's
+    deadline rather than from a stale one. A zero window or extension turns
+    anti-snipe off.
+    """
+    if not window_seconds or not extension_seconds:
+        return None
+    remaining = ends_at - now
+    if timedelta(0) < remaining <= timedelta(seconds=window_seconds):
+        return ends_at + timedelta(seconds=extension_seconds)
+    return None
+
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    parts = []
+    if minutes:
+        parts.append(f'{minutes} min')
+    if seconds:
+        parts.append(f'{seconds} s')
+    return ' '.join(parts)
+
+
+def extension_minutes(auction):
+    minutes = auction.extension_seconds / 60
+    return int(minutes) if minutes.is_integer() else round(minutes, 2)
+
+
+def extension_message(auction):
+    return (
+        f'A new highest bid placed in the last {_format_seconds(auction.extension_window_seconds)} '
+        f'extends the auction by {_format_seconds(auction.extension_seconds)}'
+    )
+
+
+def sync_auction_status(auction, now):
+    """
+    Auto-start an upcoming auction whose window has opened.
+
+    Ending is left to the lifecycle scheduler so the winner is always
+    recorded; bids after ``ends_at`` are refused by check_bid_window.
+    Returns the list of changed fields; the caller is responsible for saving.
+    """
+    if auction.status == 'upcoming' and auction.starts_at <= now < auction.ends_at:
+        return record_event(auction, 'status_changed', status='active')
+    return []
+
+
+def check_bid_window(auction_status, starts_at, ends_at, now):
+    """Return an error payload when the auction is not accepting bids, else None."""
+    if auction_status != 'active':
+        return {
+            'error': 'Auction is not active',
+            'status': auction_status,
+        }
+    if starts_at > now:
+        return {'error': 'Auction has not started yet'}
+    if ends_at <= now:
+        return {'error': 'Auction has ended'}
+    return None
+
+
+def apply_bid(auction, user_profile, user, bid_amount, min_bid, now):
+    """
+    Record an accepted bid against a locked auction and user profile.
+
+    Marks previous accepted bids as outbid, creates the bid, deducts coins and
+    appends the bid (and any anti-snipe extension) to the auction event log,
+    which folds it into the in-memory auction snapshot. The auction itself is not saved; the
+    caller saves it with the returned update fields.
+    """
+    current_highest_bid = auction.current_highest_bid
+
+    # Mark previous accepted bid(s) as outbid before creating a new accepted bid
+    AuctionBid.objects.filter(
+        auction=auction,
+        user=user,
+        status='accepted'
+    ).update(status='outbid')
+
+    if auction.current_highest_bidder_id and auction.current_highest_bidder_id != user.id:
+        AuctionBid.objects.filter(
+            auction=auction,
+            user_id=auction.current_highest_bidder_id,
+            status='accepted'
+        ).update(status='outbid')
+
+    bid = AuctionBid.objects.create(
+        auction=auction,
+        user=user,
+        amount=bid_amount,
+        status='accepted',
+        minimum_required=int(min_bid),
+        previous_highest_bid=int(current_highest_bid or 0),
+        coins_reserved=True,
+        coins_deducted=True,
+    )
+
+    # Deduct coins from user
+    user_profile.coin_balance -= bid_amount
+    user_profile.save(update_fields=['coin_balance'])
+    publish_balance(user_profile, -bid_amount)
+
+    new_ends_at = anti_snipe_deadline(
+        auction.ends_at, now, auction.extension_window_seconds, auction.extension_seconds
+    )
+    extension_applied = new_ends_at is not None
+
+    update_fields = record_event(auction, 'bid_accepted', bid=bid, user=user, amount=bid_amount)
+    if extension_applied:
+        from .clock import publish_clock
+        from .lifecycle import notify_schedule_changed
+        update_fields += record_event(auction, 'extended', ends_at=new_ends_at)
+        notify_schedule_changed(auction.id)
+        publish_clock(auction)
+
+    return bid, extension_applied, update_fields
+
+
+def _merge_bid_updates(queued, latest):
+    """Keep the latest bid without losing an extension announced earlier in the tick."""
+    if latest['auction_extended'] or not queued['auction_extended']:
+        return latest
+    return dict(latest, **{field: queued[field] for field in EXTENSION_FIELDS if field in queued})
+
+
+def broadcast_bid(auction, username, bid_amount, bid_count, extension_applied):
+    """
+    Queue an accepted bid for the auction and leaderboard groups.
+
+    Nothing is sent until the transaction commits, and then only from the
+    publisher thread, so the bid never waits on the channel layer while it
+    holds row locks. A burst of bids on one auction reaches each socket as
+    one frame per tick carrying the latest state.
+    """
+    new_end_time = auction.ends_at.isoformat() if extension_applied else None
+    minutes = extension_minutes(auction) if extension_applied else 0
+
+    auction_update = {
+        'type': 'new_bid',
+        'auction_id': auction.id,
+        'user': username,
+        'amount': bid_amount,
+        'timestamp': timezone.now().isoformat(),
+        'current_highest_bid': bid_amount,
+        'bid_count': bid_count,
+        'auction_extended': extension_applied,
+        'extension_minutes': minutes,
+        'new_end_time': new_end_time,
+        'extension_message': extension_message(auction) if extension_applied else None,
+    }
+    leaderboard_update = {
+        'type': 'bid_update',
+        'auction_id': auction.id,
+        'current_highest_bid': bid_amount,
+        'highest_bidder': username,
+        'bid_count': bid_count,
+        'auction_extended': extension_applied,
+        'extension_minutes': minutes,
+        'new_end_time': new_end_time,
+    }
+
+    def publish():
+        auction_publisher.publish(
+            f'auction_{auction.id}', 'auction_update', auction_update, merge=_merge_bid_updates
+        )
+        auction_publisher.publish(
+            f'leaderboard_{auction.id}', 'leaderboard_update', leaderboard_update, merge=_merge_bid_updates
+        )
+
+    transaction.on_commit(publish)
+
+
+def bid_success_payload(bid, remaining_coins, auction, extension_applied):
+    """Build the response body returned for an accepted bid."""
+    return {
+        'message': 'Bid placed successfully',
+        'bid': AuctionBidSerializer(bid).data,
+        'current_highest_bid': auction.current_highest_bid,
+        'bid_count': auction.total_bids,
+        'remaining_coins': remaining_coins,
+        'extension_applied': extension_applied,
+        'extension_minutes': extension_minutes(auction) if extension_applied else 0,
+        'new_ends_at': auction.ends_at.isoformat() if extension_applied else None,
+        'extension_message': extension_message(auction) if extension_applied else None,
+    }
+
+
+def place_bid(user, auction_id, raw_amount):
+    """
+    Place a bid using row locks on the user profile and the auction.
+
+    Returns a ``(payload, status_code)`` tuple suitable for a DRF Response.
+    """
+    rejection = precheck_bid(auction_id, raw_amount)
+    if rejection:
+        return rejection
+
+    try:
+        with transaction.atomic():
+            # Get user profile (locked for safe balance updates)
+            user_profile = UserProfile.objects.select_for_update().get(user=user)
+
+            # Get auction (locked to prevent race conditions on highest bid updates)
+            auction = Auction.objects.select_for_update().get(id=auction_id)
+            now = timezone.now()
+
+            status_fields = sync_auction_status(auction, now)
+            if status_fields:
+                auction.save(update_fields=status_fields)
+                publish_high_water_mark(auction)
+
+            window_error = check_bid_window(auction.status, auction.starts_at, auction.ends_at, now)
+            if window_error:
+                return window_error, status.HTTP_400_BAD_REQUEST
+
+            bid_amount = parse_bid_amount(raw_amount)
+            if bid_amount <= 0:
+                return {'error': 'Invalid bid amount'}, status.HTTP_400_BAD_REQUEST
+
+            # Validate user has enough coins
+            if user_profile.coin_balance < bid_amount:
+                return {'error': 'Insufficient coins'}, status.HTTP_400_BAD_REQUEST
+
+            # Validate minimum bid
+            min_bid = minimum_bid_for(auction.current_highest_bid, auction.minimum_bid)
+            if bid_amount < min_bid:
+                # Re-seed the mark so the next stale bid is rejected without locks.
+                publish_high_water_mark(auction)
+                return {'error': f'Bid must be at least {min_bid} coins'}, status.HTTP_400_BAD_REQUEST
+
+            bid, extension_applied, update_fields = apply_bid(
+                auction, user_profile, user, bid_amount, min_bid, now
+            )
+            auction.save(update_fields=update_fields)
+            publish_high_water_mark(auction)
+
+            broadcast_bid(auction, user.username, bid_amount, auction.total_bids, extension_applied)
+
+            logger.info(f"Bid placed by {user.username} on auction {auction.title}: {bid_amount} coins")
+
+            return (
+                bid_success_payload(bid, user_profile.coin_balance, auction, extension_applied),
+                status.HTTP_201_CREATED,
+            )
+
+    except Auction.DoesNotExist:
+        return {'error': 'Auction not found'}, status.HTTP_404_NOT_FOUND
+    except UserProfile.DoesNotExist:
+        return {'error': 'User profile not found'}, status.HTTP_404_NOT_FOUND
+    except Exception as e:
+        logger.exception(f"Error placing bid: {str(e)}")
+        return {'error': 'Failed to place bid'}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+def submit_bid(user, auction_id, raw_amount):
+    """Place a bid through the configured engine (bid sequencer or row locks)."""
+    if settings.BID_SEQUENCER_ENABLED:
+        from .bid_sequencer import bid_sequencer
+        return bid_sequencer.submit(user, auction_id, raw_amount)
+    return place_bid(user, auction_id, raw_amount)
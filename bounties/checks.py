@@ -0,0 +1,42 @@
+"""
+Deployment self-checks for the bounties app.
+
+The channel layer carries every WebSocket broadcast. An in-memory layer only
+reaches sockets held by the same process, so running it behind more than one
+server worker silently drops updates for most clients.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+IN_MEMORY_CHANNEL_LAYER = 'channels.layers.InMemoryChannelLayer'
+
+
+def configured_worker_count():
+    """Return the number of server worker processes the deployment runs."""
+    try:
+        return max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+    except ValueError:
+        return 1
+
+
+def channel_layer_problem(worker_count):
+    """Return a description of why the channel layer is unsafe, or None."""
+    backend = settings.CHANNEL_LAYERS.get('default', {}).get('BACKEND')
+    if worker_count > 1 and backend == IN_MEMORY_CHANNEL_LAYER:
+        return (
+            f'{worker_count} server workers are configured but the channel layer is '
+            f'{IN_MEMORY_CHANNEL_LAYER}, which cannot deliver group messages across '
+            f'processes. Set REDIS_URL or run a single worker.'
+        )
+    return None
+
+
+@register('channels')
+def check_channel_layer(app_configs, **kwargs):
+    problem = channel_layer_problem(configured_worker_count())
+    if problem:
+        return [Error(problem, id='bounties.E001')]
+    return []
@@ -0,0 +1,58 @@
+"""
+Auction clock sync for ws/auction/<id>/ sockets.
+
+A socket gets a ``clock_sync`` frame on connect with the server time and the
+auction's deadlines, then a ``clock_update`` only when those deadlines move
+(an anti-snipe extension or an admin edit). Clients estimate their offset
+from ``server_time`` and count down to ``ends_at`` locally instead of polling
+AuctionDetailView. Sending ``{"action": "sync_clock", "client_time": ...}``
+returns a fresh ``clock_sync`` echoing ``client_time`` so the client can
+take the round trip out of its offset.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .bidding import HIGH_WATER_MARK_KEY, auction_publisher
+from .models import Auction
+
+
+def clock_state(auction_id, status, starts_at, ends_at):
+    return {
+        'auction_id': auction_id,
+        'status': status,
+        'starts_at': starts_at.isoformat(),
+        'ends_at': ends_at.isoformat(),
+    }
+
+
+def get_clock_state(auction_id):
+    """Return the auction's deadlines, from the published high-water mark when it is cached."""
+    state = cache.get(HIGH_WATER_MARK_KEY.format(auction_id))
+    if state is None:
+        state = Auction.objects.filter(id=auction_id).values('status', 'starts_at', 'ends_at').first()
+        if state is None:
+            return None
+    return clock_state(auction_id, state['status'], state['starts_at'], state['ends_at'])
+
+
+def clock_sync_frame(state, client_time=None):
+    frame = dict(state, type='clock_sync', server_time=timezone.now().isoformat())
+    if client_time is not None:
+        frame['client_time'] = client_time
+    return frame
+
+
+def publish_clock(auction):
+    """Push the auction's new deadlines to its sockets once the transaction commits."""
+    state = clock_state(auction.id, auction.status, auction.starts_at, auction.ends_at)
+
+    def publish():
+        auction_publisher.publish(
+            f'auction_{auction.id}',
+            'auction_clock',
+            dict(state, type='clock_update', server_time=timezone.now().isoformat()),
+        )
+
+    transaction.on_commit(publish)
@@ -5,13 +5,42 @@ This module contains WebSocket consumers that handle real-time communication
 for auctions, bidding, and other interactive features.
 """
 
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
-from .models import UserProfile
-from .auction_models import Auction, AuctionBid
+from .models import UserProfile, Auction
+from .auction_models import AuctionBid
+from .balances import balance_publisher, get_balance, user_group_name
+from .bidding import auction_publisher, submit_bid
+from .clock import clock_sync_frame, get_clock_state
+from .leaderboard import leaderboards
+from .publisher import frame_text
+
+
+@database_sync_to_async
+def get_auction_status(auction_id):
+    """Load the live state of an auction for a socket status read."""
+    auction = Auction.objects.select_related('current_highest_bidder').filter(id=auction_id).first()
+    if auction is None:
+        return None
+
+    remaining = auction.ends_at - timezone.now()
+    return {
+        'type': 'auction_status',
+        'auction_id': auction.id,
+        'status': auction.status,
+        'current_bid': auction.current_highest_bid,
+        'highest_bidder': (
+            auction.current_highest_bidder.username if auction.current_highest_bidder else None
+        ),
+        'bid_count': auction.total_bids,
+        'ends_at': auction.ends_at.isoformat(),
+        'time_remaining': max(0, int(remaining.total_seconds())),
+    }
 
 
 class TestConsumer(AsyncWebsocketConsumer):
@@ -136,6 +165,7 @@ class AuctionConsumer(AsyncWebsocketConsumer):
         
         # Join auction-specific group
         self.auction_group_name = f'auction_{self.auction_id}'
+        auction_publisher.bind_loop(asyncio.get_running_loop())
         await self.channel_layer.group_add(
             self.auction_group_name,
             self.channel_name
@@ -148,6 +178,7 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             'message': f'Connected to auction {self.auction_id}',
             'timestamp': timezone.now().isoformat()
         }))
+        await self.handle_sync_clock({})
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
@@ -170,6 +201,8 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                 await self.handle_get_status()
             elif action == 'subscribe_auction':
                 await self.handle_subscribe_auction(data)
+            elif action == 'sync_clock':
+                await self.handle_sync_clock(data)
             else:
                 await self.send(text_data=json.dumps({
                     'type': 'error',
@@ -183,54 +216,69 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             }))
 
     async def handle_place_bid(self, data):
-        """Handle bid placement request via WebSocket."""
+        """
+        Handle bid placement request via WebSocket.
+
+        Runs the same validation and persistence as the REST bid endpoint in a
+        worker thread; the accepted bid is broadcast to the group by the engine.
+        """
         user = self.scope['user']
-        amount = data.get('amount')
-        auction_id = data.get('auction_id')
-        
-        # Validate bid amount
-        if not amount or amount <= 0:
+        request_id = data.get('request_id')
+
+        # Off the shared sync thread: a bid waiting on row locks (or on the
+        # sequencer) must not hold up every other consumer's database calls.
+        payload, status_code = await database_sync_to_async(submit_bid, thread_sensitive=False)(
+            user, self.auction_id, data.get('amount')
+        )
+
+        if status_code >= 400:
             await self.send(text_data=json.dumps({
                 'type': 'bid_error',
-                'message': 'Invalid bid amount'
-            }))
+                'request_id': request_id,
+                'auction_id': self.auction_id,
+                'status_code': status_code,
+                'message': payload.get('error'),
+                'details': payload,
+            }, cls=DjangoJSONEncoder))
             return
-        
-        # For now, we'll simulate the response
-        # In a real implementation, this would call the PlaceBidView
+
         await self.send(text_data=json.dumps({
             'type': 'bid_placed',
+            'request_id': request_id,
+            'auction_id': self.auction_id,
             'user': user.username,
-            'amount': amount,
-            'auction_id': auction_id,
-            'status': 'pending_validation'
-        }))
-        
-        # Broadcast bid update to all connected clients
-        await self.channel_layer.group_send(
-            self.auction_group_name,
-            {
-                'type': 'auction_update',
-                'data': {
-                    'type': 'new_bid',
-                    'user': user.username,
-                    'amount': amount,
-                    'timestamp': timezone.now().isoformat()
-                }
-            }
-        )
+            'amount': payload['bid']['amount'],
+            'bid_id': payload['bid']['id'],
+            'current_highest_bid': payload['current_highest_bid'],
+            'bid_count': payload['bid_count'],
+            'remaining_coins': payload['remaining_coins'],
+            'extension_applied': payload['extension_applied'],
+            'new_ends_at': payload['new_ends_at'],
+            'status': 'accepted',
+        }, cls=DjangoJSONEncoder))
 
     async def handle_get_status(self):
         """Handle auction status request."""
-        # This would normally fetch real auction data from database
-        await self.send(text_data=json.dumps({
-            'type': 'auction_status',
-            'auction_id': self.auction_id,
-            'status': 'active',
-            'current_bid': 119,
-            'highest_bidder': 'user123',
-            'time_remaining': '2:30:15'
-        }))
+        auction_status = await get_auction_status(self.auction_id)
+        if auction_status is None:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Auction not found'
+            }))
+            return
+
+        await self.send(text_data=json.dumps(auction_status, cls=DjangoJSONEncoder))
+
+    async def handle_sync_clock(self, data):
+        """Send the server time and the auction's deadlines so the client can count down locally."""
+        state = await database_sync_to_async(get_clock_state)(int(self.auction_id))
+        if state is None:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Auction not found'
+            }))
+            return
+        await self.send(text_data=json.dumps(clock_sync_frame(state, data.get('client_time'))))
 
     async def handle_subscribe_auction(self, data):
         """Handle auction subscription request."""
@@ -243,13 +291,23 @@ class AuctionConsumer(AsyncWebsocketConsumer):
 
     async def auction_update(self, event):
         """Handle auction updates from other sources."""
-        await self.send(text_data=json.dumps(event['data']))
+        await self.send(text_data=frame_text(event))
+
+    async def auction_clock(self, event):
+        """Forward a deadline change pushed by bounties.clock."""
+        await self.send(text_data=frame_text(event))
 
 
 class AuctionLeaderboardConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time leaderboard updates.
-    Broadcasts top bidders and their amounts.
+
+    Sends a ``leaderboard_snapshot`` on connect, then at most one
+    ``leaderboard_diff`` per publisher tick covering the bid changes
+    committed since the previous one. Each diff names the
+    snapshot version it applies to; a socket that is not on that version
+    (e.g. the diff came from a worker that had missed earlier bids) gets a
+    fresh snapshot instead, so clients never need to refetch over HTTP.
     """
     
     async def connect(self):
@@ -260,8 +318,10 @@ class AuctionLeaderboardConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
-        self.auction_id = self.scope['url_route']['kwargs']['auction_id']
+        self.auction_id = int(self.scope['url_route']['kwargs']['auction_id'])
         self.leaderboard_group_name = f'leaderboard_{self.auction_id}'
+        self.version = None
+        auction_publisher.bind_loop(asyncio.get_running_loop())
         
         await self.channel_layer.group_add(
             self.leaderboard_group_name,
@@ -272,6 +332,7 @@ class AuctionLeaderboardConsumer(AsyncWebsocketConsumer):
             'type': 'leaderboard_connected',
             'auction_id': self.auction_id
         }))
+        await self.send_snapshot()
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
@@ -281,9 +342,32 @@ class AuctionLeaderboardConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
 
+    async def send_snapshot(self):
+        board = await database_sync_to_async(leaderboards.get)(self.auction_id)
+        if board is None:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Auction not found'
+            }))
+            await self.close()
+            return
+        snapshot = board.snapshot()
+        self.version = snapshot['version']
+        await self.send(text_data=json.dumps(dict(snapshot, type='leaderboard_snapshot')))
+
     async def leaderboard_update(self, event):
         """Handle leaderboard updates."""
-        await self.send(text_data=json.dumps(event['data']))
+        await self.send(text_data=frame_text(event))
+
+    async def leaderboard_diff(self, event):
+        """Forward a rank diff, or resynchronise when it does not apply to our version."""
+        if self.version is not None and event['version'] <= self.version:
+            return  # already part of the snapshot we sent
+        if event['base_version'] != self.version:
+            await self.send_snapshot()
+            return
+        self.version = event['version']
+        await self.send(text_data=frame_text(event))
 
 
 class AuctionUpdatesConsumer(AsyncWebsocketConsumer):
@@ -321,4 +405,44 @@ class AuctionUpdatesConsumer(AsyncWebsocketConsumer):
 
     async def auction_broadcast(self, event):
         """Handle general auction broadcasts."""
-        await self.send(text_data=json.dumps(event['data']))
\ No newline at end of file
+        await self.send(text_data=frame_text(event))
+
+class BalanceConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for the authenticated user's coin balance.
+    Sends the current balance on connect, then one coalesced update per
+    publisher tick whenever the user's ledger changes.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection for the user's balance channel."""
+        self.user_group = None
+        if self.scope['user'] == AnonymousUser():
+            await self.close()
+            return
+
+        self.user_group = user_group_name(self.scope['user'].id)
+        balance_publisher.bind_loop(asyncio.get_running_loop())
+        await self.channel_layer.group_add(
+            self.user_group,
+            self.channel_name
+        )
+        await self.accept()
+
+        balance = await database_sync_to_async(get_balance)(self.scope['user'])
+        await self.send(text_data=json.dumps({
+            'type': 'balance_snapshot',
+            'balance': balance,
+        }))
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        if self.user_group:
+            await self.channel_layer.group_discard(
+                self.user_group,
+                self.channel_name
+            )
+
+    async def balance_update(self, event):
+        """Forward a coalesced balance change to the client."""
+        await self.send(text_data=frame_text(event))
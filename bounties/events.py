@@ -0,0 +1,147 @@
+"""
+Auction event log projector.
+
+Every change to an auction's bidding state is appended to the AuctionEvent
+log (bid_accepted, bid_cancelled, extended, ended, cancelled, and
+rescheduled/status_changed for starts and admin edits) and folded into the
+snapshot columns on Auction, which is what every read uses. The write paths
+only append through record_event; none of them compute the snapshot by
+hand. rebuild_snapshot replays an auction's log to recompute the snapshot
+after an incident or a bad manual edit.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .auction_models import AuctionEvent
+from .models import Auction
+
+# Id of the newest bid event per auction, read by the in-process leaderboards
+# (bounties.leaderboard) to tell whether they are behind.
+LATEST_BID_EVENT_KEY = 'auction:{}:latest_bid_event'
+LATEST_BID_EVENT_TTL_SECONDS = 86400
+
+SNAPSHOT_FIELDS = ('current_highest_bid', 'current_highest_bidder', 'total_bids', 'ends_at', 'status')
+
+
+def _snapshot(auction):
+    return {field: getattr(auction, Auction._meta.get_field(field).attname) for field in SNAPSHOT_FIELDS}
+
+
+class AuctionProjection:
+    """Auction state folded from its events."""
+
+    def __init__(self, ends_at, status):
+        self.highest_bid = 0
+        self.highest_bidder_id = None
+        self.total_bids = 0
+        self.ends_at = ends_at
+        self.status = status
+        # Bids still standing (accepted), as {bid_id: (user_id, amount)}.
+        self.standing = {}
+
+    @classmethod
+    def from_snapshot(cls, auction):
+        projection = cls(auction.ends_at, auction.status)
+        projection.highest_bid = auction.current_highest_bid
+        projection.highest_bidder_id = auction.current_highest_bidder_id
+        projection.total_bids = auction.total_bids
+        return projection
+
+    def apply(self, event):
+        if event.kind == 'bid_accepted':
+            # The bidder's own earlier bid and the previous leader's bid are outbid.
+            outbid = {event.user_id, self.highest_bidder_id}
+            self.standing = {
+                bid_id: entry for bid_id, entry in self.standing.items() if entry[0] not in outbid
+            }
+            self.standing[event.bid_id] = (event.user_id, event.amount)
+            self.highest_bid = event.amount
+            self.highest_bidder_id = event.user_id
+            self.total_bids += 1
+        elif event.kind == 'bid_cancelled':
+            self.standing.pop(event.bid_id, None)
+            if event.user_id == self.highest_bidder_id:
+                top = max(self.standing.values(), key=lambda entry: entry[1], default=(None, 0))
+                self.highest_bidder_id, self.highest_bid = top
+        elif event.kind in ('extended', 'rescheduled'):
+            self.ends_at = event.ends_at
+        elif event.kind == 'status_changed':
+            self.status = event.status
+        elif event.kind == 'ended':
+            self.status = 'ended'
+        elif event.kind == 'cancelled':
+            self.status = 'cancelled'
+
+    def write_to(self, auction):
+        """Copy the projection onto ``auction``; returns the changed field names."""
+        values = {
+            'current_highest_bid': self.highest_bid,
+            'current_highest_bidder': self.highest_bidder_id,
+            'total_bids': self.total_bids,
+            'ends_at': self.ends_at,
+            'status': self.status,
+        }
+        changed = []
+        for field, value in values.items():
+            attname = Auction._meta.get_field(field).attname
+            if getattr(auction, attname) != value:
+                setattr(auction, attname, value)
+                changed.append(field)
+        return changed
+
+
+def replay(auction):
+    """Fold the auction's whole event log into a fresh projection."""
+    projection = AuctionProjection(auction.ends_at, auction.status)
+    for event in AuctionEvent.objects.filter(auction=auction).order_by('id').iterator():
+        projection.apply(event)
+    return projection
+
+
+def record_event(auction, kind, **fields):
+    """
+    Append an event for the locked ``auction`` and fold it into the snapshot.
+
+    Returns the changed snapshot field names; the caller saves the auction.
+    """
+    event = AuctionEvent.objects.create(auction=auction, kind=kind, **fields)
+    if kind in ('bid_accepted', 'bid_cancelled'):
+        # Written under the auction row lock so the value never goes back.
+        cache.set(LATEST_BID_EVENT_KEY.format(auction.id), event.id, LATEST_BID_EVENT_TTL_SECONDS)
+
+        from .leaderboard import publish_leaderboard
+        auction_id = auction.id
+        transaction.on_commit(lambda: publish_leaderboard(auction_id))
+    if kind == 'bid_cancelled':
+        # The new leader depends on which bids are still standing, which
+        # only the full log knows. Cancellations are rare.
+        projection = replay(auction)
+    else:
+        projection = AuctionProjection.from_snapshot(auction)
+        projection.apply(event)
+    return projection.write_to(auction)
+
+
+def rebuild_snapshot(auction_id, dry_run=False):
+    """
+    Recompute an auction's snapshot from its event log.
+
+    Returns ``{field: (stored, replayed)}`` for every field that differed.
+    """
+    with transaction.atomic():
+        auction = Auction.objects.select_for_update().get(id=auction_id)
+        stored = _snapshot(auction)
+        changed = replay(auction).write_to(auction)
+        replayed = _snapshot(auction)
+        diff = {field: (stored[field], replayed[field]) for field in changed}
+        if changed and not dry_run:
+            auction.save(update_fields=changed + ['updated_at'])
+
+            from .bidding import clear_high_water_mark
+            from .bid_sequencer import bid_sequencer
+            from .lifecycle import notify_schedule_changed
+            clear_high_water_mark(auction.id)
+            bid_sequencer.invalidate(auction.id)
+            notify_schedule_changed(auction.id)
+    return diff
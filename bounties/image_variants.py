@@ -0,0 +1,178 @@
+"""
+Resized WebP and JPEG/PNG variants of uploaded auction images.
+
+Once an AuctionImage is committed, a worker thread decodes the original and
+writes one variant per configured width (IMAGE_VARIANT_WIDTHS) narrower than
+it, in WebP and in a fallback format, under ``auction_images/variants/``.
+Variant names end in a hash of their bytes, so they are served as
+immutable. The stored paths land in ``AuctionImage.variants`` as
+``{format: {width: path}}``, which AuctionImageSerializer turns into
+``srcset`` strings. Pillow releases the GIL while resampling and encoding,
+so a small thread pool keeps the work off the request without a separate
+process. Deleting an AuctionImage removes its variants and original from
+storage once the deletion commits.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .media_manifest import media_manifest
+from .models import AuctionImage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = 'auction_images/variants'
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_VARIANT_QUALITY, method=4)
+    elif fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'JPEG', quality=settings.IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_variants(path, widths, storage=default_storage):
+    """
+    Write the variants of the stored image at ``path`` and return them as
+    ``{format: {width: path}}``. Widths at or above the original's are
+    skipped; an image narrower than every width gets a single full-size
+    WebP so clients still have a compact copy.
+    """
+    with storage.open(path, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    fallback = 'png' if has_alpha else 'jpeg'
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    targets = sorted({width for width in widths if width < image.width}) or [image.width]
+    variants = {'webp': {}, fallback: {}}
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS) if width != image.width else image
+        formats = ('webp', fallback) if width != image.width else ('webp',)
+        for fmt in formats:
+            data = _encode(resized, fmt)
+            digest = hashlib.sha1(data).hexdigest()[:7]
+            name = storage.save(f'{VARIANT_DIR}/{stem}_{width}w_{digest}.{fmt}', ContentFile(data))
+            variants[fmt][str(width)] = name
+    return {fmt: paths for fmt, paths in variants.items() if paths}
+
+
+def generate_variants(image_id):
+    """Render and record the variants of one AuctionImage; returns them, or None if it cannot."""
+    image = AuctionImage.objects.filter(id=image_id).only('id', 'image').first()
+    if image is None or not image.image:
+        return None
+    try:
+        variants = render_variants(image.image.name, settings.IMAGE_VARIANT_WIDTHS)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not render variants of auction image {image_id}: {str(e)}")
+        return None
+    if not AuctionImage.objects.filter(id=image_id).update(variants=variants):
+        # Deleted while rendering: nothing will ever clean these up otherwise.
+        delete_media_files(variant_paths(variants))
+        return None
+    media_manifest.refresh(variant_paths(variants))
+    return variants
+
+
+def variant_paths(variants):
+    return [path for paths in (variants or {}).values() for path in paths.values()]
+
+
+def delete_media_files(paths, storage=default_storage):
+    """Remove ``paths`` from storage and the manifest, logging files that cannot be removed."""
+    for path in paths:
+        try:
+            storage.delete(path)
+        except OSError as e:
+            logger.warning(f"Could not remove media file {path}: {str(e)}")
+        media_manifest.invalidate(path)
+
+
+class VariantPool:
+    """Lazily started thread pool that renders variants off the request thread."""
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, image_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variants')
+        return self._executor.submit(self._run, image_id)
+
+    def _run(self, image_id):
+        close_old_connections()
+        try:
+            return generate_variants(image_id)
+        except Exception:
+            logger.exception(f"Variant job for auction image {image_id} failed")
+        finally:
+            close_old_connections()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+variant_pool = VariantPool(workers=settings.IMAGE_VARIANT_WORKERS)
+
+
+def schedule_variants(images):
+    """Queue rendering for new AuctionImage rows once the transaction commits."""
+    image_ids = [image.id for image in images if image.image]
+    if not image_ids or not settings.IMAGE_VARIANT_WIDTHS:
+        return
+
+    def submit():
+        # After commit, so the worker's own connection can see the rows.
+        for image_id in image_ids:
+            variant_pool.submit(image_id)
+
+    transaction.on_commit(submit)
+
+
+@receiver(post_save, sender=AuctionImage)
+def queue_variants(sender, instance, created, **kwargs):
+    if created:
+        schedule_variants([instance])
+
+
+@receiver(post_delete, sender=AuctionImage)
+def delete_image_files(sender, instance, **kwargs):
+    paths = variant_paths(instance.variants)
+    original = instance.image.name if instance.image else None
+
+    def delete():
+        # Uploads get unique names, but rows from before that may share one.
+        if original and not AuctionImage.objects.filter(image=original).exists():
+            paths.append(original)
+        delete_media_files(paths, instance.image.storage)
+
+    # After commit, so a rolled back delete keeps its files.
+    transaction.on_commit(delete)
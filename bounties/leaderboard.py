@@ -0,0 +1,263 @@
+"""
+In-process auction leaderboards.
+
+Each worker keeps, per auction, the standings folded from the auction event
+log: every bidder's highest bid and bid count in rank order, plus the
+current leader as the event projector sees it. The leaderboard endpoint is
+answered from memory without touching the database.
+
+Freshness across workers: the bid path writes the auction's latest bid event
+id to the shared cache while it still holds the auction row lock, so that
+value only moves forward. A board that is behind it fetches just the newer
+events; for one auction those commit in id order under the same lock, so
+nothing is skipped. A worker that has never seen the auction folds its whole
+log once.
+
+After each committed bid change the worker that made it queues a rank diff
+against the board's previous state for the ``leaderboard_<id>`` group. Diffs
+queued within one publisher tick are composed into a single frame; see
+AuctionLeaderboardConsumer for how sockets apply it.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .auction_models import AuctionEvent
+from .bidding import auction_publisher
+from .events import LATEST_BID_EVENT_KEY, LATEST_BID_EVENT_TTL_SECONDS, AuctionProjection
+from .models import Auction
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 10
+MAX_BOARDS = 256
+
+BID_EVENT_KINDS = ['bid_accepted', 'bid_cancelled']
+
+
+class Leaderboard:
+    """Ranked bidder standings for one auction."""
+
+    def __init__(self, auction_id):
+        self.auction_id = auction_id
+        self.last_event_id = 0
+        self.projection = AuctionProjection(ends_at=None, status=None)
+        self.usernames = {}
+        # user_id -> [highest_bid, total_bids]
+        self.stats = {}
+        # Sorted (-highest_bid, user_id) keys, best first.
+        self.ranking = []
+        self.lock = threading.Lock()
+
+    def apply(self, event, username):
+        self.projection.apply(event)
+        self.last_event_id = event.id
+        if event.kind != 'bid_accepted':
+            return
+
+        self.usernames[event.user_id] = username
+        stats = self.stats.setdefault(event.user_id, [0, 0])
+        stats[1] += 1
+        if event.amount > stats[0]:
+            if stats[0]:
+                del self.ranking[bisect_left(self.ranking, (-stats[0], event.user_id))]
+            stats[0] = event.amount
+            insort(self.ranking, (-event.amount, event.user_id))
+
+    def top(self, n=TOP_N):
+        return [
+            {
+                'user__username': self.usernames[user_id],
+                'total_bids': self.stats[user_id][1],
+                'highest_bid': -neg_amount,
+            }
+            for neg_amount, user_id in self.ranking[:n]
+        ]
+
+    def _snapshot(self, n=TOP_N):
+        leader = self.projection.highest_bidder_id
+        return {
+            'auction_id': self.auction_id,
+            'version': self.last_event_id,
+            'current_highest_bid': self.projection.highest_bid,
+            'current_highest_bidder': self.usernames.get(leader) if leader else None,
+            'total_bids': self.projection.total_bids,
+            'top_bidders': self.top(n),
+        }
+
+    def snapshot(self, n=TOP_N):
+        with self.lock:
+            return self._snapshot(n)
+
+
+class LeaderboardRegistry:
+    """Per-worker LRU of auction leaderboards kept current from the event log."""
+
+    def __init__(self, max_boards=MAX_BOARDS):
+        self.max_boards = max_boards
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _catch_up(self, board):
+        events = AuctionEvent.objects.filter(
+            auction_id=board.auction_id,
+            id__gt=board.last_event_id,
+            kind__in=BID_EVENT_KINDS,
+        ).order_by('id').values_list('id', 'kind', 'user_id', 'user__username', 'amount', 'bid_id')
+        for event_id, kind, user_id, username, amount, bid_id in events.iterator():
+            board.apply(
+                AuctionEvent(id=event_id, kind=kind, user_id=user_id, amount=amount, bid_id=bid_id),
+                username,
+            )
+
+    def get(self, auction_id):
+        """Return the auction's current board, or None when the auction does not exist."""
+        with self._lock:
+            board = self._boards.get(auction_id)
+            if board is not None:
+                self._boards.move_to_end(auction_id)
+
+        if board is None:
+            if not Auction.objects.filter(id=auction_id).exists():
+                return None
+            board = Leaderboard(auction_id)
+            with board.lock:
+                self._catch_up(board)
+            with self._lock:
+                board = self._boards.setdefault(auction_id, board)
+                while len(self._boards) > self.max_boards:
+                    self._boards.popitem(last=False)
+            return board
+
+        key = LATEST_BID_EVENT_KEY.format(auction_id)
+        latest = cache.get(key)
+        if latest is None or latest > board.last_event_id:
+            with board.lock:
+                self._catch_up(board)
+            if latest is None:
+                # add() so a bid that published meanwhile keeps its newer id.
+                cache.add(key, board.last_event_id, LATEST_BID_EVENT_TTL_SECONDS)
+        return board
+
+    def advance(self, auction_id):
+        """
+        Catch the auction's board up with the log.
+
+        Returns ``(before, after)`` snapshots, where before is None when this
+        worker had no board yet, or None when the auction does not exist.
+        """
+        with self._lock:
+            board = self._boards.get(auction_id)
+        if board is None:
+            board = self.get(auction_id)
+            return None if board is None else (None, board.snapshot())
+
+        with board.lock:
+            before = board._snapshot()
+            self._catch_up(board)
+            return before, board._snapshot()
+
+    def discard(self, auction_id):
+        with self._lock:
+            self._boards.pop(auction_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+
+
+leaderboards = LeaderboardRegistry()
+
+
+def leaderboard_diff(before, after):
+    """
+    Describe how the top-N changed between two snapshots.
+
+    ``inserted`` entries entered the top-N, ``moved`` entries changed rank or
+    stats, ``removed`` lists usernames that dropped out. Every entry carries
+    its new ``rank`` (1-based).
+    """
+    old = {}
+    if before:
+        old = {entry['user__username']: (rank, entry) for rank, entry in enumerate(before['top_bidders'], 1)}
+
+    inserted, moved = [], []
+    for rank, entry in enumerate(after['top_bidders'], 1):
+        previous = old.pop(entry['user__username'], None)
+        if previous is None:
+            inserted.append(dict(entry, rank=rank))
+        elif previous != (rank, entry):
+            moved.append(dict(entry, rank=rank))
+
+    return {
+        'type': 'leaderboard_diff',
+        'auction_id': after['auction_id'],
+        'base_version': before['version'] if before else None,
+        'version': after['version'],
+        'current_highest_bid': after['current_highest_bid'],
+        'current_highest_bidder': after['current_highest_bidder'],
+        'total_bids': after['total_bids'],
+        'inserted': inserted,
+        'moved': moved,
+        'removed': list(old),
+    }
+
+
+def merge_leaderboard_diffs(queued, latest):
+    """Compose two consecutive diffs into one from ``queued``'s base to ``latest``'s version."""
+    if latest['base_version'] != queued['version']:
+        return latest  # not consecutive; sockets resynchronise from a snapshot
+
+    changes = {entry['user__username']: ('inserted', entry) for entry in queued['inserted']}
+    changes.update((entry['user__username'], ('moved', entry)) for entry in queued['moved'])
+    removed = list(queued['removed'])
+
+    for entry in latest['inserted']:
+        username = entry['user__username']
+        if username in removed:
+            # Dropped out and came back within the tick: it was on the base board.
+            removed.remove(username)
+            changes[username] = ('moved', entry)
+        else:
+            changes[username] = ('inserted', entry)
+    for entry in latest['moved']:
+        username = entry['user__username']
+        kind = changes[username][0] if username in changes else 'moved'
+        changes[username] = (kind, entry)
+    for username in latest['removed']:
+        kind, _ = changes.pop(username, ('moved', None))
+        if kind == 'moved':
+            removed.append(username)
+
+    by_rank = sorted(changes.values(), key=lambda change: change[1]['rank'])
+    return dict(
+        latest,
+        base_version=queued['base_version'],
+        inserted=[entry for kind, entry in by_rank if kind == 'inserted'],
+        moved=[entry for kind, entry in by_rank if kind == 'moved'],
+        removed=removed,
+    )
+
+
+def publish_leaderboard(auction_id):
+    """Fold newly committed bid events into the board and queue the rank diff for subscribers."""
+    try:
+        result = leaderboards.advance(auction_id)
+        if result is None:
+            return
+        before, after = result
+        if before and before['version'] == after['version']:
+            return  # already published, e.g. by an earlier bid in the same batch
+        auction_publisher.publish(
+            f'leaderboard_{auction_id}',
+            'leaderboard_diff',
+            leaderboard_diff(before, after),
+            merge=merge_leaderboard_diffs,
+            envelope=('base_version', 'version'),
+        )
+    except Exception as e:
+        logger.error(f"Error publishing leaderboard for auction {auction_id}: {str(e)}")
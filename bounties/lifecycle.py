@@ -0,0 +1,424 @@
+"""
+Auction lifecycle engine.
+
+Auctions move upcoming -> active at ``starts_at`` and active -> ended at
+``ends_at``. However an auction ends, it is settled (bounties.settlement)
+once that commits, and the scheduler settles any it finds still unsettled
+at each resync. The AuctionScheduler keeps a min-heap of those deadlines and sleeps until
+the next one (or until a write tells it a deadline moved), so transitions
+happen on time without polling the auctions table. Only the replica holding
+the scheduler lease acts; the others stand by and take over when the lease
+expires.
+
+start_auction, end_auction and cancel_auction lock the auction row and
+re-check its state, so they are also safe to call from views, admin actions
+and scripts.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Auction, SchedulerLease
+from .auction_models import AuctionBid, AuctionWinner
+from .bidding import clear_high_water_mark, publish_high_water_mark
+from .events import record_event
+from .publisher import frame_message
+from .settlement import SETTLEABLE_STATUSES, settle_auctions
+
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_GROUP = 'auction_lifecycle'
+SCHEDULER_LEASE_NAME = 'auction-scheduler'
+# Backoff for a transition that failed unexpectedly, doubled per attempt.
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 300
+
+
+def _broadcast_on_commit(auction_id, data):
+    def send():
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                f'auction_{auction_id}',
+                frame_message('auction_update', data)
+            )
+        except Exception as e:
+            logger.error(f"Error broadcasting lifecycle update for auction {auction_id}: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def notify_schedule_changed(auction_id):
+    """Tell the scheduler, after commit, that an auction's deadlines or status changed."""
+    def send():
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                LIFECYCLE_GROUP,
+                {'type': 'lifecycle.reschedule', 'auction_id': auction_id}
+            )
+        except Exception as e:
+            logger.error(f"Error notifying auction scheduler about auction {auction_id}: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def start_auction(auction_id, now=None, force=False):
+    """
+    Activate an upcoming auction whose start time has passed; returns it or
+    None. With ``force`` an auction that is not due yet starts now, and its
+    ``starts_at`` is moved up to match.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        auction = Auction.objects.select_for_update().filter(id=auction_id).first()
+        if auction is None or auction.status != 'upcoming' or now >= auction.ends_at:
+            return None
+        if auction.starts_at > now and not force:
+            return None
+
+        update_fields = record_event(auction, 'status_changed', status='active') + ['updated_at']
+        if auction.starts_at > now:
+            auction.starts_at = now
+            update_fields.append('starts_at')
+        auction.save(update_fields=update_fields)
+        publish_high_water_mark(auction)
+        _broadcast_on_commit(auction.id, {
+            'type': 'status_changed',
+            'auction_id': auction.id,
+            'old_status': 'upcoming',
+            'new_status': 'active',
+            'timestamp': now.isoformat(),
+        })
+
+    logger.info(f"Auction started: {auction.title}")
+    return auction
+
+
+def end_auction(auction_id, now=None, force=False, require_winner=False):
+    """
+    End an active auction, record its winner and broadcast the result.
+
+    Unless ``force`` is set the auction must have reached ``ends_at``, so a
+    late anti-snipe extension is never cut short. Returns ``(auction, winner)``
+    where winner is None for an auction without bids. Raises
+    Auction.DoesNotExist or ValueError.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        auction = Auction.objects.select_for_update().get(id=auction_id)
+
+        if auction.status != 'active':
+            raise ValueError('Auction is not active')
+        if not force and auction.ends_at > now:
+            raise ValueError('Auction has not reached its end time')
+
+        highest_bid = AuctionBid.objects.filter(
+            auction=auction,
+            status='accepted'
+        ).select_related('user').order_by('-amount').first()
+        if highest_bid is None and require_winner:
+            raise ValueError('No bids found for this auction')
+
+        winner = None
+        if highest_bid:
+            winner = AuctionWinner.objects.create(
+                auction=auction,
+                winner=highest_bid.user,
+                winning_amount=highest_bid.amount,
+                coins_transferred=False,
+            )
+
+        record_event(
+            auction, 'ended',
+            user=winner.winner if winner else None,
+            amount=winner.winning_amount if winner else None,
+        )
+        auction.save()
+        publish_high_water_mark(auction)
+        _broadcast_on_commit(auction.id, {
+            'type': 'auction_ended',
+            'auction_id': auction.id,
+            'winner': {
+                'username': winner.winner.username if winner else None,
+                'winning_bid': winner.winning_amount if winner else None,
+            },
+            'timestamp': now.isoformat(),
+        })
+
+        settle_on_commit(auction.id)
+
+    logger.info(f"Auction ended: {auction.title}, winner: {winner.winner.username if winner else None}")
+    return auction, winner
+
+
+def cancel_auction(auction_id, now=None):
+    """
+    Cancel an auction that has not closed yet. No winner is recorded, so
+    settlement refunds every bid. Returns the auction; raises
+    Auction.DoesNotExist or ValueError.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        auction = Auction.objects.select_for_update().get(id=auction_id)
+        if auction.status in SETTLEABLE_STATUSES:
+            raise ValueError('Auction is already closed')
+
+        old_status = auction.status
+        record_event(auction, 'cancelled')
+        auction.save()
+        clear_high_water_mark(auction.id)
+        _broadcast_on_commit(auction.id, {
+            'type': 'status_changed',
+            'auction_id': auction.id,
+            'old_status': old_status,
+            'new_status': 'cancelled',
+            'timestamp': now.isoformat(),
+        })
+        settle_on_commit(auction.id)
+
+    logger.info(f"Auction cancelled: {auction.title}")
+    return auction
+
+
+def settle_on_commit(auction_id):
+    """Refund the losing bidders of a closed auction once its transaction commits."""
+    def settle():
+        try:
+            settle_auctions([auction_id])
+        except Exception as e:
+            # The scheduler's resync picks up auctions left unsettled.
+            logger.error(f"Error settling auction {auction_id}: {str(e)}")
+
+    transaction.on_commit(settle)
+
+
+def acquire_lease(name, owner, ttl_seconds):
+    """Take or renew the named lease for ``owner``; returns True while held."""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    taken = SchedulerLease.objects.filter(name=name).filter(
+        Q(owner=owner) | Q(expires_at__lte=now)
+    ).update(owner=owner, expires_at=expires_at)
+    if taken:
+        return True
+    try:
+        with transaction.atomic():
+            SchedulerLease.objects.create(name=name, owner=owner, expires_at=expires_at)
+        return True
+    except IntegrityError:
+        return False
+
+
+def release_lease(name, owner):
+    SchedulerLease.objects.filter(name=name, owner=owner).delete()
+
+
+def next_deadline(auction):
+    """Return ``(when, kind)`` for the auction's next transition, or None."""
+    if auction.status == 'upcoming':
+        return auction.starts_at, 'start'
+    if auction.status == 'active':
+        return auction.ends_at, 'end'
+    return None
+
+
+class AuctionScheduler:
+    """Fire auction start/end transitions at their deadlines."""
+
+    def __init__(self, lease_seconds=15, resync_seconds=60):
+        self.lease_seconds = lease_seconds
+        self.resync_seconds = resync_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._heap = []
+        self._deadlines = {}
+        self._failures = {}
+        self._synced_at = None
+
+    def schedule(self, auction):
+        entry = next_deadline(auction)
+        if entry is None:
+            self._deadlines.pop(auction.id, None)
+            self._failures.pop(auction.id, None)
+            return
+        failure = self._failures.get(auction.id)
+        if failure and failure[1] > entry[0]:
+            # Still backing off from a failed attempt: keep the retry time.
+            entry = (failure[1], entry[1])
+        if self._deadlines.get(auction.id) == entry:
+            return
+        self._deadlines[auction.id] = entry
+        heapq.heappush(self._heap, (entry[0], auction.id, entry[1]))
+
+    def _pending_auctions(self):
+        return Auction.objects.filter(status__in=['upcoming', 'active']).only('id', 'status', 'starts_at', 'ends_at')
+
+    def load_all(self):
+        """Rebuild the heap from every pending auction (on start and takeover)."""
+        self._heap, self._deadlines = [], {}
+        self._synced_at = timezone.now()
+        for auction in self._pending_auctions():
+            self.schedule(auction)
+
+    def load_changed(self):
+        """Backstop for missed notifications: pick up auctions edited since the last sync."""
+        since, self._synced_at = self._synced_at, timezone.now()
+        for auction in Auction.objects.filter(updated_at__gte=since).only('id', 'status', 'starts_at', 'ends_at'):
+            self.schedule(auction)
+
+    def load_one(self, auction_id):
+        auction = Auction.objects.filter(id=auction_id).only('id', 'status', 'starts_at', 'ends_at').first()
+        if auction is None:
+            self._deadlines.pop(auction_id, None)
+        else:
+            self.schedule(auction)
+
+    def seconds_until_next(self):
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - timezone.now()).total_seconds())
+
+    def fire_due(self, now=None):
+        """Run every transition whose deadline has passed."""
+        now = now or timezone.now()
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            when, auction_id, kind = heapq.heappop(self._heap)
+            if self._deadlines.get(auction_id) != (when, kind):
+                continue  # superseded by a newer deadline
+            del self._deadlines[auction_id]
+            try:
+                if kind == 'start':
+                    start_auction(auction_id, now)
+                else:
+                    end_auction(auction_id, now)
+                fired += 1
+            except Auction.DoesNotExist:
+                self._failures.pop(auction_id, None)
+                continue
+            except ValueError as e:
+                logger.info(f"Auction {auction_id} {kind} skipped: {str(e)}")
+            except Exception as e:
+                # Reloading would put the same past deadline back at the top
+                # of the heap and spin this loop; retry later instead.
+                self._retry_later(auction_id, kind, now, e)
+                continue
+            self._failures.pop(auction_id, None)
+            # Queue the follow-up deadline (the end after a start, or a moved end).
+            self.load_one(auction_id)
+
+        return fired
+
+    def settle_pending(self):
+        """Backstop for settlements that failed after commit: settle every closed, unsettled auction."""
+        try:
+            report = settle_auctions()
+        except Exception as e:
+            logger.error(f"Error settling pending auctions: {str(e)}")
+            return 0
+        return report['auctions']
+
+    def _retry_later(self, auction_id, kind, now, error):
+        attempts = self._failures.get(auction_id, (0, None))[0] + 1
+        delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+        retry_at = now + timedelta(seconds=delay)
+        self._failures[auction_id] = (attempts, retry_at)
+        self._deadlines[auction_id] = (retry_at, kind)
+        heapq.heappush(self._heap, (retry_at, auction_id, kind))
+        logger.error(
+            f"Error running auction {auction_id} {kind} (attempt {attempts}): {str(error)}; "
+            f"retrying in {delay}s"
+        )
+
+    def _renew_lease(self):
+        leader = acquire_lease(SCHEDULER_LEASE_NAME, self.owner, self.lease_seconds)
+        if leader and not self.is_leader:
+            logger.info(f"Auction scheduler {self.owner} took the lease")
+            self.load_all()
+        elif self.is_leader and not leader:
+            logger.warning(f"Auction scheduler {self.owner} lost the lease")
+        self.is_leader = leader
+
+    async def run(self):
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(LIFECYCLE_GROUP, channel)
+        loop = asyncio.get_running_loop()
+        renew_at = resync_at = loop.time()
+
+        try:
+            while True:
+                try:
+                    if loop.time() >= renew_at:
+                        await database_sync_to_async(self._renew_lease)()
+                        renew_at = loop.time() + self.lease_seconds / 3
+                    if self.is_leader and loop.time() >= resync_at:
+                        await database_sync_to_async(self.load_changed)()
+                        await database_sync_to_async(self.settle_pending)()
+                        resync_at = loop.time() + self.resync_seconds
+
+                    if self.is_leader:
+                        await database_sync_to_async(self.fire_due)()
+
+                    # A standby only wakes to retry the lease (or for a message);
+                    # its resync_at is never advanced, so it must not count.
+                    if self.is_leader:
+                        timeout = min(renew_at, resync_at) - loop.time()
+                        next_due = self.seconds_until_next()
+                        if next_due is not None:
+                            timeout = min(timeout, next_due)
+                    else:
+                        timeout = renew_at - loop.time()
+
+                    try:
+                        message = await asyncio.wait_for(channel_layer.receive(channel), max(0.0, timeout))
+                    except asyncio.TimeoutError:
+                        continue
+                    if self.is_leader and message.get('auction_id'):
+                        await database_sync_to_async(self.load_one)(message['auction_id'])
+                except Exception as e:
+                    # A transient database or channel-layer error must not
+                    # end the task: nothing restarts it, and auctions would
+                    # stop opening and closing.
+                    logger.exception(f"Auction scheduler iteration failed: {str(e)}")
+                    await asyncio.sleep(RETRY_BASE_SECONDS)
+        finally:
+            await channel_layer.group_discard(LIFECYCLE_GROUP, channel)
+            if self.is_leader:
+                await database_sync_to_async(release_lease)(SCHEDULER_LEASE_NAME, self.owner)
+
+
+def build_scheduler():
+    return AuctionScheduler(
+        lease_seconds=settings.AUCTION_SCHEDULER_LEASE_SECONDS,
+        resync_seconds=settings.AUCTION_SCHEDULER_RESYNC_SECONDS,
+    )
+
+
+async def lifespan_app(scope, receive, send):
+    """ASGI lifespan handler that runs the auction scheduler inside the server process."""
+    task = None
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if settings.AUCTION_SCHEDULER_ENABLED:
+                task = asyncio.create_task(build_scheduler().run())
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from bounties.models import Bounty
+
+
+class Command(BaseCommand):
+    help = 'Recompute Bounty.claims_count from the claims table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bounty-id',
+            type=int,
+            action='append',
+            help='Only recompute this bounty (may be given more than once)'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Bounty.objects.all()
+        if options.get('bounty_id'):
+            queryset = queryset.filter(id__in=options['bounty_id'])
+
+        updated = Bounty.recount_claims(queryset)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed claims_count for {updated} bounties'))
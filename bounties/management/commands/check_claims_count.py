@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+from bounties.models import Bounty
+
+
+class Command(BaseCommand):
+    help = 'Report bounties whose claims_count disagrees with their claims'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Recompute claims_count for the mismatched bounties'
+        )
+
+    def handle(self, *args, **options):
+        mismatched = list(
+            Bounty.objects.annotate(actual=Count('claims'))
+            .exclude(claims_count=F('actual'))
+            .values_list('id', 'title', 'claims_count', 'actual')
+        )
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('All bounty claim counts are consistent'))
+            return
+
+        for bounty_id, title, stored, actual in mismatched:
+            self.stdout.write(f'Bounty {bounty_id} "{title}": claims_count={stored}, actual={actual}')
+
+        if options['fix']:
+            Bounty.recount_claims(Bounty.objects.filter(id__in=[row[0] for row in mismatched]))
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatched)} bounties'))
+        else:
+            raise CommandError(f'{len(mismatched)} bounties have an inconsistent claims_count')
@@ -1,12 +1,15 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
-from datetime import datetime, timedelta
-from bounties.auction_models import Auction
+from datetime import timedelta
+from bounties.models import Auction
+from bounties.bidding import publish_high_water_mark
+from bounties.lifecycle import notify_schedule_changed
 from django.contrib.auth.models import User
 
 
 class Command(BaseCommand):
-    help = 'Create or update the single active auction'
+    help = 'Create an auction; any number of auctions can run at the same time'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -45,11 +48,6 @@ class Command(BaseCommand):
             help='Username of the admin creating the auction',
             default='delo'
         )
-        parser.add_argument(
-            '--force',
-            action='store_true',
-            help='Force create/update even if another auction exists'
-        )
 
     def handle(self, *args, **options):
         title = options['title']
@@ -58,7 +56,6 @@ class Command(BaseCommand):
         starts_in = options['starts_in']
         duration = options['duration']
         admin_username = options['admin_username']
-        force = options['force']
 
         # Find admin user
         try:
@@ -69,28 +66,6 @@ class Command(BaseCommand):
             )
             return
 
-        # Check if there's already an active auction
-        active_auction = Auction.objects.filter(status='active').first()
-        pending_auction = Auction.objects.filter(status='pending').first()
-
-        if active_auction and not force:
-            self.stdout.write(
-                self.style.WARNING(
-                    f'Active auction already exists: "{active_auction.title}" '
-                    f'(ID: {active_auction.id}). Use --force to override.'
-                )
-            )
-            return
-
-        if pending_auction and not force:
-            self.stdout.write(
-                self.style.WARNING(
-                    f'Pending auction already exists: "{pending_auction.title}" '
-                    f'(ID: {pending_auction.id}). Use --force to override.'
-                )
-            )
-            return
-
         # Calculate timing
         now = timezone.now()
         starts_at = now + timedelta(hours=starts_in)
@@ -100,35 +75,9 @@ class Command(BaseCommand):
         if starts_in == 0:
             status = 'active'
         else:
-            status = 'pending'
+            status = 'upcoming'
 
-        # Create or update auction
-        if pending_auction and force:
-            # Update existing pending auction
-            pending_auction.title = title
-            pending_auction.description = description
-            pending_auction.minimum_bid = minimum_bid
-            pending_auction.starts_at = starts_at
-            pending_auction.ends_at = ends_at
-            pending_auction.status = status
-            pending_auction.created_by = admin_user
-            pending_auction.save()
-            auction = pending_auction
-            action = "Updated"
-        elif active_auction and force:
-            # Update existing active auction
-            active_auction.title = title
-            active_auction.description = description
-            active_auction.minimum_bid = minimum_bid
-            active_auction.starts_at = starts_at
-            active_auction.ends_at = ends_at
-            active_auction.status = status
-            active_auction.created_by = admin_user
-            active_auction.save()
-            auction = active_auction
-            action = "Updated"
-        else:
-            # Create new auction
+        with transaction.atomic():
             auction = Auction.objects.create(
                 title=title,
                 description=description,
@@ -138,12 +87,13 @@ class Command(BaseCommand):
                 status=status,
                 created_by=admin_user
             )
-            action = "Created"
+            publish_high_water_mark(auction)
+            notify_schedule_changed(auction.id)
 
         # Output results
         self.stdout.write(
             self.style.SUCCESS(
-                f'{action} auction successfully!'
+                'Created auction successfully!'
             )
         )
         self.stdout.write(f'  Title: {auction.title}')
@@ -155,7 +105,7 @@ class Command(BaseCommand):
         self.stdout.write(f'  Created By: {auction.created_by.username}')
         self.stdout.write(f'  Auction ID: {auction.id}')
 
-        if auction.status == 'pending':
+        if auction.status == 'upcoming':
             self.stdout.write(
                 self.style.WARNING(
                     f'Auction will start in {starts_in} hours. '
@@ -1,5 +1,9 @@
+from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
-from bounties.auction_models import Auction
+from django.db import transaction
+from bounties.models import Auction
+from bounties.bidding import publish_high_water_mark
+from bounties.lifecycle import notify_schedule_changed
 from django.utils import timezone
 from datetime import timedelta
 
@@ -31,21 +35,19 @@ class Command(BaseCommand):
             default=24,
             help='Duration of auction in hours'
         )
+        parser.add_argument(
+            '--admin-username',
+            type=str,
+            default='delo',
+            help='Username of the admin creating the auction'
+        )
 
     def handle(self, *args, **options):
-        # Check if there's already an active auction
-        active_auction = Auction.objects.filter(status='active').first()
-        if active_auction:
+        try:
+            admin_user = User.objects.get(username=options['admin_username'])
+        except User.DoesNotExist:
             self.stdout.write(
-                self.style.WARNING(f'Active auction already exists: {active_auction.title}')
-            )
-            return
-
-        # Check if there's a pending auction
-        pending_auction = Auction.objects.filter(status='pending').first()
-        if pending_auction:
-            self.stdout.write(
-                self.style.WARNING(f'Pending auction already exists: {pending_auction.title}')
+                self.style.ERROR(f'Admin user "{options["admin_username"]}" not found')
             )
             return
 
@@ -54,14 +56,18 @@ class Command(BaseCommand):
         starts_at = now
         ends_at = now + timedelta(hours=options['duration_hours'])
 
-        auction = Auction.objects.create(
-            title=options['title'],
-            description=options['description'],
-            minimum_bid=options['minimum_bid'],
-            starts_at=starts_at,
-            ends_at=ends_at,
-            status='active'
-        )
+        with transaction.atomic():
+            auction = Auction.objects.create(
+                title=options['title'],
+                description=options['description'],
+                minimum_bid=options['minimum_bid'],
+                starts_at=starts_at,
+                ends_at=ends_at,
+                status='active',
+                created_by=admin_user
+            )
+            publish_high_water_mark(auction)
+            notify_schedule_changed(auction.id)
 
         self.stdout.write(
             self.style.SUCCESS(
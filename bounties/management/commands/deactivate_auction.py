@@ -1,54 +1,57 @@
 from django.core.management.base import BaseCommand
-from bounties.auction_models import Auction
+from bounties.models import Auction
+from bounties.lifecycle import end_auction
 
 class Command(BaseCommand):
-    help = 'Deactivate the current active auction'
+    help = 'End active auctions now, recording their winners'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--auction-id',
             type=int,
-            help='ID of the auction to deactivate (if not specified, deactivates the first active auction)'
+            action='append',
+            help='ID of an auction to end (repeatable); may be left out while only one auction is active'
         )
 
     def handle(self, *args, **options):
-        auction_id = options.get('auction_id')
-        
-        if auction_id:
-            # Deactivate specific auction by ID
-            try:
-                auction = Auction.objects.get(id=auction_id)
-                old_status = auction.status
-                auction.status = 'ended'
-                auction.save()
+        auction_ids = options.get('auction_id')
+
+        if not auction_ids:
+            active_ids = list(Auction.objects.filter(status='active').values_list('id', flat=True))
+            if not active_ids:
+                self.stdout.write(
+                    self.style.WARNING('No active auctions found to deactivate')
+                )
+                return
+            if len(active_ids) > 1:
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Successfully deactivated auction: "{auction.title}"\n'
-                        f'ID: {auction.id}\n'
-                        f'Previous status: {old_status}\n'
-                        f'New status: {auction.status}'
+                    self.style.ERROR(
+                        f'{len(active_ids)} auctions are active ({", ".join(map(str, active_ids))}); '
+                        f'choose them with --auction-id'
                     )
                 )
+                return
+            auction_ids = active_ids
+
+        for auction_id in auction_ids:
+            try:
+                auction, winner = end_auction(auction_id, force=True)
             except Auction.DoesNotExist:
                 self.stdout.write(
                     self.style.ERROR(f'Auction with ID {auction_id} not found')
                 )
-        else:
-            # Deactivate the first active auction
-            active_auction = Auction.objects.filter(status='active').first()
-            if active_auction:
-                old_status = active_auction.status
-                active_auction.status = 'ended'
-                active_auction.save()
+                continue
+            except ValueError as e:
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Successfully deactivated auction: "{active_auction.title}"\n'
-                        f'ID: {active_auction.id}\n'
-                        f'Previous status: {old_status}\n'
-                        f'New status: {active_auction.status}'
-                    )
+                    self.style.ERROR(f'Auction {auction_id}: {e}')
                 )
-            else:
-                self.stdout.write(
-                    self.style.WARNING('No active auctions found to deactivate')
-                )
\ No newline at end of file
+                continue
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully deactivated auction: "{auction.title}"\n'
+                    f'ID: {auction.id}\n'
+                    f'New status: {auction.status}\n'
+                    f'Winner: {winner.winner.username if winner else "none"}'
+                )
+            )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from bounties.events import rebuild_snapshot
+from bounties.models import Auction
+
+
+class Command(BaseCommand):
+    help = 'Recompute auction snapshots (highest bid, bidder, bid count, end time, status) from the event log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--auction-id',
+            type=int,
+            action='append',
+            help='Rebuild only this auction (repeatable); defaults to every auction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report snapshots that disagree with the log without fixing them'
+        )
+
+    def handle(self, *args, **options):
+        auction_ids = options['auction_id'] or list(Auction.objects.values_list('id', flat=True))
+
+        drifted = 0
+        for auction_id in auction_ids:
+            try:
+                diff = rebuild_snapshot(auction_id, dry_run=options['dry_run'])
+            except Auction.DoesNotExist:
+                self.stdout.write(self.style.WARNING(f'Auction {auction_id} does not exist'))
+                continue
+            if diff:
+                drifted += 1
+                changes = ', '.join(f'{field}: {stored} -> {replayed}' for field, (stored, replayed) in diff.items())
+                self.stdout.write(f'Auction {auction_id}: {changes}')
+
+        verb = 'would be rebuilt' if options['dry_run'] else 'rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'{drifted} of {len(auction_ids)} auction snapshots {verb}'))
@@ -0,0 +1,35 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bounties.lifecycle import AuctionScheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the auction lifecycle scheduler as a standalone process'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lease-seconds',
+            type=int,
+            default=settings.AUCTION_SCHEDULER_LEASE_SECONDS,
+            help='Lifetime of the scheduler lease'
+        )
+        parser.add_argument(
+            '--resync-seconds',
+            type=int,
+            default=settings.AUCTION_SCHEDULER_RESYNC_SECONDS,
+            help='Interval between backstop reads of recently edited auctions'
+        )
+
+    def handle(self, *args, **options):
+        scheduler = AuctionScheduler(
+            lease_seconds=options['lease_seconds'],
+            resync_seconds=options['resync_seconds'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Auction scheduler {scheduler.owner} starting'))
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            self.stdout.write('Auction scheduler stopped')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from bounties.settlement import settle_auctions
+
+
+class Command(BaseCommand):
+    help = 'Refund outbid bidders and record winner payments for ended auctions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--auction-id',
+            type=int,
+            action='append',
+            help='Settle only this auction (repeatable); defaults to every unsettled auction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be refunded without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        report = settle_auctions(options['auction_id'], dry_run=options['dry_run'])
+
+        prefix = 'Dry run: would settle' if report['dry_run'] else 'Settled'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {report['auctions']} auctions: {report['refunds']} refunds "
+            f"({report['refunded_coins']} coins to {report['users_credited']} users), "
+            f"{report['payments']} winner payments"
+        ))
+        for phase, elapsed in report['timings_ms'].items():
+            self.stdout.write(f'  {phase}: {elapsed:.1f} ms')
@@ -0,0 +1,45 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from bounties.media_manifest import media_manifest
+
+
+class Command(BaseCommand):
+    help = 'Re-check every stored auction image and refresh the media manifest'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep sweeping every this many seconds instead of running once'
+        )
+
+    def handle(self, *args, **options):
+        # The sweep only reaches web workers through the shared cache; their
+        # in-process LRUs are out of reach and refresh themselves after
+        # MEDIA_MANIFEST_LOCAL_TTL_SECONDS.
+        if not media_manifest.shared or isinstance(caches['default'], (LocMemCache, DummyCache)):
+            raise CommandError(
+                'The media manifest is not shared between processes (MEDIA_MANIFEST_SHARED is off or the '
+                'cache is process-local), so a sweep here would not reach the web workers'
+            )
+        interval = options['interval']
+        while True:
+            started = time.perf_counter()
+            checked, missing = media_manifest.sweep()
+            self.stdout.write(self.style.SUCCESS(
+                f'Media manifest refreshed: {checked} paths checked, {missing} missing '
+                f'({time.perf_counter() - started:.2f}s)'
+            ))
+            if interval <= 0:
+                return
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                self.stdout.write('Media manifest sweep stopped')
+                return
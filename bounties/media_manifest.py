@@ -0,0 +1,253 @@
+"""
+Media manifest: a cached index of stored media files for the serializers.
+
+Each entry maps a storage path (``auction_images/foo.jpg``) to whether the
+file exists, its URL, size and modification time, so serializing a list of
+auctions costs no storage calls once the manifest is warm. Entries are
+refreshed when an AuctionImage is saved or deleted, re-stat'd when they
+expire, and, when the manifest is shared through the cache, rebuilt
+wholesale by ``manage.py sweep_media_manifest``.
+
+It also resolves links to an upload's original file name (``foo.jpg``) to
+the name storage gave it (``foo_0mauncA.jpg``) through the indexed
+``AuctionImage.original_name`` column, caching misses as well as hits.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Auction, AuctionImage, shorten_upload_name
+
+
+def media_path_from_url(url):
+    """Return the storage path for a ``/media/...`` URL path, or None."""
+    media_url = settings.MEDIA_URL
+    if not isinstance(url, str) or not url.startswith(media_url):
+        return None
+    return url[len(media_url):]
+
+
+def stat_media(path, storage=default_storage):
+    """Ask the storage backend about ``path``; the only place the manifest touches storage."""
+    if not storage.exists(path):
+        return {'exists': False, 'url': None, 'size': None, 'mtime': None}
+    try:
+        size = storage.size(path)
+    except (OSError, NotImplementedError):
+        size = None
+    try:
+        mtime = storage.get_modified_time(path).timestamp()
+    except (OSError, NotImplementedError):
+        mtime = None
+    return {'exists': True, 'url': storage.url(path), 'size': size, 'mtime': mtime}
+
+
+class MediaManifest:
+    """
+    Two-level cache of storage path -> media entry.
+
+    Like the authentication user cache, a process-local LRU sits in front of
+    an optional shared cache. Misses fall through to the storage backend and
+    are written back to both levels, so a path is stat'd at most once per
+    ``ttl`` across all workers. Uploads and deletes refresh the entry in the
+    worker that made them and in the shared cache; other workers' LRUs catch
+    up within ``local_ttl`` seconds.
+    """
+
+    KEY = 'media:manifest:{}'
+
+    def __init__(self, max_size=50000, ttl=3600, local_ttl=60, shared=False, storage=default_storage):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl)
+        self.shared = shared
+        self.storage = storage
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def get(self, path):
+        return self.get_many([path])[path]
+
+    def get_many(self, paths):
+        """Resolve entries for ``paths``, stat'ing only those no cache level knows."""
+        entries = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for path in dict.fromkeys(paths):
+                cached = self._entries.get(path)
+                if cached is not None and cached[1] > now:
+                    self._entries.move_to_end(path)
+                    entries[path] = cached[0]
+                else:
+                    missing.append(path)
+            self._stats['local_hits'] += len(entries)
+
+        if missing and self.shared:
+            keys = {self._key(path): path for path in missing}
+            found = cache.get_many(list(keys))
+            for key, entry in found.items():
+                entries[keys[key]] = entry
+                self._store_local(keys[key], entry)
+            self._count('shared_hits', len(found))
+            missing = [path for path in missing if path not in entries]
+
+        if missing:
+            self._count('misses', len(missing))
+            fresh = {path: stat_media(path, self.storage) for path in missing}
+            self._store(fresh)
+            entries.update(fresh)
+        return entries
+
+    def exists(self, path):
+        return self.get(path)['exists']
+
+    def refresh(self, paths):
+        """Re-stat ``paths`` now and store the results; returns the new entries."""
+        fresh = {path: stat_media(path, self.storage) for path in dict.fromkeys(paths)}
+        self._store(fresh)
+        return fresh
+
+    def invalidate(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+        if self.shared:
+            cache.delete(self._key(path))
+
+    def sweep(self):
+        """
+        Re-stat every path the database refers to: uploaded images and
+        ``/media/`` URLs kept in ``Auction.image_urls``. Returns
+        ``(checked, missing)`` counts.
+        """
+        paths = set(AuctionImage.objects.exclude(image='').values_list('image', flat=True))
+        for urls in Auction.objects.exclude(image_urls=[]).values_list('image_urls', flat=True):
+            for url in urls or []:
+                path = media_path_from_url(url)
+                if path:
+                    paths.add(path)
+        fresh = self.refresh(sorted(paths))
+        return len(fresh), sum(1 for entry in fresh.values() if not entry['exists'])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = sum(stats.values())
+        hits = stats['local_hits'] + stats['shared_hits']
+        return dict(
+            stats,
+            hit_ratio=round(hits / lookups, 4) if lookups else None,
+            local_size=size,
+            max_size=self.max_size,
+            shared=self.shared,
+        )
+
+    def _key(self, path):
+        # Paths may hold spaces or run long; hash them into safe cache keys.
+        return self.KEY.format(hashlib.sha1(path.encode()).hexdigest())
+
+    def _store(self, entries):
+        for path, entry in entries.items():
+            self._store_local(path, entry)
+        if entries and self.shared:
+            cache.set_many({self._key(path): entry for path, entry in entries.items()}, self.ttl)
+
+    def _store_local(self, path, entry):
+        with self._lock:
+            self._entries[path] = (entry, time.monotonic() + self.local_ttl)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, name, amount):
+        if amount:
+            with self._lock:
+                self._stats[name] += amount
+
+
+media_manifest = MediaManifest(
+    max_size=settings.MEDIA_MANIFEST_SIZE,
+    ttl=settings.MEDIA_MANIFEST_TTL_SECONDS,
+    local_ttl=settings.MEDIA_MANIFEST_LOCAL_TTL_SECONDS,
+    shared=settings.MEDIA_MANIFEST_SHARED,
+)
+
+
+ALIAS_KEY = 'media:alias:{}'
+
+
+def _alias_key(name):
+    return ALIAS_KEY.format(hashlib.sha1(name.encode()).hexdigest())
+
+
+def resolve_image_alias(name):
+    """
+    Return the stored path of the earliest upload originally called ``name``
+    whose file still exists, or None. Both outcomes are cached, so repeated
+    requests for an unknown name cost one cache read.
+    """
+    # Long names were shortened when they were recorded; look them up the same way.
+    name = shorten_upload_name(name)
+    key = _alias_key(name)
+    path = cache.get(key)
+    if path is None or (path and not media_manifest.exists(path)):
+        candidates = (
+            AuctionImage.objects.filter(original_name=name).exclude(image='')
+            .order_by('id').values_list('image', flat=True)
+        )
+        path = next((candidate for candidate in candidates if media_manifest.exists(candidate)), '')
+        cache.set(key, path, settings.MEDIA_MANIFEST_TTL_SECONDS)
+    return path or None
+
+
+def _forget_alias(name):
+    cache.delete(_alias_key(name))
+    # Again on commit, so a lookup racing the open transaction cannot
+    # cache the pre-save answer.
+    transaction.on_commit(lambda: cache.delete(_alias_key(name)))
+
+
+def record_uploads(images):
+    """
+    Fill in manifest entries and drop cached alias answers for AuctionImage
+    rows whose files were just written. Called by post_save, and directly
+    after bulk_create, which sends no signals.
+    """
+    media_manifest.refresh([image.image.name for image in images if image.image])
+    for image in images:
+        if image.original_name:
+            _forget_alias(image.original_name)
+
+
+@receiver(post_save, sender=AuctionImage)
+def record_uploaded_image(sender, instance, **kwargs):
+    # The file is written to storage before post_save, so the entry can be
+    # filled in straight away rather than left for the first reader to stat.
+    record_uploads([instance])
+
+
+@receiver(post_delete, sender=AuctionImage)
+def forget_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        path = instance.image.name
+        media_manifest.invalidate(path)
+        transaction.on_commit(lambda: media_manifest.invalidate(path))
+    if instance.original_name:
+        _forget_alias(instance.original_name)
@@ -0,0 +1,142 @@
+"""
+HTTP responses for uploaded media.
+
+Responses carry a strong ETag and Last-Modified built from the media
+manifest entry (no extra stat), answer ``If-None-Match`` and
+``If-Modified-Since`` with 304, and serve single byte ranges with 206.
+Files whose stored name carries a per-upload random suffix never change
+under that name, so they are marked immutable for a year; anything else is
+cached briefly and revalidated.
+
+Bodies are plain files handed to FileResponse, so under a WSGI server whose
+``wsgi.file_wrapper`` uses ``os.sendfile`` (gunicorn's sync and gthread
+workers) they are sent without copying through Python. A ranged body is
+positioned at its first byte and bounded by Content-Length, which is what
+gunicorn's sendfile path reads. ASGI servers stream the body in blocks.
+"""
+
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .media_manifest import media_manifest
+from .models import RENAMED_UPLOAD_RE
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_etag(entry):
+    return f'"{entry["size"]:x}-{int(entry["mtime"] * 1000000):x}"'
+
+
+def is_immutable_name(path):
+    """True for stored names with the per-upload random suffix (see auction_image_upload_to)."""
+    return bool(RENAMED_UPLOAD_RE.match(os.path.basename(path)))
+
+
+def parse_byte_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single ``bytes=`` range, None
+    when the header should be ignored (absent, malformed or multi-range),
+    or ``False`` when the range cannot be satisfied.
+    """
+    match = BYTE_RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False if start >= size else None
+    return start, end
+
+
+class RangeFile:
+    """A file positioned at ``start`` whose reads stop after ``length`` bytes."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _cache_headers(response, entry, etag, immutable):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(entry['mtime'])
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if immutable
+        else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE_SECONDS}'
+    )
+    return response
+
+
+def media_response(request, path, immutable=None):
+    """
+    Serve the stored file at ``path`` with validators, conditional GET and
+    byte ranges. ``immutable`` defaults to whether the name is suffixed.
+    """
+    entry = media_manifest.get(path)
+    if not entry['exists'] or entry['size'] is None or entry['mtime'] is None:
+        return HttpResponseNotFound('Not Found')
+    if immutable is None:
+        immutable = is_immutable_name(path)
+
+    etag = media_etag(entry)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(entry['mtime']))
+    if not_modified is not None:
+        return _cache_headers(not_modified, entry, etag, immutable)
+
+    size = entry['size']
+    byte_range = parse_byte_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range not in (etag, http_date(entry['mtime'])):
+        byte_range = None  # the client's partial copy is stale: send it all
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _cache_headers(response, entry, etag, immutable)
+
+    try:
+        file = default_storage.open(path, 'rb')
+    except (FileNotFoundError, IsADirectoryError, PermissionError):
+        media_manifest.invalidate(path)
+        return HttpResponseNotFound('Not Found')
+
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(file)
+    response.block_size = 64 * 1024
+    response['Accept-Ranges'] = 'bytes'
+    return _cache_headers(response, entry, etag, immutable)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.11 on 2026-10-17 01:38
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_claims_count(apps, schema_editor):
+    Bounty = apps.get_model('bounties', 'Bounty')
+    BountyClaim = apps.get_model('bounties', 'BountyClaim')
+    counts = (
+        BountyClaim.objects.filter(bounty=models.OuterRef('pk'))
+        .order_by().values('bounty')
+        .annotate(total=models.Count('pk')).values('total')
+    )
+    Bounty.objects.update(claims_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0008_alter_cointransaction_transaction_type_pointtransfer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bounty',
+            name='claims_count',
+            field=models.IntegerField(default=0, help_text='Number of claims, maintained by claim writes'),
+        ),
+        migrations.RunPython(backfill_claims_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0009_bounty_claims_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('owner', models.CharField(max_length=200)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'bounties_scheduler_leases',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0010_schedulerlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='settled_at',
+            field=models.DateTimeField(blank=True, help_text='When outbid bidders were refunded', null=True),
+        ),
+        migrations.AlterField(
+            model_name='cointransaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('bounty_reward', 'Bounty Reward'), ('code_redemption', 'Code Redemption'), ('admin_adjustment', 'Admin Adjustment'), ('playengine_transfer', 'PlayEngine Transfer'), ('auction_payment', 'Auction Payment'), ('auction_refund', 'Auction Refund')], max_length=20),
+        ),
+    ]
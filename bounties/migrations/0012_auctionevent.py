@@ -0,0 +1,66 @@
+# Generated by Django 5.2.11 on 2026-10-17 01:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_events(apps, schema_editor):
+    """Seed the log from existing bids and winners so replays match today's snapshots."""
+    Auction = apps.get_model('bounties', 'Auction')
+    AuctionBid = apps.get_model('bounties', 'AuctionBid')
+    AuctionEvent = apps.get_model('bounties', 'AuctionEvent')
+    AuctionWinner = apps.get_model('bounties', 'AuctionWinner')
+
+    winners = {winner.auction_id: winner for winner in AuctionWinner.objects.all()}
+    for auction in Auction.objects.iterator():
+        timeline = []
+        bids = AuctionBid.objects.filter(
+            auction=auction, status__in=['accepted', 'outbid', 'cancelled']
+        ).order_by('created_at', 'id')
+        for bid in bids:
+            timeline.append((bid.created_at, bid.id, AuctionEvent(
+                auction=auction, kind='bid_accepted', bid=bid, user_id=bid.user_id, amount=bid.amount,
+            )))
+            if bid.status == 'cancelled':
+                timeline.append((bid.updated_at, bid.id, AuctionEvent(
+                    auction=auction, kind='bid_cancelled', bid=bid, user_id=bid.user_id, amount=bid.amount,
+                )))
+        if auction.status == 'ended':
+            winner = winners.get(auction.id)
+            timeline.append((auction.updated_at, 0, AuctionEvent(
+                auction=auction, kind='ended',
+                user_id=winner.winner_id if winner else None,
+                amount=winner.winning_amount if winner else None,
+            )))
+        timeline.sort(key=lambda entry: entry[:2])
+        AuctionEvent.objects.bulk_create([event for _, _, event in timeline], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0011_auction_settlement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bid_accepted', 'Bid accepted'), ('bid_cancelled', 'Bid cancelled'), ('extended', 'Extended'), ('ended', 'Ended')], max_length=20)),
+                ('amount', models.IntegerField(blank=True, help_text='Bid or winning amount in coins', null=True)),
+                ('ends_at', models.DateTimeField(blank=True, help_text='New end time for extended events', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('auction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='bounties.auction')),
+                ('bid', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='bounties.auctionbid')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='auction_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['auction', 'id'], name='bounties_au_auction_3da62e_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0012_auctionevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='extension_seconds',
+            field=models.PositiveIntegerField(default=180, help_text='How far each anti-snipe extension moves the end time'),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='extension_window_seconds',
+            field=models.PositiveIntegerField(default=180, help_text='Bids placed this close to the end extend the auction (anti-snipe); 0 turns it off'),
+        ),
+    ]
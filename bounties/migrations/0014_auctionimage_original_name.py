@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-17 03:05
+
+import os
+import re
+
+from django.db import migrations, models
+
+RENAMED_UPLOAD_RE = re.compile(r'^(?P<base>.+)_[A-Za-z0-9]{7}(?P<ext>\.[^.]*)$')
+
+
+def backfill_original_names(apps, schema_editor):
+    AuctionImage = apps.get_model('bounties', 'AuctionImage')
+    images = []
+    for image in AuctionImage.objects.exclude(image='').only('id', 'image'):
+        name = os.path.basename(image.image.name)
+        match = RENAMED_UPLOAD_RE.match(name)
+        image.original_name = f"{match['base']}{match['ext']}" if match else name
+        images.append(image)
+    AuctionImage.objects.bulk_update(images, ['original_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0013_auction_anti_snipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionimage',
+            name='original_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='File name as uploaded, before storage made it unique; resolves old image links', max_length=100),
+        ),
+        migrations.RunPython(backfill_original_names, migrations.RunPython.noop),
+    ]
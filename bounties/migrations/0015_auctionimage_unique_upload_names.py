@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-17 02:26
+
+import bounties.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0014_auctionimage_original_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auctionimage',
+            name='image',
+            field=models.ImageField(upload_to=bounties.models.auction_image_upload_to),
+        ),
+    ]
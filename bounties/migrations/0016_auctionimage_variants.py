@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0015_auctionimage_unique_upload_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies as {format: {width: path}}, filled in after upload'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0016_auctionimage_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auctionevent',
+            name='kind',
+            field=models.CharField(choices=[('bid_accepted', 'Bid accepted'), ('bid_cancelled', 'Bid cancelled'), ('extended', 'Extended'), ('ended', 'Ended'), ('cancelled', 'Cancelled')], max_length=20),
+        ),
+    ]
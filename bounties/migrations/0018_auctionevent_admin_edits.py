@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounties', '0017_auctionevent_cancelled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auctionevent',
+            name='status',
+            field=models.CharField(blank=True, help_text='New status for status_changed events', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='auctionevent',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, help_text='New end time for extended and rescheduled events', null=True),
+        ),
+        migrations.AlterField(
+            model_name='auctionevent',
+            name='kind',
+            field=models.CharField(choices=[('bid_accepted', 'Bid accepted'), ('bid_cancelled', 'Bid cancelled'), ('extended', 'Extended'), ('ended', 'Ended'), ('cancelled', 'Cancelled'), ('rescheduled', 'Rescheduled'), ('status_changed', 'Status changed')], max_length=20),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+import os
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 
 
 class UserProfile(models.Model):
@@ -28,6 +33,9 @@ class UserProfile(models.Model):
             profile.coin_balance += amount
             profile.save(update_fields=['coin_balance'])
 
+            from .balances import publish_balance
+            publish_balance(profile, amount)
+
             # Create transaction record
             CoinTransaction.objects.create(
                 user=self.user,
@@ -52,6 +60,8 @@ class CoinTransaction(models.Model):
         ('code_redemption', 'Code Redemption'),
         ('admin_adjustment', 'Admin Adjustment'),
         ('playengine_transfer', 'PlayEngine Transfer'),
+        ('auction_payment', 'Auction Payment'),
+        ('auction_refund', 'Auction Refund'),
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='coin_transactions')
@@ -115,6 +125,7 @@ class Bounty(models.Model):
     reward = models.IntegerField(help_text="Coin reward amount")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     max_claims = models.IntegerField()
+    claims_count = models.IntegerField(default=0, help_text="Number of claims, maintained by claim writes")
     expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -124,6 +135,13 @@ class Bounty(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
+        if not is_new and kwargs.get('update_fields') is None:
+            # claims_count is maintained with F() updates; never write back a
+            # possibly stale in-memory copy of it.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'claims_count'
+            ]
         super().save(*args, **kwargs)
         if not is_new:
             if self.is_expired():
@@ -137,7 +155,58 @@ class Bounty(models.Model):
 
     @property
     def claims_left(self):
-        return self.max_claims - self.claims.count()
+        return self.max_claims - self.claims_count
+
+    @classmethod
+    def reserve_claim(cls, bounty_id, user):
+        """
+        Claim a slot on a bounty for ``user`` and return the new BountyClaim.
+
+        The slot is taken with one conditional UPDATE that only matches while
+        the bounty is available and under max_claims, and flips it to 'full'
+        when it takes the last slot, so concurrent claims can never
+        over-claim. Raises Bounty.DoesNotExist or ValueError.
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                reserved = cls.objects.filter(
+                    models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now),
+                    pk=bounty_id,
+                    status='available',
+                    claims_count__lt=models.F('max_claims'),
+                ).update(
+                    claims_count=models.F('claims_count') + 1,
+                    status=models.Case(
+                        models.When(claims_count__gte=models.F('max_claims') - 1, then=models.Value('full')),
+                        default=models.F('status'),
+                    ),
+                    updated_at=now,
+                )
+                if not reserved:
+                    if not cls.objects.filter(pk=bounty_id).exists():
+                        raise cls.DoesNotExist
+                    if BountyClaim.objects.filter(bounty_id=bounty_id, user=user).exists():
+                        raise ValueError("You have already claimed this bounty")
+                    raise ValueError("Bounty is not available for claiming")
+
+                # The unique (bounty, user) constraint rolls the slot back for
+                # a repeat claim.
+                return BountyClaim.objects.create(bounty_id=bounty_id, user=user)
+        except IntegrityError:
+            raise ValueError("You have already claimed this bounty")
+
+    @classmethod
+    def recount_claims(cls, queryset=None):
+        """Recompute claims_count from the claims table; returns rows updated."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        counts = BountyClaim.objects.filter(bounty=models.OuterRef('pk')).order_by().values('bounty')
+        return queryset.update(
+            claims_count=Coalesce(
+                models.Subquery(counts.annotate(total=models.Count('pk')).values('total')),
+                0,
+            )
+        )
 
     class Meta:
         ordering = ['-created_at']
@@ -185,6 +254,12 @@ class BountyClaim(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.bounty.title}"
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Bounty.objects.filter(pk=self.bounty_id).update(claims_count=models.F('claims_count') - 1)
+        return result
+
 
 class RedeemCode(models.Model):
     STATUS_CHOICES = [
@@ -240,6 +315,15 @@ class Auction(models.Model):
     current_highest_bid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     current_highest_bidder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='highest_bid_auctions')
     total_bids = models.PositiveIntegerField(default=0)
+    settled_at = models.DateTimeField(null=True, blank=True, help_text="When outbid bidders were refunded")
+    extension_window_seconds = models.PositiveIntegerField(
+        default=180,
+        help_text="Bids placed this close to the end extend the auction (anti-snipe); 0 turns it off"
+    )
+    extension_seconds = models.PositiveIntegerField(
+        default=180,
+        help_text="How far each anti-snipe extension moves the end time"
+    )
 
     class Meta:
         db_table = 'bounties_auctions'
@@ -281,9 +365,59 @@ class Auction(models.Model):
         return self.status == 'active' and self.starts_at <= now <= self.ends_at
 
 
+# Suffix FileSystemStorage.get_available_name appends when a name is taken.
+RENAMED_UPLOAD_RE = re.compile(r'^(?P<base>.+)_[A-Za-z0-9]{7}(?P<ext>\.[^.]*)$')
+
+
+# Length of AuctionImage.image and AuctionImage.original_name.
+IMAGE_NAME_MAX_LENGTH = 100
+AUCTION_IMAGE_DIR = 'auction_images/'
+UPLOAD_SUFFIX_LENGTH = len('_0mauncA')
+
+
+def shorten_upload_name(filename):
+    """
+    Cut a long upload name down so its stored form, directory and random
+    suffix included, fits IMAGE_NAME_MAX_LENGTH. Like storage, this trims the
+    end of the base name and keeps the extension.
+    """
+    budget = IMAGE_NAME_MAX_LENGTH - len(AUCTION_IMAGE_DIR) - UPLOAD_SUFFIX_LENGTH
+    base, ext = os.path.splitext(os.path.basename(filename))
+    return f'{base[:max(budget - len(ext), 1)]}{ext}'[:budget]
+
+
+def auction_image_upload_to(instance, filename):
+    """
+    Store every upload under a name with a random suffix, so a stored name
+    always refers to the same bytes and can be cached as immutable.
+    """
+    base, ext = os.path.splitext(shorten_upload_name(filename))
+    return f'{AUCTION_IMAGE_DIR}{base}_{get_random_string(7)}{ext}'
+
+
+def original_upload_name(filename, storage):
+    """The name kept in ``AuctionImage.original_name`` for a file the client called ``filename``."""
+    return shorten_upload_name(storage.get_valid_name(os.path.basename(filename)))
+
+
+def original_image_name(stored_name):
+    """Best guess at the file name an upload had before storage renamed it."""
+    name = os.path.basename(stored_name)
+    match = RENAMED_UPLOAD_RE.match(name)
+    return f"{match['base']}{match['ext']}" if match else name
+
+
 class AuctionImage(models.Model):
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='auction_images/')
+    image = models.ImageField(upload_to=auction_image_upload_to, max_length=IMAGE_NAME_MAX_LENGTH)
+    original_name = models.CharField(
+        max_length=IMAGE_NAME_MAX_LENGTH, blank=True, db_index=True, editable=False,
+        help_text='File name as uploaded, before storage made it unique; resolves old image links'
+    )
+    variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text='Resized copies as {format: {width: path}}, filled in after upload'
+    )
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -293,3 +427,25 @@ class AuctionImage(models.Model):
 
     def __str__(self):
         return f"{self.auction.title} - Image {self.order}"
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.original_name:
+            if self.image._committed:
+                self.original_name = original_image_name(self.image.name)
+            else:
+                # Not written yet: the name is still the one the client sent.
+                self.original_name = original_upload_name(self.image.name, self.image.storage)
+        super().save(*args, **kwargs)
+
+
+class SchedulerLease(models.Model):
+    """Time-limited leader lease so only one replica runs a singleton background job."""
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=200)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'bounties_scheduler_leases'
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner} until {self.expires_at}"
@@ -0,0 +1,125 @@
+"""
+Coalescing channel-layer publisher.
+
+Collects group messages from request and worker threads and sends them from
+a background thread once per tick. Messages for the same group and event
+type published within one tick collapse into a single send (latest wins,
+or combined with a merge function), so a burst of writes costs each socket
+one frame.
+
+Frames are serialized once, here, and travel through the channel layer as
+text; consumers send that text as-is (see frame_text) instead of encoding
+the same payload again for every socket in the group.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the standard library encoder is used otherwise
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_json_default = DjangoJSONEncoder().default
+
+
+def encode_frame(data):
+    """Serialize a socket frame to JSON text."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default).decode()
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def frame_message(event_type, data, **envelope):
+    """
+    Build a group message carrying ``data`` already encoded.
+
+    ``envelope`` fields travel unencoded next to the text for consumers that
+    need to look at the frame before forwarding it.
+    """
+    return dict(envelope, type=event_type, text=encode_frame(data))
+
+
+def frame_text(event):
+    """Return the text a consumer should send for a group message."""
+    text = event.get('text')
+    if text is None:
+        text = encode_frame(event['data'])
+    return text
+
+
+class CoalescingPublisher:
+    """Send coalesced channel-layer group messages once per interval."""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._loop = None
+
+    def bind_loop(self, loop):
+        """
+        Send from the event loop that owns this process's sockets.
+
+        The in-memory channel layer is not safe to use from a second event
+        loop; consumers bind the server loop on connect so sends are
+        scheduled there instead.
+        """
+        self._loop = loop
+
+    def publish(self, group, event_type, data, merge=None, envelope=()):
+        """
+        Queue ``data`` for ``group``; ``merge(old, new)`` combines same-tick messages.
+
+        ``envelope`` names fields of ``data`` to copy next to the encoded
+        frame (see frame_message).
+        """
+        key = (group, event_type)
+        with self._lock:
+            if merge is not None and key in self._pending:
+                data = merge(self._pending[key][0], data)
+            self._pending[key] = (data, envelope)
+            self._ensure_thread()
+        self._wakeup.set()
+
+    async def flush(self):
+        """Send everything queued so far from the current event loop."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        for (group, event_type), (data, envelope) in batch.items():
+            try:
+                message = frame_message(event_type, data, **{field: data[field] for field in envelope})
+                await get_channel_layer().group_send(group, message)
+            except Exception as exc:
+                logger.error(f"Error publishing {event_type} to {group}: {exc}")
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='channel-publisher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let the rest of the burst arrive before sending.
+            time.sleep(self.interval)
+            try:
+                loop = self._loop
+                if loop is not None and loop.is_running():
+                    asyncio.run_coroutine_threadsafe(self.flush(), loop).result(timeout=10)
+                else:
+                    async_to_sync(self.flush)()
+            except Exception as exc:
+                logger.error(f"Channel publisher tick failed: {exc}")
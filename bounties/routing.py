@@ -18,4 +18,7 @@ websocket_urlpatterns = [
     
     # General auction updates for all connected clients
     re_path(r'ws/auction/updates/$', consumers.AuctionUpdatesConsumer.as_asgi()),
+
+    # Coin balance pushes for the authenticated user
+    re_path(r'ws/balance/$', consumers.BalanceConsumer.as_asgi()),
 ]
\ No newline at end of file
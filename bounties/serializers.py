@@ -1,10 +1,10 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.conf import settings
-from django.core.files.storage import default_storage
 from urllib.parse import urlparse
 from .models import Bounty, BountyClaim, RedeemCode, Auction, AuctionImage
 from .auction_models import AuctionBid, AuctionWinner
+from .media_manifest import media_manifest, media_path_from_url
 
 
 def _build_absolute_media_url(request, path):
@@ -19,6 +19,15 @@ def _build_absolute_media_url(request, path):
     return request.build_absolute_uri(path) if request else path
 
 
+def normalize_media_path(path):
+    """Map legacy ``/auction_images/...`` paths onto the media URL prefix."""
+    if path.startswith('/media/'):
+        return path
+    if path.startswith('/auction_images/'):
+        return f"/media{path}"
+    return path
+
+
 class BountySerializer(serializers.ModelSerializer):
     time_left = serializers.SerializerMethodField()
     posted_hours_ago = serializers.SerializerMethodField()
@@ -44,13 +53,10 @@ class BountySerializer(serializers.ModelSerializer):
 
 
 class BountyDetailSerializer(BountySerializer):
-    claims_count = serializers.SerializerMethodField()
 
     class Meta(BountySerializer.Meta):
         fields = BountySerializer.Meta.fields + ['claims_count', 'max_claims']
-
-    def get_claims_count(self, obj):
-        return obj.claims.count()
+        read_only_fields = ['claims_count']
 
 
 class BountyClaimSerializer(serializers.ModelSerializer):
@@ -116,10 +122,11 @@ class RedeemCodeRedeemSerializer(serializers.Serializer):
 class AuctionImageSerializer(serializers.ModelSerializer):
     """Serializer for AuctionImage model."""
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = AuctionImage
-        fields = ['id', 'image', 'order', 'created_at']
+        fields = ['id', 'image', 'srcset', 'order', 'created_at']
         read_only_fields = ['created_at']
 
     def get_image(self, obj):
@@ -128,11 +135,31 @@ class AuctionImageSerializer(serializers.ModelSerializer):
             return None
 
         # Do not expose broken media links when file is missing on disk/storage.
-        if not default_storage.exists(obj.image.name):
+        entry = media_manifest.get(obj.image.name)
+        if not entry['exists']:
             return None
 
-        image_url = obj.image.url
-        return _build_absolute_media_url(request, image_url)
+        return _build_absolute_media_url(request, entry['url'])
+
+    def get_srcset(self, obj):
+        """Resized copies as {format: "url 320w, url 640w"}; empty until they are rendered."""
+        variants = obj.variants or {}
+        paths = [path for by_width in variants.values() for path in by_width.values()]
+        if not paths:
+            return {}
+
+        request = self.context.get('request')
+        media = media_manifest.get_many(paths)
+        srcset = {}
+        for fmt, by_width in variants.items():
+            candidates = [
+                f"{_build_absolute_media_url(request, media[path]['url'])} {width}w"
+                for width, path in sorted(by_width.items(), key=lambda item: int(item[0]))
+                if media[path]['exists']
+            ]
+            if candidates:
+                srcset[fmt] = ', '.join(candidates)
+        return srcset
 
 
 class AuctionSerializer(serializers.ModelSerializer):
@@ -151,7 +178,8 @@ class AuctionSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'minimum_bid', 'status',
             'starts_at', 'ends_at', 'created_at', 'updated_at', 'created_by',
             'current_highest_bid', 'bid_count', 'time_until_start', 
-            'time_until_end', 'is_active', 'images', 'image_files'
+            'time_until_end', 'is_active', 'images', 'image_files',
+            'extension_window_seconds', 'extension_seconds'
         ]
         read_only_fields = ['status', 'created_at', 'created_by', 'current_highest_bid', 'bid_count', 'image_files']
 
@@ -185,12 +213,24 @@ class AuctionSerializer(serializers.ModelSerializer):
     def get_images(self, obj):
         """Return auction image URLs for frontend compatibility."""
         request = self.context.get('request')
+        # Served from the prefetch cache, ordered by AuctionImage.Meta.ordering.
+        image_objs = [image_obj for image_obj in obj.images.all() if image_obj.image]
+        legacy_urls = obj.image_urls or []
+
+        # One manifest lookup covers every file this auction may point at.
+        media_paths = [image_obj.image.name for image_obj in image_objs]
+        if request:
+            for url in legacy_urls:
+                if isinstance(url, str):
+                    path = media_path_from_url(normalize_media_path(urlparse(url).path))
+                    if path:
+                        media_paths.append(path)
+        media = media_manifest.get_many(media_paths) if media_paths else {}
 
         def media_file_exists_from_path(path):
-            if not isinstance(path, str) or not path.startswith('/media/'):
-                return False
-            relative_path = path[len('/media/'):]
-            return default_storage.exists(relative_path)
+            relative_path = media_path_from_url(path)
+            entry = media.get(relative_path) if relative_path is not None else None
+            return bool(entry and entry['exists'])
 
         def normalize_legacy_url(url):
             """Normalize legacy URLs so host/protocol mismatches do not break images."""
@@ -200,18 +240,16 @@ class AuctionSerializer(serializers.ModelSerializer):
             if not request:
                 return url
 
-            def normalize_media_path(path):
-                if path.startswith('/media/'):
-                    return path
-                if path.startswith('/auction_images/'):
-                    return f"/media{path}"
-                return path
-
             if url.startswith('/'):
-                normalized_path = normalize_media_path(url)
+                # Look the file up without the query string, as the batch did.
+                parsed = urlparse(url)
+                normalized_path = normalize_media_path(parsed.path)
                 if normalized_path.startswith('/media/') and not media_file_exists_from_path(normalized_path):
                     return None
-                return _build_absolute_media_url(request, normalized_path)
+                normalized = _build_absolute_media_url(request, normalized_path)
+                if parsed.query:
+                    normalized = f"{normalized}?{parsed.query}"
+                return normalized
 
             # If an absolute URL points to a stale host (e.g. localhost/old render
             # host) but still references /media/, rebuild with current API host.
@@ -229,17 +267,16 @@ class AuctionSerializer(serializers.ModelSerializer):
             return url
 
         uploaded_images = []
-        for image_obj in obj.images.all().order_by('order', 'created_at'):
-            if image_obj.image and default_storage.exists(image_obj.image.name):
-                image_url = image_obj.image.url
+        for image_obj in image_objs:
+            entry = media[image_obj.image.name]
+            if entry['exists']:
                 uploaded_images.append(
-                    _build_absolute_media_url(request, image_url)
+                    _build_absolute_media_url(request, entry['url'])
                 )
 
         if uploaded_images:
             return uploaded_images
 
-        legacy_urls = obj.image_urls or []
         if not request:
             return legacy_urls
 
@@ -0,0 +1,197 @@
+"""
+Batch settlement of ended auctions.
+
+Every bid deducts its full amount when it is placed, so once an auction
+closes the outbid bidders are owed their coins back and the winner keeps
+paying only for the winning bid. settle_auctions computes each bidder's net
+position with one aggregate query and applies all refunds with bulk
+statements (``UPDATE ... FROM (VALUES ...)`` on PostgreSQL and SQLite, a
+CASE update elsewhere): closing an auction with 10k bidders costs a handful
+of queries, not one transaction per bidder.
+
+Refunded bids are flagged ``coins_deducted=False`` and the auction gets
+``settled_at``, so settling twice never refunds twice.
+"""
+
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Auction, CoinTransaction, UserProfile
+from .auction_models import AuctionBid, AuctionWinner
+from .balances import publish_balances
+
+SETTLEABLE_STATUSES = ['ended', 'cancelled']
+
+# Rows per UPDATE statement: VALUES lists where supported, CASE arms elsewhere.
+VALUES_BATCH_SIZE = 5000
+CASE_BATCH_SIZE = 500
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _can_update_from_values():
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def credit_balances(credits):
+    """
+    Add ``credits`` ({user_id: coins}) to the users' balances.
+
+    Returns ``{user_id: new_balance}`` for the profiles that were updated.
+    """
+    items = sorted(credits.items())
+    balances = {}
+    if _can_update_from_values():
+        # VALUES columns are column1/column2 on both PostgreSQL and SQLite.
+        opts = UserProfile._meta
+        table = connection.ops.quote_name(opts.db_table)
+        balance = connection.ops.quote_name(opts.get_field('coin_balance').column)
+        user = connection.ops.quote_name(opts.get_field('user').column)
+        for chunk in _chunks(items, VALUES_BATCH_SIZE):
+            values = ', '.join(['(%s, %s)'] * len(chunk))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET {balance} = {table}.{balance} + v.column2 '
+                    f'FROM (VALUES {values}) AS v '
+                    f'WHERE {table}.{user} = v.column1 '
+                    f'RETURNING {user}, {balance}',
+                    [value for pair in chunk for value in pair],
+                )
+                balances.update(cursor.fetchall())
+        return balances
+
+    for chunk in _chunks(items, CASE_BATCH_SIZE):
+        user_ids = [user_id for user_id, _ in chunk]
+        UserProfile.objects.filter(user_id__in=user_ids).update(
+            coin_balance=F('coin_balance') + Case(
+                *[When(user_id=user_id, then=Value(credit)) for user_id, credit in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        balances.update(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'coin_balance'))
+    return balances
+
+
+def settle_auctions(auction_ids=None, dry_run=False):
+    """
+    Refund outbid bidders and record winner payments for closed auctions.
+
+    Settles every unsettled ended or cancelled auction, or only those in
+    ``auction_ids``. With ``dry_run`` nothing is written. Returns a report
+    dict with counts and per-phase timings in milliseconds.
+    """
+    timings = {}
+    started = clock = time.perf_counter()
+
+    def lap(phase):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[phase] = (now - clock) * 1000
+        clock = now
+
+    with transaction.atomic():
+        auctions = Auction.objects.select_for_update().filter(
+            status__in=SETTLEABLE_STATUSES,
+            settled_at__isnull=True,
+        )
+        if auction_ids is not None:
+            auctions = auctions.filter(id__in=auction_ids)
+        ids = list(auctions.values_list('id', flat=True))
+
+        winners = {}
+        unpaid = []
+        for winner in AuctionWinner.objects.filter(auction_id__in=ids):
+            winners[winner.auction_id] = (winner.winner_id, winner.winning_amount)
+            if not winner.coins_transferred:
+                unpaid.append(winner)
+        positions = (
+            AuctionBid.objects.filter(auction_id__in=ids, coins_deducted=True)
+            .values('auction_id', 'user_id')
+            .annotate(deducted=Sum('amount'))
+            .order_by()
+        )
+        refunds = []
+        for row in positions:
+            winner_id, winning_amount = winners.get(row['auction_id'], (None, 0))
+            owed = winning_amount if row['user_id'] == winner_id else 0
+            if row['deducted'] > owed:
+                refunds.append((row['auction_id'], row['user_id'], row['deducted'] - owed))
+        lap('compute')
+
+        credits = Counter()
+        for _, user_id, amount in refunds:
+            credits[user_id] += amount
+
+        report = {
+            'auctions': len(ids),
+            'refunds': len(refunds),
+            'refunded_coins': sum(credits.values()),
+            'users_credited': len(credits),
+            'payments': len(unpaid),
+            'dry_run': dry_run,
+            'timings_ms': timings,
+        }
+        if dry_run or not ids:
+            timings['total'] = (time.perf_counter() - started) * 1000
+            return report
+
+        titles = dict(Auction.objects.filter(id__in=ids).values_list('id', 'title'))
+        CoinTransaction.objects.bulk_create([
+            CoinTransaction(
+                user_id=user_id,
+                amount=amount,
+                transaction_type='auction_refund',
+                reference_id=str(auction_id),
+                description=f"Refund for outbid bids on auction: {titles[auction_id]}",
+            )
+            for auction_id, user_id, amount in refunds
+        ], batch_size=1000)
+        lap('ledger')
+
+        balances = credit_balances(credits)
+        lap('balances')
+
+        # The winning bid stays deducted; every other deducted bid was refunded.
+        winning_bid = AuctionWinner.objects.filter(
+            auction_id=OuterRef('auction_id'),
+            winner_id=OuterRef('user_id'),
+        )
+        AuctionBid.objects.filter(auction_id__in=ids, coins_deducted=True).exclude(
+            Q(status='accepted') & Exists(winning_bid)
+        ).update(coins_deducted=False, coins_reserved=False)
+
+        now = timezone.now()
+        CoinTransaction.objects.bulk_create([
+            CoinTransaction(
+                user_id=winner.winner_id,
+                amount=-winner.winning_amount,
+                transaction_type='auction_payment',
+                reference_id=str(winner.auction_id),
+                description=f"Payment for winning auction: {titles[winner.auction_id]}",
+            )
+            for winner in unpaid
+        ])
+        AuctionWinner.objects.filter(id__in=[winner.id for winner in unpaid]).update(
+            coins_transferred=True,
+            transfer_completed_at=now,
+        )
+        Auction.objects.filter(id__in=ids).update(settled_at=now)
+        lap('mark_settled')
+
+        publish_balances({
+            user_id: (balance, credits[user_id])
+            for user_id, balance in balances.items()
+        })
+
+    timings['total'] = (time.perf_counter() - started) * 1000
+    return report
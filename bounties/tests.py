@@ -1,3 +1,1670 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from .models import (
+    Auction, AuctionImage, Bounty, BountyClaim, CoinTransaction, SchedulerLease, UserProfile, original_image_name,
+)
+from .auction_models import AuctionBid, AuctionEvent, AuctionWinner
+from .admin import AuctionAdmin
+from .auction_views import check_auction_timers
+from .auth_views import generate_jwt_token
+from .balances import get_balance
+from .authentication import user_cache, verify_jwt_token
+from .bid_sequencer import BidSequencer, _AuctionLane, _BidJob
+from .bidding import HIGH_WATER_MARK_KEY, anti_snipe_deadline, auction_publisher, place_bid
+from .events import rebuild_snapshot, record_event, replay
+from .leaderboard import leaderboard_diff, leaderboards, merge_leaderboard_diffs
+from . import image_variants
+from .image_variants import generate_variants, variant_pool
+from .media_manifest import media_manifest
+from .views import serve_auction_image
+from .lifecycle import (
+    SCHEDULER_LEASE_NAME, AuctionScheduler, acquire_lease, end_auction, notify_schedule_changed, start_auction,
+)
+from .settlement import settle_auctions
+from .routing import websocket_urlpatterns
+from .serializers import AuctionSerializer
+from .ws_auth import get_user_from_token
+
+
+def _create_auction(title='Test auction', minimum_bid=10):
+    admin = User.objects.create(username=f'admin-{title}')
+    now = timezone.now()
+    return Auction.objects.create(
+        title=title,
+        description='Test auction',
+        minimum_bid=minimum_bid,
+        starts_at=now - timedelta(minutes=5),
+        ends_at=now + timedelta(hours=1),
+        status='active',
+        created_by=admin,
+    )
+
+
+def _create_bidders(prefix, count, balance=100000):
+    users = []
+    for index in range(count):
+        user = User.objects.create(username=f'{prefix}-{index}')
+        UserProfile.objects.create(user=user, coin_balance=balance)
+        users.append(user)
+    return users
+
+
+def _as_user(application, user):
+    async def app(scope, receive, send):
+        return await application(dict(scope, user=user), receive, send)
+    return app
+
+
+def _accepted_history(auction):
+    return list(
+        AuctionBid.objects.filter(auction=auction)
+        .order_by('id')
+        .values_list('user__username', 'amount')
+    )
+
+
+class BidPrecheckTests(TestCase):
+    # A bidding war where most bids arrive after they have been outbid.
+    BIDS = [
+        (0, 50), (1, 40), (2, 60), (0, 55), (1, 61), (2, 61),
+        (0, 30), (3, 100), (1, 99), (2, 100), (0, 101), (3, 90),
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def _replay(self, label):
+        auction = _create_auction(title=label)
+        users = _create_bidders(label, 4)
+        responses = []
+        for user_index, amount in self.BIDS:
+            with self.captureOnCommitCallbacks(execute=True):
+                payload, status_code = place_bid(users[user_index], auction.id, amount)
+            responses.append((status_code, payload.get('error')))
+        auction.refresh_from_db()
+        history = [(username.split('-')[-1], amount) for username, amount in _accepted_history(auction)]
+        return responses, history, auction
+
+    def test_accepted_bid_ordering_is_unchanged(self):
+        with override_settings(BID_PRECHECK_ENABLED=False):
+            locked_responses, locked_history, locked_auction = self._replay('locked')
+        with override_settings(BID_PRECHECK_ENABLED=True):
+            precheck_responses, precheck_history, precheck_auction = self._replay('precheck')
+
+        self.assertEqual(precheck_responses, locked_responses)
+        self.assertEqual(precheck_history, locked_history)
+        self.assertEqual(precheck_auction.current_highest_bid, locked_auction.current_highest_bid)
+        self.assertEqual(precheck_auction.total_bids, locked_auction.total_bids)
+
+    @override_settings(BID_PRECHECK_ENABLED=True)
+    def test_stale_mark_keeps_accepted_ordering(self):
+        # Each bid sees the mark as it was two bids earlier, as a reader
+        # racing the commits of other bidders would.
+        with override_settings(BID_PRECHECK_ENABLED=False):
+            locked_responses, locked_history, _ = self._replay('in-order')
+
+        auction = _create_auction(title='lagging')
+        users = _create_bidders('lagging', 4)
+        key = HIGH_WATER_MARK_KEY.format(auction.id)
+        marks = [None, None]
+        responses = []
+        for user_index, amount in self.BIDS:
+            if marks[-2]:
+                cache.set(key, marks[-2])
+            else:
+                cache.delete(key)
+            with self.captureOnCommitCallbacks(execute=True):
+                payload, status_code = place_bid(users[user_index], auction.id, amount)
+            responses.append((status_code, payload.get('error')))
+            marks.append(cache.get(key))
+
+        history = [(username.split('-')[-1], amount) for username, amount in _accepted_history(auction)]
+        # A stale mark may quote an older minimum, but never decides differently.
+        self.assertEqual([code for code, _ in responses], [code for code, _ in locked_responses])
+        self.assertEqual(history, locked_history)
+
+    @override_settings(BID_PRECHECK_ENABLED=True)
+    def test_admin_minimum_bid_change_clears_the_mark(self):
+        auction = _create_auction(title='reprice', minimum_bid=100)
+        bidder, = _create_bidders('reprice', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(bidder, auction.id, 50)
+        self.assertEqual(status_code, 400)
+        self.assertIsNotNone(cache.get(HIGH_WATER_MARK_KEY.format(auction.id)))
+
+        auction.minimum_bid = 10
+        request = RequestFactory().post('/admin/')
+        with self.captureOnCommitCallbacks(execute=True):
+            AuctionAdmin(Auction, admin.site).save_model(
+                request, auction, mock.Mock(changed_data=['minimum_bid']), change=True
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(bidder, auction.id, 50)
+        self.assertEqual(status_code, 201)
+
+    @override_settings(BID_PRECHECK_ENABLED=True)
+    def test_stale_bid_is_rejected_without_queries(self):
+        auction = _create_auction(title='stale')
+        first, second = _create_bidders('stale', 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(first, auction.id, 50)
+        self.assertEqual(status_code, 201)
+
+        with self.assertNumQueries(0):
+            payload, status_code = place_bid(second, auction.id, 50)
+
+        self.assertEqual(status_code, 400)
+        self.assertEqual(payload, {'error': 'Bid must be at least 51.00 coins'})
+
+    @override_settings(BID_PRECHECK_ENABLED=True)
+    def test_cancelled_high_bid_clears_the_mark(self):
+        auction = _create_auction(title='cancel')
+        first, second = _create_bidders('cancel', 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(first, auction.id, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(second, auction.id, 80)
+        with self.captureOnCommitCallbacks(execute=True):
+            AuctionBid.objects.get(auction=auction, user=second, status='accepted').cancel_bid()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(first, auction.id, 30)
+        self.assertEqual(status_code, 201)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(BID_PRECHECK_ENABLED=True)
+class ConcurrentBidPrecheckTests(TransactionTestCase):
+    BIDDERS = 40
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_bids_keep_accepted_ordering(self):
+        auction = _create_auction(title='concurrent')
+        users = _create_bidders('concurrent', self.BIDDERS)
+        amounts = random.Random(7).sample(range(10, 10000), self.BIDDERS)
+        results = {}
+        barrier = threading.Barrier(self.BIDDERS)
+
+        def bid(user, amount):
+            try:
+                barrier.wait()
+                results[user.username] = place_bid(user, auction.id, amount)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=bid, args=pair) for pair in zip(users, amounts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statuses = [status_code for _, status_code in results.values()]
+        self.assertEqual(set(statuses) - {201, 400}, set())
+
+        accepted = [amount for _, amount in _accepted_history(auction)]
+        self.assertEqual(accepted, sorted(accepted))
+        self.assertEqual(len(accepted), len(set(accepted)))
+
+        # The highest bid can never be rejected as stale, so it must have won.
+        auction.refresh_from_db()
+        self.assertEqual(auction.current_highest_bid, max(amounts))
+        self.assertEqual(auction.total_bids, len(accepted))
+
+
+class SequencedBidTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _process(self, lane, *bids):
+        jobs = [_BidJob(user, Decimal(amount)) for user, amount in bids]
+        lane._process(jobs)
+        return [job.future.result(timeout=0) for job in jobs]
+
+    def test_batch_locks_profiles_before_the_auction(self):
+        auction = _create_auction(title='sequenced')
+        first, second = _create_bidders('sequenced', 2, balance=100)
+        lane = _AuctionLane(BidSequencer(), auction.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            results = self._process(lane, (second, 30), (first, 60), (second, 90))
+
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertIn('"bounties_userprofile"', selects[0])
+        self.assertIn('"bounties_auctions"', selects[1])
+        self.assertEqual(sum('"bounties_userprofile"' in sql for sql in selects), 1)
+        # Both of the second bidder's bids see the balance left by the first.
+        self.assertEqual([code for _, code in results], [201, 201, 400])
+        self.assertEqual(results[2][0], {'error': 'Insufficient coins'})
+
+    def test_cached_window_does_not_reject_bids(self):
+        auction = _create_auction(title='reopened')
+        bidder, = _create_bidders('reopened', 1)
+        lane = _AuctionLane(BidSequencer(), auction.id)
+        lane._load_state(auction)
+        # The cached copy still shows the old end; the deadline has moved since.
+        lane.state['ends_at'] = timezone.now() - timedelta(seconds=1)
+
+        (payload, status_code), = self._process(lane, (bidder, 20))
+        self.assertEqual(status_code, 201, payload)
+        # A bid under the cached high is still turned away without the lock.
+        lane._load_state(Auction.objects.get(id=auction.id))
+        with self.assertNumQueries(0):
+            (payload, status_code), = self._process(lane, (bidder, 15))
+        self.assertEqual(payload, {'error': 'Bid must be at least 21.00 coins'})
+
+
+class AuctionSocketBidTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    async def _exchange(self, user, auction_id, messages):
+        communicator = WebsocketCommunicator(
+            _as_user(URLRouter(websocket_urlpatterns), user),
+            f'ws/auction/{auction_id}/',
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # auction_connected
+        await communicator.receive_json_from()  # clock_sync
+
+        replies = []
+        for message in messages:
+            await communicator.send_json_to(message)
+            reply = await communicator.receive_json_from(timeout=5)
+            # Skip our own bid being fanned out to the auction group.
+            while reply['type'] == 'new_bid':
+                reply = await communicator.receive_json_from(timeout=5)
+            replies.append(reply)
+        await communicator.disconnect()
+        return replies
+
+    def test_socket_bid_uses_bid_engine(self):
+        auction = _create_auction(title='socket')
+        bidder, = _create_bidders('socket', 1, balance=500)
+
+        accepted, rejected, status_reply = async_to_sync(self._exchange)(bidder, auction.id, [
+            {'action': 'place_bid', 'amount': 120, 'request_id': 'a'},
+            {'action': 'place_bid', 'amount': 100, 'request_id': 'b'},
+            {'action': 'get_status'},
+        ])
+
+        self.assertEqual(accepted['type'], 'bid_placed')
+        self.assertEqual(accepted['request_id'], 'a')
+        self.assertEqual(accepted['current_highest_bid'], 120)
+        self.assertEqual(accepted['remaining_coins'], 380)
+
+        self.assertEqual(rejected['type'], 'bid_error')
+        self.assertEqual(rejected['status_code'], 400)
+        self.assertEqual(rejected['message'], 'Bid must be at least 121.00 coins')
+
+        self.assertEqual(status_reply['type'], 'auction_status')
+        self.assertEqual(status_reply['highest_bidder'], bidder.username)
+        self.assertEqual(status_reply['bid_count'], 1)
+
+        auction.refresh_from_db()
+        self.assertEqual(auction.current_highest_bid, 120)
+        self.assertEqual(UserProfile.objects.get(user=bidder).coin_balance, 380)
+
+
+class SocketTokenAuthTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def test_token_resolves_from_cache_after_first_lookup(self):
+        user, = _create_bidders('token', 1)
+        token = generate_jwt_token(user)
+
+        with self.assertNumQueries(1):
+            resolved = async_to_sync(get_user_from_token)(token)
+        self.assertEqual(resolved.id, user.id)
+
+        with self.assertNumQueries(0):
+            cached = async_to_sync(get_user_from_token)(token)
+        self.assertEqual(cached.id, user.id)
+        self.assertEqual(cached.username, user.username)
+        self.assertTrue(cached.is_authenticated)
+
+    def test_concurrent_misses_share_one_query(self):
+        tokens = [generate_jwt_token(user) for user in _create_bidders('storm', 5)]
+
+        async def resolve_all():
+            return await asyncio.gather(*(get_user_from_token(token) for token in tokens))
+
+        with self.assertNumQueries(1):
+            users = async_to_sync(resolve_all)()
+        self.assertEqual([user.username for user in users], [f'storm-{i}' for i in range(5)])
+
+    def test_invalid_token_is_anonymous(self):
+        resolved = async_to_sync(get_user_from_token)('not-a-token')
+        self.assertFalse(resolved.is_authenticated)
+
+
+class UserSnapshotCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def test_repeat_requests_skip_user_query(self):
+        user, = _create_bidders('poll', 1)
+        token = generate_jwt_token(user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+        with self.assertNumQueries(1):
+            self.assertEqual(verify_jwt_token(token).id, user.id)
+
+        # Only the profile read remains once the user is cached.
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bounties/balance/')
+        self.assertEqual(response.status_code, 200)
+
+        metrics = user_cache.metrics()
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['local_hits'], 1)
+        self.assertEqual(metrics['hit_ratio'], 0.5)
+
+    def test_flag_change_invalidates_snapshot(self):
+        user, = _create_bidders('flags', 1)
+        token = generate_jwt_token(user)
+        self.assertFalse(verify_jwt_token(token).is_superuser)
+
+        user.is_superuser = True
+        user.save(update_fields=['is_superuser'])
+        self.assertTrue(verify_jwt_token(token).is_superuser)
+
+        user.is_active = False
+        user.save()
+        self.assertFalse(verify_jwt_token(token).is_active)
+
+    def test_unrelated_save_keeps_snapshot(self):
+        user, = _create_bidders('login', 1)
+        token = generate_jwt_token(user)
+        verify_jwt_token(token)
+
+        user.save(update_fields=['password'])
+        with self.assertNumQueries(0):
+            verify_jwt_token(token)
+
+
+class BalanceCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user, = _create_bidders('balance', 1, balance=500)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(self.user)}'
+        verify_jwt_token(generate_jwt_token(self.user))  # warm the auth cache
+
+    def test_ledger_writes_go_through_to_cache(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.add_coins(250, 'admin_adjustment', 0, 'Top up')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/bounties/balance/')
+        self.assertEqual(response.json()['balance'], 750)
+
+        auction = _create_auction(title='balance')
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(self.user, auction.id, 100)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/bounties/balance/')
+        self.assertEqual(response.json()['balance'], 650)
+
+        bid = AuctionBid.objects.get(auction=auction, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            bid.cancel_bid()
+        self.assertEqual(self.client.get('/api/bounties/balance/').json()['balance'], 750)
+
+    def test_late_callback_does_not_overwrite_newer_balance(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks() as first:
+            profile.add_coins(100, 'admin_adjustment', 0, 'First')
+        with self.captureOnCommitCallbacks() as second:
+            profile.add_coins(-300, 'admin_adjustment', 0, 'Second')
+
+        # The second transaction's callback happens to run first.
+        for callback in second + first:
+            callback()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_balance(self.user), 300)
+
+    def test_unchanged_balance_is_not_modified(self):
+        response = self.client.get('/api/bounties/balance/')
+        self.assertEqual(response.json()['balance'], 500)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/bounties/balance/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        profile = UserProfile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.add_coins(-50, 'admin_adjustment', 0, 'Deduct')
+
+        response = self.client.get('/api/bounties/balance/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['balance'], 450)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class BalanceSocketTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    async def _burst(self, user, amounts):
+        communicator = WebsocketCommunicator(_as_user(URLRouter(websocket_urlpatterns), user), 'ws/balance/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        snapshot = await communicator.receive_json_from()
+
+        profile = await database_sync_to_async(UserProfile.objects.get)(user=user)
+        for amount in amounts:
+            await database_sync_to_async(profile.add_coins)(amount, 'admin_adjustment', 0, 'Burst')
+
+        update = await communicator.receive_json_from(timeout=5)
+        quiet = await communicator.receive_nothing(timeout=0.5)
+        await communicator.disconnect()
+        return snapshot, update, quiet
+
+    def test_burst_of_ledger_writes_sends_one_update(self):
+        user, = _create_bidders('push', 1, balance=100)
+
+        snapshot, update, quiet = async_to_sync(self._burst)(user, [10, 20, -5])
+
+        self.assertEqual(snapshot, {'type': 'balance_snapshot', 'balance': 100})
+        self.assertEqual(update, {'type': 'balance_update', 'balance': 125, 'delta': 25})
+        self.assertTrue(quiet)
+
+
+class BountyClaimsCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def _create_bounty(self, title, max_claims=3):
+        return Bounty.objects.create(title=title, description='Test bounty', reward=10, max_claims=max_claims)
+
+    def test_claims_maintain_counter_and_status(self):
+        bounty = self._create_bounty('counted', max_claims=2)
+        for user in _create_bidders('claimer', 2):
+            self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(user)}'
+            response = self.client.post(f'/bounties/{bounty.id}/claim/')
+            self.assertEqual(response.status_code, 201)
+
+        bounty.refresh_from_db()
+        self.assertEqual(bounty.claims_count, 2)
+        self.assertEqual(bounty.claims_left, 0)
+        self.assertEqual(bounty.status, 'full')
+
+        bounty.claims.first().delete()
+        bounty.refresh_from_db()
+        self.assertEqual(bounty.claims_count, 1)
+
+    def test_list_page_queries_do_not_grow_with_bounties(self):
+        user, = _create_bidders('lister', 1)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(user)}'
+        for index in range(5):
+            self._create_bounty(f'listed-{index}')
+        self.client.get('/bounties/')  # warm the auth cache
+
+        with self.assertNumQueries(2):  # page count + page rows
+            response = self.client.get('/bounties/')
+        self.assertEqual(response.json()['count'], 5)
+
+    def test_consistency_checker_reports_and_fixes_drift(self):
+        bounty = self._create_bounty('drifted')
+        user, = _create_bidders('drift', 1)
+        BountyClaim.objects.create(bounty=bounty, user=user)  # bypasses the counter
+
+        with self.assertRaises(CommandError):
+            call_command('check_claims_count', stdout=StringIO())
+
+        call_command('check_claims_count', '--fix', stdout=StringIO())
+        bounty.refresh_from_db()
+        self.assertEqual(bounty.claims_count, 1)
+        call_command('check_claims_count', stdout=StringIO())
+
+
+class BountyClaimReservationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+    def test_claim_is_one_conditional_update_and_insert(self):
+        bounty = Bounty.objects.create(title='slots', description='Test bounty', reward=10, max_claims=1)
+        first, second = _create_bidders('slot', 2)
+
+        # UPDATE + INSERT, plus the savepoint pair from the test transaction.
+        with self.assertNumQueries(4):
+            Bounty.reserve_claim(bounty.id, first)
+        bounty.refresh_from_db()
+        self.assertEqual((bounty.claims_count, bounty.status), (1, 'full'))
+
+        with self.assertRaisesMessage(ValueError, 'You have already claimed this bounty'):
+            Bounty.reserve_claim(bounty.id, first)
+        with self.assertRaisesMessage(ValueError, 'Bounty is not available for claiming'):
+            Bounty.reserve_claim(bounty.id, second)
+        with self.assertRaises(Bounty.DoesNotExist):
+            Bounty.reserve_claim(bounty.id + 1000, second)
+
+    def test_expired_bounty_cannot_be_claimed(self):
+        bounty = Bounty.objects.create(
+            title='expired', description='Test bounty', reward=10, max_claims=5,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        user, = _create_bidders('late', 1)
+        with self.assertRaisesMessage(ValueError, 'Bounty is not available for claiming'):
+            Bounty.reserve_claim(bounty.id, user)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentBountyClaimTests(TransactionTestCase):
+    CLAIMERS = 500
+    MAX_CLAIMS = 50
+    # Claims are fired together through a bounded pool so the run stays
+    # under the database's connection limit.
+    CONNECTIONS = 40
+
+    def test_simultaneous_claims_never_exceed_max_claims(self):
+        bounty = Bounty.objects.create(
+            title='drop', description='Popular bounty', reward=10, max_claims=self.MAX_CLAIMS,
+        )
+        users = _create_bidders('rush', self.CLAIMERS)
+
+        def claim(user):
+            try:
+                Bounty.reserve_claim(bounty.id, user)
+                return True
+            except ValueError:
+                return False
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=self.CONNECTIONS) as pool:
+            outcomes = list(pool.map(claim, users))
+
+        bounty.refresh_from_db()
+        self.assertEqual(outcomes.count(True), self.MAX_CLAIMS)
+        self.assertEqual(bounty.claims_count, self.MAX_CLAIMS)
+        self.assertEqual(BountyClaim.objects.filter(bounty=bounty).count(), self.MAX_CLAIMS)
+        self.assertEqual(bounty.status, 'full')
+
+
+class AuctionLifecycleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _bid(self, user, auction, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            return place_bid(user, auction.id, amount)
+
+    def test_scheduler_fires_due_transitions_only(self):
+        now = timezone.now()
+        due = _create_auction(title='due')
+        running = _create_auction(title='running')
+        upcoming = _create_auction(title='upcoming')
+        bidder, = _create_bidders('due', 1)
+        self._bid(bidder, due, 40)
+        Auction.objects.filter(id=due.id).update(ends_at=now - timedelta(seconds=1))
+        Auction.objects.filter(id=upcoming.id).update(status='upcoming', starts_at=now - timedelta(seconds=1))
+
+        scheduler = AuctionScheduler()
+        scheduler.load_all()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scheduler.fire_due(), 2)
+
+        due.refresh_from_db()
+        running.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertEqual(due.status, 'ended')
+        self.assertEqual(AuctionWinner.objects.get(auction=due).winner, bidder)
+        self.assertEqual(running.status, 'active')
+        self.assertEqual(upcoming.status, 'active')
+        # The started auction's end is now queued.
+        self.assertEqual(scheduler._deadlines[upcoming.id], (upcoming.ends_at, 'end'))
+
+    def test_moved_deadline_is_not_cut_short(self):
+        auction = _create_auction(title='extended')
+        Auction.objects.filter(id=auction.id).update(ends_at=timezone.now() - timedelta(seconds=1))
+        scheduler = AuctionScheduler()
+        scheduler.load_all()
+
+        new_end = timezone.now() + timedelta(minutes=3)
+        Auction.objects.filter(id=auction.id).update(ends_at=new_end)
+        scheduler.fire_due()
+
+        auction.refresh_from_db()
+        self.assertEqual(auction.status, 'active')
+        self.assertEqual(scheduler._deadlines[auction.id], (new_end, 'end'))
+
+    def test_failed_transition_is_retried_later(self):
+        auction = _create_auction(title='flaky')
+        Auction.objects.filter(id=auction.id).update(ends_at=timezone.now() - timedelta(seconds=1))
+        scheduler = AuctionScheduler()
+        scheduler.load_all()
+
+        now = timezone.now()
+        with mock.patch('bounties.lifecycle.end_auction', side_effect=RuntimeError('database went away')), \
+                self.assertLogs('bounties.lifecycle', 'ERROR'):
+            self.assertEqual(scheduler.fire_due(now), 0)
+        retry_at, kind = scheduler._deadlines[auction.id]
+        self.assertEqual(kind, 'end')
+        self.assertGreater(retry_at, now)
+        # A resync keeps the backoff instead of queueing the past deadline again.
+        scheduler.load_one(auction.id)
+        self.assertEqual(scheduler._deadlines[auction.id], (retry_at, 'end'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scheduler.fire_due(retry_at), 1)
+        auction.refresh_from_db()
+        self.assertEqual(auction.status, 'ended')
+
+    def test_late_bid_leaves_ending_to_the_scheduler(self):
+        auction = _create_auction(title='late')
+        first, second = _create_bidders('late', 2)
+        self._bid(first, auction, 25)
+        Auction.objects.filter(id=auction.id).update(ends_at=timezone.now() - timedelta(seconds=1))
+
+        payload, status_code = self._bid(second, auction, 50)
+        self.assertEqual((status_code, payload), (400, {'error': 'Auction has ended'}))
+        auction.refresh_from_db()
+        self.assertEqual(auction.status, 'active')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(check_auction_timers(), 1)
+        self.assertEqual(AuctionWinner.objects.get(auction=auction).winner, first)
+
+    def test_admin_status_changes_go_through_the_lifecycle(self):
+        admin = User.objects.create(username='status-admin', is_superuser=True)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(admin)}'
+        auction = _create_auction(title='admin-ended')
+        bidder, = _create_bidders('admin-ended', 1)
+        self._bid(bidder, auction, 30)
+        upcoming = _create_auction(title='admin-started')
+        Auction.objects.filter(id=upcoming.id).update(
+            status='upcoming', starts_at=timezone.now() + timedelta(hours=1), ends_at=timezone.now() + timedelta(hours=2)
+        )
+
+        def patch(auction_id, new_status):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.patch(
+                    f'/api/auctions/{auction_id}/status/', {'status': new_status}, content_type='application/json'
+                )
+
+        self.assertEqual(patch(auction.id, 'ended').status_code, 200)
+        self.assertEqual(AuctionWinner.objects.get(auction=auction).winner, bidder)
+        self.assertEqual(patch(auction.id, 'ended').status_code, 400)
+        self.assertEqual(patch(auction.id, 'active').status_code, 400)
+        self.assertEqual(patch(upcoming.id, 'upcoming').status_code, 400)
+
+        self.assertEqual(patch(upcoming.id, 'active').status_code, 200)
+        upcoming.refresh_from_db()
+        self.assertEqual(upcoming.status, 'active')
+        self.assertLessEqual(upcoming.starts_at, timezone.now())
+        self.assertEqual(patch(12345, 'active').status_code, 404)
+
+        cancelled = _create_auction(title='admin-cancelled')
+        losers = _create_bidders('admin-cancelled', 2, balance=100)
+        self._bid(losers[0], cancelled, 20)
+        self._bid(losers[1], cancelled, 30)
+        self.assertEqual(patch(cancelled.id, 'cancelled').status_code, 200)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+        self.assertIsNotNone(cancelled.settled_at)
+        self.assertFalse(AuctionWinner.objects.filter(auction=cancelled).exists())
+        self.assertEqual([profile.coin_balance for profile in UserProfile.objects.filter(user__in=losers)], [100, 100])
+        self.assertEqual(replay(cancelled).status, 'cancelled')
+        self.assertEqual(patch(cancelled.id, 'cancelled').status_code, 400)
+
+    def test_lease_has_a_single_holder(self):
+        self.assertTrue(acquire_lease('job', 'a', 15))
+        self.assertFalse(acquire_lease('job', 'b', 15))
+        self.assertTrue(acquire_lease('job', 'a', 15))
+
+        SchedulerLease.objects.filter(name='job').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(acquire_lease('job', 'b', 15))
+        self.assertFalse(acquire_lease('job', 'a', 15))
+
+
+class AuctionSchedulerRunTests(TransactionTestCase):
+    def test_scheduler_wakes_for_a_newly_scheduled_deadline(self):
+        def create_ending_auction():
+            auction = _create_auction(title='wake')
+            Auction.objects.filter(id=auction.id).update(ends_at=timezone.now() + timedelta(milliseconds=300))
+            notify_schedule_changed(auction.id)
+            return auction.id
+
+        def status_of(auction_id):
+            return Auction.objects.get(id=auction_id).status
+
+        async def scenario():
+            scheduler = AuctionScheduler(lease_seconds=15, resync_seconds=3600)
+            task = asyncio.create_task(scheduler.run())
+            try:
+                while not scheduler.is_leader:
+                    await asyncio.sleep(0.01)
+                auction_id = await database_sync_to_async(create_ending_auction)()
+                for _ in range(100):
+                    if await database_sync_to_async(status_of)(auction_id) == 'ended':
+                        break
+                    await asyncio.sleep(0.02)
+                return await database_sync_to_async(status_of)(auction_id)
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+        self.assertEqual(async_to_sync(scenario)(), 'ended')
+
+
+    def test_standby_waits_for_the_lease_renewal(self):
+        acquire_lease(SCHEDULER_LEASE_NAME, 'other-replica', 60)
+        real_wait_for = asyncio.wait_for
+        timeouts = []
+
+        async def recording_wait_for(awaitable, timeout):
+            timeouts.append(timeout)
+            return await real_wait_for(awaitable, timeout)
+
+        async def scenario():
+            scheduler = AuctionScheduler(lease_seconds=3, resync_seconds=3600)
+            task = asyncio.create_task(scheduler.run())
+            try:
+                await asyncio.sleep(0.3)
+                return scheduler.is_leader
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+        with mock.patch('bounties.lifecycle.asyncio.wait_for', recording_wait_for):
+            is_leader = async_to_sync(scenario)()
+        self.assertFalse(is_leader)
+        # One wait, until the next lease attempt a third of the lease away.
+        self.assertEqual(len(timeouts), 1)
+        self.assertAlmostEqual(timeouts[0], 1.0, delta=0.2)
+
+
+class AuctionSettlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _closed_auction(self, label, bids, bidders=3):
+        auction = _create_auction(title=label)
+        users = _create_bidders(label, bidders, balance=1000)
+        for user_index, amount in bids:
+            with self.captureOnCommitCallbacks(execute=True):
+                _, status_code = place_bid(users[user_index], auction.id, amount)
+            self.assertEqual(status_code, 201)
+        # Commit callbacks are not run, so the automatic settlement is left
+        # to the tests below.
+        with self.captureOnCommitCallbacks():
+            end_auction(auction.id, force=True)
+        return auction, users
+
+    def _balances(self, users):
+        return [UserProfile.objects.get(user=user).coin_balance for user in users]
+
+    def test_outbid_bidders_are_refunded_once(self):
+        auction, users = self._closed_auction('refund', [(0, 20), (1, 30), (0, 40), (2, 50)])
+        self.assertEqual(self._balances(users), [940, 970, 950])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = settle_auctions()
+
+        self.assertEqual((report['auctions'], report['refunds'], report['refunded_coins']), (1, 2, 90))
+        self.assertEqual(self._balances(users), [1000, 1000, 950])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_balance(users[0]), 1000)
+        self.assertEqual(
+            sorted(CoinTransaction.objects.filter(reference_id=str(auction.id)).values_list('transaction_type', 'amount')),
+            [('auction_payment', -50), ('auction_refund', 30), ('auction_refund', 60)],
+        )
+        self.assertTrue(AuctionWinner.objects.get(auction=auction).coins_transferred)
+
+        self.assertEqual(settle_auctions()['auctions'], 0)
+        self.assertEqual(self._balances(users), [1000, 1000, 950])
+
+    def test_dry_run_writes_nothing(self):
+        auction, users = self._closed_auction('dry', [(0, 20), (1, 30)])
+
+        report = settle_auctions(dry_run=True)
+
+        self.assertEqual(report['refunded_coins'], 20)
+        self.assertEqual(self._balances(users), [980, 970, 1000])
+        auction.refresh_from_db()
+        self.assertIsNone(auction.settled_at)
+
+    def test_statement_count_does_not_grow_with_bidders(self):
+        counts = []
+        for label, bidders in (('few', 3), ('many', 30)):
+            auction, _ = self._closed_auction(label, [(i, 20 + i) for i in range(bidders)], bidders=bidders)
+            with CaptureQueriesContext(connection) as queries:
+                report = settle_auctions([auction.id])
+            self.assertEqual(report['refunds'], bidders - 1)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_case_update_fallback_matches(self):
+        _, users = self._closed_auction('fallback', [(0, 20), (1, 30), (0, 40), (2, 50)])
+
+        with mock.patch('bounties.settlement._can_update_from_values', return_value=False):
+            settle_auctions()
+
+        self.assertEqual(self._balances(users), [1000, 1000, 950])
+
+    def test_ending_through_the_api_refunds_outbid_bidders(self):
+        auction = _create_auction(title='api-end')
+        users = _create_bidders('api-end', 3, balance=1000)
+        for user_index, amount in [(0, 20), (1, 30), (0, 40), (2, 50)]:
+            with self.captureOnCommitCallbacks(execute=True):
+                place_bid(users[user_index], auction.id, amount)
+        admin = User.objects.create(username='api-end-admin', is_superuser=True)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(admin)}'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/auctions/{auction.id}/end/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._balances(users), [1000, 1000, 950])
+        auction.refresh_from_db()
+        self.assertIsNotNone(auction.settled_at)
+
+    def test_scheduler_settles_what_failed_to_settle(self):
+        _, users = self._closed_auction('backstop', [(0, 20), (1, 30)])
+        with mock.patch('bounties.lifecycle.settle_auctions', side_effect=DatabaseError('boom')), \
+                self.assertLogs('bounties.lifecycle', 'ERROR'):
+            self.assertEqual(AuctionScheduler().settle_pending(), 0)
+        self.assertEqual(self._balances(users), [980, 970, 1000])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(AuctionScheduler().settle_pending(), 1)
+        self.assertEqual(self._balances(users), [1000, 970, 1000])
+
+    def test_complete_transfer_does_not_charge_twice(self):
+        auction, users = self._closed_auction('transfer', [(0, 20)])
+        winner = AuctionWinner.objects.get(auction=auction)
+
+        self.assertTrue(winner.complete_transfer())
+        self.assertFalse(winner.complete_transfer())
+        self.assertEqual(self._balances(users)[0], 980)
+        self.assertEqual(CoinTransaction.objects.filter(transaction_type='auction_payment').count(), 1)
+
+
+class AuctionEventLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _bid(self, user, auction, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(user, auction.id, amount)
+        self.assertEqual(status_code, 201)
+
+    def test_bid_path_appends_and_snapshot_matches_replay(self):
+        auction = _create_auction(title='log')
+        first, second = _create_bidders('log', 2)
+        self._bid(first, auction, 20)
+        self._bid(second, auction, 30)
+        self._bid(first, auction, 40)
+        with self.captureOnCommitCallbacks(execute=True):
+            AuctionBid.objects.get(auction=auction, user=first, status='accepted').cancel_bid()
+
+        self.assertEqual(
+            list(AuctionEvent.objects.filter(auction=auction).values_list('kind', 'amount')),
+            [('bid_accepted', 20), ('bid_accepted', 30), ('bid_accepted', 40), ('bid_cancelled', 40)],
+        )
+        auction.refresh_from_db()
+        projection = replay(auction)
+        self.assertEqual(
+            (auction.current_highest_bid, auction.current_highest_bidder_id, auction.total_bids),
+            (projection.highest_bid, projection.highest_bidder_id, projection.total_bids),
+        )
+        self.assertEqual((auction.current_highest_bid, auction.current_highest_bidder_id), (0, None))
+
+    def test_rebuild_restores_drifted_snapshot(self):
+        auction = _create_auction(title='drift')
+        first, second = _create_bidders('drift', 2)
+        self._bid(first, auction, 20)
+        self._bid(second, auction, 35)
+        with transaction.atomic():
+            locked = Auction.objects.select_for_update().get(id=auction.id)
+            new_end = locked.ends_at + timedelta(minutes=3)
+            locked.save(update_fields=record_event(locked, 'extended', ends_at=new_end))
+        Auction.objects.filter(id=auction.id).update(
+            current_highest_bid=999, current_highest_bidder=first, total_bids=7, ends_at=timezone.now(),
+        )
+
+        out = StringIO()
+        call_command('rebuild_auction_snapshots', auction_id=[auction.id], stdout=out)
+
+        auction.refresh_from_db()
+        self.assertEqual(auction.current_highest_bid, 35)
+        self.assertEqual(auction.current_highest_bidder, second)
+        self.assertEqual(auction.total_bids, 2)
+        self.assertEqual(auction.ends_at, new_end)
+        self.assertIn('1 of 1 auction snapshots rebuilt', out.getvalue())
+
+
+    def test_rebuild_keeps_admin_deadline_and_status_edits(self):
+        auction = _create_auction(title='admin-edit')
+        with transaction.atomic():
+            locked = Auction.objects.select_for_update().get(id=auction.id)
+            locked.save(update_fields=record_event(locked, 'extended', ends_at=locked.ends_at + timedelta(minutes=3)))
+
+        auction.refresh_from_db()
+        auction.ends_at = timezone.now() + timedelta(days=2)
+        auction.status = 'pending'
+        with self.captureOnCommitCallbacks(execute=True):
+            AuctionAdmin(Auction, admin.site).save_model(
+                RequestFactory().post('/admin/'), auction, mock.Mock(changed_data=['ends_at', 'status']), change=True
+            )
+
+        self.assertEqual(rebuild_snapshot(auction.id), {})
+        auction.refresh_from_db()
+        self.assertEqual(auction.status, 'pending')
+        self.assertEqual(replay(auction).ends_at, auction.ends_at)
+
+    def test_starting_an_auction_is_logged(self):
+        auction = _create_auction(title='started')
+        Auction.objects.filter(id=auction.id).update(status='upcoming', starts_at=timezone.now() + timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            start_auction(auction.id, force=True)
+        auction.refresh_from_db()
+        self.assertEqual(auction.status, 'active')
+        self.assertEqual(replay(auction).status, 'active')
+        self.assertEqual(AuctionEvent.objects.get(auction=auction).kind, 'status_changed')
+
+
+class AuctionLeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards.clear()
+        self.viewer, = _create_bidders('viewer', 1)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(self.viewer)}'
+        verify_jwt_token(generate_jwt_token(self.viewer))  # warm the auth cache
+
+    def _bid(self, user, auction, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            _, status_code = place_bid(user, auction.id, amount)
+        self.assertEqual(status_code, 201)
+
+    def _leaderboard(self, auction):
+        return self.client.get(f'/api/auctions/{auction.id}/leaderboard/').json()
+
+    def test_reads_are_served_from_memory(self):
+        auction = _create_auction(title='board')
+        first, second, third = _create_bidders('board', 3)
+        self._bid(first, auction, 20)
+        self._bid(second, auction, 30)
+        self._bid(first, auction, 40)
+
+        self._leaderboard(auction)  # cold start folds the log
+        with self.assertNumQueries(0):
+            board = self._leaderboard(auction)
+        self.assertEqual(board['current_highest_bid'], 40)
+        self.assertEqual(board['current_highest_bidder'], first.username)
+        self.assertEqual(board['total_bids'], 3)
+        self.assertEqual(board['top_bidders'], [
+            {'user__username': first.username, 'total_bids': 2, 'highest_bid': 40},
+            {'user__username': second.username, 'total_bids': 1, 'highest_bid': 30},
+        ])
+
+        # A bid taken by another worker: this worker's on-commit hooks never run.
+        with self.captureOnCommitCallbacks(execute=False):
+            place_bid(third, auction.id, 50)
+        with self.assertNumQueries(1):
+            board = self._leaderboard(auction)  # fetches only the new event
+        self.assertEqual(board['top_bidders'][0], {'user__username': third.username, 'total_bids': 1, 'highest_bid': 50})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuctionBid.objects.get(auction=auction, user=third, status='accepted').cancel_bid()
+        board = self._leaderboard(auction)
+        self.assertEqual((board['current_highest_bid'], board['current_highest_bidder']), (0, None))
+        self.assertEqual(board['total_bids'], 4)
+
+    def test_unknown_auction_is_not_found(self):
+        response = self.client.get('/api/auctions/999999/leaderboard/')
+        self.assertEqual(response.status_code, 404)
+
+
+class LeaderboardSocketTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards.clear()
+
+    def test_snapshot_then_rank_diffs(self):
+        auction = _create_auction(title='ranks')
+        first, second = _create_bidders('ranks', 2)
+        place_bid(first, auction.id, 20)
+        async_to_sync(auction_publisher.flush)()
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                _as_user(URLRouter(websocket_urlpatterns), first),
+                f'ws/auction/leaderboard/{auction.id}/',
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.receive_json_from()  # leaderboard_connected
+            snapshot = await communicator.receive_json_from()
+
+            await database_sync_to_async(place_bid)(second, auction.id, 30)
+            messages = [await communicator.receive_json_from(timeout=5) for _ in range(2)]
+            await communicator.disconnect()
+            return snapshot, {message['type']: message for message in messages}
+
+        snapshot, messages = async_to_sync(scenario)()
+
+        self.assertEqual(snapshot['type'], 'leaderboard_snapshot')
+        self.assertEqual(snapshot['top_bidders'], [
+            {'user__username': first.username, 'total_bids': 1, 'highest_bid': 20},
+        ])
+        diff = messages['leaderboard_diff']
+        self.assertEqual(diff['base_version'], snapshot['version'])
+        self.assertEqual(diff['current_highest_bidder'], second.username)
+        self.assertEqual(diff['inserted'], [
+            {'user__username': second.username, 'total_bids': 1, 'highest_bid': 30, 'rank': 1},
+        ])
+        self.assertEqual(diff['moved'], [
+            {'user__username': first.username, 'total_bids': 1, 'highest_bid': 20, 'rank': 2},
+        ])
+        self.assertEqual(diff['removed'], [])
+        self.assertIn('bid_update', messages)
+
+
+class BroadcastCoalescingTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards.clear()
+
+    def test_bids_publish_only_after_commit(self):
+        auction = _create_auction(title='deferred')
+        bidder, = _create_bidders('deferred', 1)
+
+        with mock.patch.object(auction_publisher, 'publish') as publish:
+            with transaction.atomic():
+                place_bid(bidder, auction.id, 20)
+                publish.assert_not_called()
+        groups = [call.args[:2] for call in publish.call_args_list]
+        self.assertIn((f'auction_{auction.id}', 'auction_update'), groups)
+        self.assertIn((f'leaderboard_{auction.id}', 'leaderboard_update'), groups)
+
+    def test_bid_burst_reaches_socket_as_one_frame(self):
+        auction = _create_auction(title='burst')
+        bidders = _create_bidders('burst', 3)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                _as_user(URLRouter(websocket_urlpatterns), bidders[0]),
+                f'ws/auction/{auction.id}/',
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.receive_json_from()  # auction_connected
+            await communicator.receive_json_from()  # clock_sync
+
+            with mock.patch.object(auction_publisher, 'interval', 0.5):
+                for amount, bidder in enumerate(bidders, start=2):
+                    await database_sync_to_async(place_bid)(bidder, auction.id, amount * 10)
+                frame = await communicator.receive_json_from(timeout=5)
+                quiet = await communicator.receive_nothing(timeout=0.7)
+            await communicator.disconnect()
+            return frame, quiet
+
+        frame, quiet = async_to_sync(scenario)()
+
+        self.assertEqual(frame['type'], 'new_bid')
+        self.assertEqual((frame['user'], frame['amount'], frame['bid_count']), (bidders[2].username, 40, 3))
+        self.assertTrue(quiet)
+
+    def test_composed_diff_matches_direct_diff(self):
+        def board(version, *standings):
+            return {
+                'auction_id': 1, 'version': version, 'total_bids': version,
+                'current_highest_bid': standings[0][1], 'current_highest_bidder': standings[0][0],
+                'top_bidders': [
+                    {'user__username': name, 'total_bids': 1, 'highest_bid': amount} for name, amount in standings
+                ],
+            }
+
+        base = board(1, ('a', 30), ('b', 20), ('c', 10))
+        middle = board(2, ('d', 40), ('a', 30), ('b', 20))
+        latest = board(3, ('c', 50), ('d', 40), ('a', 30))
+
+        composed = merge_leaderboard_diffs(leaderboard_diff(base, middle), leaderboard_diff(middle, latest))
+        direct = leaderboard_diff(base, latest)
+
+        self.assertEqual((composed['base_version'], composed['version']), (1, 3))
+        self.assertEqual(composed['inserted'], direct['inserted'])
+        self.assertEqual(sorted(composed['removed']), sorted(direct['removed']))
+        # Composition may also list entries that moved and came back; the
+        # ones that really changed must match.
+        for entry in direct['moved']:
+            self.assertIn(entry, composed['moved'])
+
+    def test_publisher_ships_encoded_frames(self):
+        layer = get_channel_layer()
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add('leaderboard_0', channel)
+            auction_publisher.publish(
+                'leaderboard_0', 'leaderboard_diff', {'version': 2, 'base_version': 1, 'moved': []},
+                envelope=('base_version', 'version'),
+            )
+            await auction_publisher.flush()
+            message = await layer.receive(channel)
+            await layer.group_discard('leaderboard_0', channel)
+            return message
+
+        message = async_to_sync(scenario)()
+
+        self.assertNotIn('data', message)
+        self.assertEqual((message['version'], message['base_version']), (2, 1))
+        self.assertEqual(json.loads(message['text']), {'version': 2, 'base_version': 1, 'moved': []})
+
+
+class AuctionClockSyncTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _connect(self, user, auction_id):
+        return WebsocketCommunicator(
+            _as_user(URLRouter(websocket_urlpatterns), user),
+            f'ws/auction/{auction_id}/',
+        )
+
+    def test_clock_sync_on_connect_and_on_request(self):
+        auction = _create_auction(title='clock')
+        viewer, = _create_bidders('clock', 1)
+
+        async def scenario():
+            communicator = self._connect(viewer, auction.id)
+            await communicator.connect()
+            await communicator.receive_json_from()  # auction_connected
+            on_connect = await communicator.receive_json_from()
+            await communicator.send_json_to({'action': 'sync_clock', 'client_time': 1234.5})
+            on_request = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return on_connect, on_request
+
+        before = timezone.now()
+        on_connect, on_request = async_to_sync(scenario)()
+
+        self.assertEqual(on_connect['type'], 'clock_sync')
+        self.assertEqual(on_connect['auction_id'], auction.id)
+        self.assertEqual(on_connect['ends_at'], auction.ends_at.isoformat())
+        self.assertGreaterEqual(on_connect['server_time'], before.isoformat())
+        self.assertNotIn('client_time', on_connect)
+        self.assertEqual(on_request['type'], 'clock_sync')
+        self.assertEqual(on_request['client_time'], 1234.5)
+
+    def test_extension_pushes_new_end_time(self):
+        auction = _create_auction(title='snipe')
+        Auction.objects.filter(id=auction.id).update(ends_at=timezone.now() + timedelta(seconds=180))
+        viewer, bidder = _create_bidders('snipe', 2)
+
+        async def scenario():
+            communicator = self._connect(viewer, auction.id)
+            await communicator.connect()
+            await communicator.receive_json_from()  # auction_connected
+            await communicator.receive_json_from()  # clock_sync
+            await database_sync_to_async(place_bid)(bidder, auction.id, 20)
+            frames = [await communicator.receive_json_from(timeout=5) for _ in range(2)]
+            await communicator.disconnect()
+            return {frame['type']: frame for frame in frames}
+
+        frames = async_to_sync(scenario)()
+
+        auction.refresh_from_db()
+        self.assertEqual(frames['clock_update']['ends_at'], auction.ends_at.isoformat())
+        self.assertTrue(frames['new_bid']['auction_extended'])
+
+
+class AntiSnipeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _closing_auction(self, title, remaining, window, extension):
+        auction = _create_auction(title=title)
+        auction.ends_at = timezone.now() + timedelta(seconds=remaining)
+        auction.extension_window_seconds = window
+        auction.extension_seconds = extension
+        auction.save()
+        return auction
+
+    def test_deadline_rule(self):
+        ends_at = timezone.now()
+        self.assertEqual(
+            anti_snipe_deadline(ends_at, ends_at - timedelta(seconds=60), 60, 30),
+            ends_at + timedelta(seconds=30),
+        )
+        self.assertIsNone(anti_snipe_deadline(ends_at, ends_at - timedelta(seconds=61), 60, 30))
+        self.assertIsNone(anti_snipe_deadline(ends_at, ends_at, 60, 30))
+        self.assertIsNone(anti_snipe_deadline(ends_at, ends_at - timedelta(seconds=1), 0, 30))
+
+    def test_bid_in_window_extends_from_locked_deadline(self):
+        auction = self._closing_auction('soft-close', remaining=45, window=60, extension=30)
+        original_end = auction.ends_at
+        bidder, = _create_bidders('soft-close', 1)
+
+        payload, status_code = place_bid(bidder, auction.id, 20)
+
+        self.assertEqual(status_code, 201)
+        auction.refresh_from_db()
+        self.assertEqual(auction.ends_at, original_end + timedelta(seconds=30))
+        self.assertTrue(payload['extension_applied'])
+        self.assertEqual(payload['new_ends_at'], auction.ends_at.isoformat())
+        self.assertEqual(payload['extension_minutes'], 0.5)
+        self.assertEqual(payload['extension_message'], 'A new highest bid placed in the last 1 min extends the auction by 30 s')
+        event = AuctionEvent.objects.get(auction=auction, kind='extended')
+        self.assertEqual(event.ends_at, auction.ends_at)
+
+    def test_bid_outside_window_or_with_anti_snipe_off_keeps_deadline(self):
+        early = self._closing_auction('early', remaining=90, window=60, extension=30)
+        disabled = self._closing_auction('disabled', remaining=10, window=0, extension=30)
+        bidder, = _create_bidders('keep', 1)
+
+        for auction in (early, disabled):
+            payload, status_code = place_bid(bidder, auction.id, 20)
+            self.assertEqual(status_code, 201)
+            self.assertFalse(payload['extension_applied'])
+            ends_at = auction.ends_at
+            auction.refresh_from_db()
+            self.assertEqual(auction.ends_at, ends_at)
+
+
+class ConcurrentAuctionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_create_single_auction_allows_several_live_auctions(self):
+        User.objects.create(username='delo')
+        for title in ('first', 'second'):
+            call_command('create_single_auction', title=title, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Auction.objects.filter(status='active').values_list('title', flat=True)),
+            ['first', 'second'],
+        )
+
+    def test_bids_on_one_auction_leave_the_others_alone(self):
+        auctions = [_create_auction(title=f'parallel-{index}') for index in range(3)]
+        bidder, = _create_bidders('parallel', 1)
+
+        for amount, auction in enumerate(auctions, start=2):
+            place_bid(bidder, auction.id, amount * 10)
+
+        for amount, auction in enumerate(auctions, start=2):
+            auction.refresh_from_db()
+            self.assertEqual((auction.current_highest_bid, auction.total_bids), (amount * 10, 1))
+
+    def test_deactivate_needs_an_id_when_several_are_active(self):
+        first = _create_auction(title='end-first')
+        second = _create_auction(title='end-second')
+
+        out = StringIO()
+        call_command('deactivate_auction', stdout=out)
+        self.assertIn('choose them with --auction-id', out.getvalue())
+        self.assertEqual(Auction.objects.filter(status='active').count(), 2)
+
+        call_command('deactivate_auction', auction_id=[second.id], stdout=StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('active', 'ended'))
+
+
+
+def _use_temp_media_root(test):
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    settings_override = override_settings(MEDIA_ROOT=media_root)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+def _add_image(auction, name, content=b'not really a jpeg'):
+    image = AuctionImage(auction=auction)
+    image.image.save(name, ContentFile(content), save=True)
+    return image
+
+
+class MediaManifestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _use_temp_media_root(self)
+
+    def test_list_serialization_skips_storage_once_warm(self):
+        auctions = [_create_auction(title=f'gallery-{index}') for index in range(3)]
+        for auction in auctions:
+            _add_image(auction, f'{auction.title}.jpg')
+        media_manifest.clear()
+        queryset = Auction.objects.filter(id__in=[a.id for a in auctions]).prefetch_related('images')
+
+        first = AuctionSerializer(queryset, many=True).data
+        self.assertEqual(media_manifest.metrics()['misses'], 3)
+        self.assertTrue(all(len(item['images']) == 1 for item in first))
+
+        with mock.patch.object(type(default_storage._wrapped), 'exists') as exists:
+            second = AuctionSerializer(queryset, many=True).data
+        exists.assert_not_called()
+        self.assertEqual([item['images'] for item in second], [item['images'] for item in first])
+
+    def test_legacy_urls_with_query_strings(self):
+        auction = _create_auction(title='legacy-query')
+        default_storage.save('auction_images/legacy.jpg', ContentFile(b'legacy'))
+        Auction.objects.filter(id=auction.id).update(image_urls=[
+            '/media/auction_images/legacy.jpg?v=2',
+            '/media/auction_images/missing.jpg?v=1',
+        ])
+        auction.refresh_from_db()
+
+        request = RequestFactory().get('/api/auctions/')
+        images = AuctionSerializer(auction, context={'request': request}).data['images']
+        self.assertEqual(images, ['http://testserver/media/auction_images/legacy.jpg?v=2'])
+
+    def test_upload_fills_manifest_and_sweep_drops_missing_files(self):
+        auction = _create_auction(title='sweep')
+        image = _add_image(auction, 'sweep.jpg')
+        entry = media_manifest.get(image.image.name)
+        self.assertTrue(entry['exists'])
+        self.assertEqual(entry['size'], len(b'not really a jpeg'))
+
+        default_storage.delete(image.image.name)
+        self.assertEqual(len(AuctionSerializer(auction).data['images']), 1)
+
+        self.assertEqual(media_manifest.sweep(), (1, 1))
+        data = AuctionSerializer(auction).data
+        self.assertEqual((data['images'], data['image_files'][0]['image']), ([], None))
+
+    def test_sweep_command_needs_a_shared_manifest(self):
+        # With a process-local manifest the command could only refresh its own copy.
+        with self.assertRaisesMessage(CommandError, 'would not reach the web workers'):
+            call_command('sweep_media_manifest', stdout=StringIO())
+        # Shared in name only: the default cache here is LocMemCache.
+        with mock.patch.object(media_manifest, 'shared', True), \
+                self.assertRaisesMessage(CommandError, 'would not reach the web workers'):
+            call_command('sweep_media_manifest', stdout=StringIO())
+
+    def test_renamed_upload_resolves_by_original_name(self):
+        auction = _create_auction(title='renamed')
+        first = _add_image(auction, 'poster.jpg')
+        second = _add_image(auction, 'poster.jpg')
+        self.assertNotEqual(second.image.name, 'auction_images/poster.jpg')
+        self.assertEqual(second.original_name, 'poster.jpg')
+
+        default_storage.delete(first.image.name)
+        first.delete()
+        request = RequestFactory().get('/media/auction_images/poster.jpg')
+        response = serve_auction_image(request, 'poster.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.path.basename(response.file_to_stream.name), os.path.basename(second.image.name))
+        response.close()
+
+    def test_unknown_names_are_negatively_cached(self):
+        request = RequestFactory().get('/media/auction_images/ghost.jpg')
+        self.assertEqual(serve_auction_image(request, 'ghost.jpg').status_code, 404)
+
+        with self.assertNumQueries(0), mock.patch.object(type(default_storage._wrapped), 'exists') as exists:
+            self.assertEqual(serve_auction_image(request, 'ghost.jpg').status_code, 404)
+        exists.assert_not_called()
+
+        auction = _create_auction(title='ghost')
+        image = _add_image(auction, 'ghost.jpg')
+        response = serve_auction_image(request, 'ghost.jpg')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(image.original_name, 'ghost.jpg')
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_manifest.clear()
+        _use_temp_media_root(self)
+        self.image = _add_image(_create_auction(title='served'), 'served.jpg', b'0123456789')
+        self.url = f'/media/{self.image.image.name}'
+
+    def test_uploads_are_immutable_and_revalidate_with_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        for headers in ({'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_MODIFIED_SINCE': last_modified}):
+            not_modified = self.client.get(self.url, **headers)
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], etag)
+            self.assertEqual(not_modified.content, b'')
+
+    def test_byte_ranges(self):
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(partial['Content-Length'], '4')
+        self.assertEqual(b''.join(partial.streaming_content), b'2345')
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(suffix.streaming_content), b'789')
+
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE='bytes=10-')
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable['Content-Range']), (416, 'bytes */10'))
+
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(b''.join(stale.streaming_content), b'0123456789')
+
+    def test_names_that_can_change_are_revalidated(self):
+        self.assertEqual(self.image.original_name, 'served.jpg')
+        aliased = self.client.get('/media/auction_images/served.jpg')
+        self.assertEqual(aliased.status_code, 200)
+        self.assertEqual(aliased['Cache-Control'], 'public, max-age=3600')
+        aliased.close()
+
+        default_storage.save('legacy/plain.jpg', ContentFile(b'legacy'))
+        legacy = self.client.get('/media/legacy/plain.jpg')
+        self.assertEqual(legacy['Cache-Control'], 'public, max-age=3600')
+        legacy.close()
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+
+def _jpeg(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 40, 40)).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 1280])
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _use_temp_media_root(self)
+        self.auction = _create_auction(title='variants')
+
+    def test_upload_queues_rendering_after_commit(self):
+        with mock.patch.object(variant_pool, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                image = _add_image(self.auction, 'queued.jpg', _jpeg(64, 64))
+        submit.assert_called_once_with(image.id)
+
+    def test_variants_and_srcset(self):
+        image = _add_image(self.auction, 'large.jpg', _jpeg(1600, 1000))
+        variants = generate_variants(image.id)
+
+        self.assertEqual(set(variants), {'webp', 'jpeg'})
+        self.assertEqual(sorted(variants['webp'], key=int), ['320', '640', '1280'])
+        with default_storage.open(variants['jpeg']['640']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (640, 400))
+        self.assertLess(default_storage.size(variants['webp']['320']), default_storage.size(image.image.name))
+
+        image.refresh_from_db()
+        srcset = AuctionSerializer(self.auction).data['image_files'][0]['srcset']
+        self.assertEqual(
+            srcset['webp'],
+            ', '.join(f"{default_storage.url(variants['webp'][width])} {width}w" for width in ('320', '640', '1280')),
+        )
+
+    def test_small_images_get_one_full_size_webp(self):
+        image = _add_image(self.auction, 'small.jpg', _jpeg(200, 100))
+        self.assertEqual(list(generate_variants(image.id)), ['webp'])
+        self.assertEqual(list(AuctionSerializer(self.auction).data['image_files'][0]['srcset']), ['webp'])
+
+    def test_unreadable_upload_is_skipped(self):
+        image = _add_image(self.auction, 'broken.jpg', b'not an image')
+        with self.assertLogs('bounties.image_variants', 'WARNING'):
+            self.assertIsNone(generate_variants(image.id))
+        self.assertEqual(AuctionSerializer(self.auction).data['image_files'][0]['srcset'], {})
+
+
+    def test_deleting_an_image_removes_its_files(self):
+        image = _add_image(self.auction, 'gone.jpg', _jpeg(800, 600))
+        variants = generate_variants(image.id)
+        image.refresh_from_db()
+        paths = [image.image.name] + [path for paths in variants.values() for path in paths.values()]
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auction.delete()
+        self.assertEqual([path for path in paths if default_storage.exists(path)], [])
+        self.assertFalse(media_manifest.exists(paths[-1]))
+
+    def test_variants_of_an_image_deleted_while_rendering_are_removed(self):
+        image = _add_image(self.auction, 'raced.jpg', _jpeg(800, 600))
+        real_render = image_variants.render_variants
+        rendered = {}
+
+        def render_then_delete(*args, **kwargs):
+            rendered.update(real_render(*args, **kwargs))
+            AuctionImage.objects.filter(id=image.id).delete()
+            return rendered
+
+        with mock.patch.object(image_variants, 'render_variants', render_then_delete):
+            self.assertIsNone(generate_variants(image.id))
+        self.assertTrue(rendered)
+        self.assertFalse(any(default_storage.exists(path) for paths in rendered.values() for path in paths.values()))
+
+
+class CreateAuctionUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _use_temp_media_root(self)
+        admin = User.objects.create(username='uploader', is_superuser=True)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {generate_jwt_token(admin)}'
+
+    def _post(self, *names):
+        now = timezone.now()
+        return self.client.post('/api/auctions/create/', {
+            'title': 'Uploaded lot',
+            'description': 'With pictures',
+            'minimum_bid': 10,
+            'starts_at': (now - timedelta(minutes=1)).isoformat(),
+            'ends_at': (now + timedelta(hours=1)).isoformat(),
+            'images': [SimpleUploadedFile(name, _jpeg(64, 48), content_type='image/jpeg') for name in names],
+        })
+
+    def test_files_are_written_outside_the_transaction_and_rows_inserted_at_once(self):
+        outer_blocks = len(connection.atomic_blocks)
+        blocks_during_save = []
+        real_save = FileSystemStorage._save
+
+        def recording_save(storage, name, content):
+            blocks_during_save.append(len(connection.atomic_blocks))
+            return real_save(storage, name, content)
+
+        with mock.patch.object(FileSystemStorage, '_save', recording_save), \
+                mock.patch.object(variant_pool, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True), \
+                CaptureQueriesContext(connection) as queries:
+            response = self._post('front.jpg', 'back.jpg')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(blocks_during_save, [outer_blocks, outer_blocks])
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "bounties_auction_images"')]
+        self.assertEqual(len(inserts), 1)
+
+        auction = Auction.objects.get(id=response.data['id'])
+        images = list(auction.images.all())
+        self.assertEqual(auction.status, 'active')
+        self.assertEqual([image.original_name for image in images], ['front.jpg', 'back.jpg'])
+        self.assertEqual(auction.image_urls, [image.image.url for image in images])
+        self.assertTrue(all(default_storage.exists(image.image.name) for image in images))
+        self.assertEqual(sorted(call.args[0] for call in submit.call_args_list), sorted(image.id for image in images))
+
+    def test_upload_names_are_sanitized(self):
+        with mock.patch.object(variant_pool, 'submit'), self.captureOnCommitCallbacks(execute=True):
+            response = self._post('my lot (1)?.jpg')
+        self.assertEqual(response.status_code, 201)
+        image = AuctionImage.objects.get(auction_id=response.data['id'])
+        self.assertRegex(image.image.name, r'^auction_images/my_lot_1_[A-Za-z0-9]{7}\.jpg$')
+        self.assertEqual(image.original_name, 'my_lot_1.jpg')
+
+    def test_long_file_names_fit_their_columns(self):
+        long_name = f"{'very-long-lot-photo-' * 8}.jpg"
+        with mock.patch.object(variant_pool, 'submit'), self.captureOnCommitCallbacks(execute=True):
+            response = self._post(long_name)
+        self.assertEqual(response.status_code, 201)
+        uploaded = AuctionImage.objects.get(auction_id=response.data['id'])
+        saved = _add_image(Auction.objects.get(id=response.data['id']), long_name)
+
+        for image in (uploaded, saved):
+            self.assertLessEqual(len(image.image.name), 100)
+            self.assertLessEqual(len(image.original_name), 100)
+            self.assertEqual(image.original_name, original_image_name(image.image.name))
+            self.assertTrue(long_name.startswith(image.original_name[:-len('.jpg')]))
+            self.assertTrue(image.original_name.endswith('.jpg'))
+
+        # The full name still resolves to the first upload.
+        response = serve_auction_image(RequestFactory().get(f'/media/auction_images/{long_name}'), long_name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.path.basename(response.file_to_stream.name), os.path.basename(uploaded.image.name))
+        response.close()
+
+    def test_failed_insert_removes_the_stored_files(self):
+        with mock.patch.object(AuctionImage.objects, 'bulk_create', side_effect=DatabaseError('boom')), \
+                self.assertLogs('bounties.auction_views', 'ERROR'):
+            response = self._post('lost.jpg')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Auction.objects.filter(title='Uploaded lot').exists())
+        self.assertEqual(default_storage.listdir('auction_images')[1], [])
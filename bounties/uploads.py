@@ -0,0 +1,65 @@
+"""
+Auction image uploads, kept out of the auction's database transaction.
+
+Files go to storage before the transaction opens. Django has already
+spooled large request bodies to temporary files in chunks, and storage
+moves or copies those in chunks too. The transaction then only inserts the
+AuctionImage rows, in one bulk_create. Resizing is queued to the variant
+pool after commit.
+"""
+
+import logging
+
+from django.core.files.storage import default_storage
+
+from .image_variants import schedule_variants
+from .media_manifest import record_uploads
+from .models import IMAGE_NAME_MAX_LENGTH, AuctionImage, auction_image_upload_to, original_upload_name
+
+logger = logging.getLogger(__name__)
+
+
+def store_uploads(files, storage=default_storage):
+    """
+    Write uploaded files to storage and return unsaved AuctionImage rows
+    for them, in upload order. Files already written are removed again if
+    a later one fails.
+    """
+    images = []
+    try:
+        for order, upload in enumerate(files):
+            # generate_filename runs the name through get_valid_name, as
+            # FileField does for the upload_to path.
+            name = storage.generate_filename(auction_image_upload_to(None, upload.name))
+            name = storage.save(name, upload, max_length=IMAGE_NAME_MAX_LENGTH)
+            images.append(AuctionImage(
+                image=name,
+                original_name=original_upload_name(upload.name, storage),
+                order=order,
+            ))
+    except Exception:
+        discard_uploads(images, storage)
+        raise
+    return images
+
+
+def attach_uploads(auction, images):
+    """Insert ``images`` for ``auction`` in one query; call inside the auction's transaction."""
+    if not images:
+        return []
+    for image in images:
+        image.auction = auction
+    images = AuctionImage.objects.bulk_create(images)
+    # bulk_create sends no post_save, so do what the AuctionImage receivers would.
+    record_uploads(images)
+    schedule_variants(images)
+    return images
+
+
+def discard_uploads(images, storage=default_storage):
+    """Delete the files of rows that never made it into the database."""
+    for image in images:
+        try:
+            storage.delete(image.image.name)
+        except OSError as e:
+            logger.warning(f"Could not remove orphaned upload {image.image.name}: {str(e)}")
@@ -28,6 +28,7 @@ urlpatterns = [
     path('admin/users/', views.UserListView.as_view(), name='admin-users'),
     path('admin/adjust-balance/', views.AdminUserBalanceAdjustmentView.as_view(), name='admin-adjust-balance'),
     path('admin/bounty-claims/', views.AdminBountyClaimsView.as_view(), name='admin-bounty-claims'),
+    path('admin/auth-cache-metrics/', views.AuthCacheMetricsView.as_view(), name='admin-auth-cache-metrics'),
     
     # Auction endpoints
     path('auctions/', auction_views.AuctionListView.as_view(), name='auction-list'),
@@ -3,17 +3,22 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.conf import settings
-from django.core.files.storage import default_storage
-from django.http import FileResponse, HttpResponseNotFound
+from django.http import Http404, HttpResponseNotFound
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
 from django.contrib.auth.models import User
-from django.db import transaction, models
-import mimetypes
+from django.db import transaction
 import os
+import posixpath
 import uuid
 import logging
 import requests
+from .authentication import user_cache
+from .balances import balance_etag, get_balance
+from .media_manifest import media_manifest, resolve_image_alias
+from .media_serving import media_response
 from .models import Bounty, BountyClaim, RedeemCode, UserProfile, CoinTransaction, PointTransfer
 from .serializers import (
     BountySerializer, BountyDetailSerializer,
@@ -58,11 +63,9 @@ class BountyListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # Optimized query with annotations for better performance
-        queryset = Bounty.objects.annotate(
-            claims_count=models.Count('claims'),
-            active_claims_count=models.Count('claims', filter=models.Q(claims__status__in=['pending', 'submitted']))
-        ).select_related()
+        # claims_left/claims_count come from the maintained column, so the
+        # page needs no per-bounty COUNT or aggregate join.
+        queryset = Bounty.objects.all()
 
         status_filter = self.request.query_params.get('status', None)
         if status_filter:
@@ -102,32 +105,12 @@ class BountyClaimView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, bounty_id):
-        bounty = get_object_or_404(Bounty, id=bounty_id)
-
-        # Check if user already claimed this bounty
-        existing_claim = BountyClaim.objects.filter(
-            bounty=bounty,
-            user=request.user
-        ).first()
-
-        if existing_claim:
-            return Response(
-                {"error": "You have already claimed this bounty"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Check if bounty is available
-        if bounty.status != 'available' or bounty.claims_left <= 0:
-            return Response(
-                {"error": "Bounty is not available for claiming"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Create claim and update bounty
-        with transaction.atomic():
-            claim = BountyClaim.objects.create(bounty=bounty, user=request.user)
-            # Force update the bounty status and claims_left by calling save() without update_fields
-            bounty.save()  # This will trigger the save method logic
+        try:
+            claim = Bounty.reserve_claim(bounty_id, request.user)
+        except Bounty.DoesNotExist:
+            raise Http404("No Bounty matches the given query.")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = BountyClaimSerializer(claim)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -309,11 +292,19 @@ class UserBalanceView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        balance = get_balance(request.user)
+        etag = balance_etag(request.user.id, balance)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        # Compare weakly: GZipMiddleware may have weakened the tag we sent.
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in [tag.removeprefix('W/') for tag in client_etags]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
         return Response({
-            'balance': profile.coin_balance,
+            'balance': balance,
             'user': request.user.username
-        })
+        }, headers=headers)
 
 
 class UserTransactionsView(generics.ListAPIView):
@@ -329,14 +320,14 @@ class UserTransactionsView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         transactions = self.get_queryset()
         data = []
-        for transaction in transactions:
+        for coin_transaction in transactions:
             data.append({
-                'id': transaction.id,
-                'amount': transaction.amount,
-                'transaction_type': transaction.transaction_type,
-                'description': transaction.description,
-                'reference_id': transaction.reference_id,
-                'created_at': transaction.created_at
+                'id': coin_transaction.id,
+                'amount': coin_transaction.amount,
+                'transaction_type': coin_transaction.transaction_type,
+                'description': coin_transaction.description,
+                'reference_id': coin_transaction.reference_id,
+                'created_at': coin_transaction.created_at
             })
 
         return Response({
@@ -537,6 +528,16 @@ class AdminUserBalanceAdjustmentView(APIView):
         })
 
 
+class AuthCacheMetricsView(APIView):
+    """
+    Admin endpoint exposing this worker's authenticated-user cache metrics
+    """
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        return Response(user_cache.metrics())
+
+
 class UserDetailView(APIView):
     """
     Get comprehensive user information including profile, balance, transactions, etc.
@@ -655,6 +656,7 @@ class UserListView(generics.ListAPIView):
         })
 
 
+@require_safe
 def serve_auction_image(request, filename):
     """Serve auction images with fallback for Django auto-renamed file names.
 
@@ -665,27 +667,24 @@ def serve_auction_image(request, filename):
     safe_filename = os.path.basename(filename)
     requested_path = f'auction_images/{safe_filename}'
 
-    resolved_path = requested_path if default_storage.exists(requested_path) else None
+    # Both lookups are cached, including misses, so neither a hit nor a
+    # repeated 404 touches storage or scans the upload directory.
+    if media_manifest.exists(requested_path):
+        return media_response(request, requested_path)
 
-    if not resolved_path and '.' in safe_filename:
-        base, ext = os.path.splitext(safe_filename)
-        prefix = f"{base}_"
+    resolved_path = resolve_image_alias(safe_filename)
+    if not resolved_path:
+        return HttpResponseNotFound('Not Found')
 
-        try:
-            _, files = default_storage.listdir('auction_images')
-        except Exception:
-            files = []
+    # Which file an original name points at can change, so only requests
+    # for the stored name itself may be cached as immutable.
+    return media_response(request, resolved_path, immutable=False)
 
-        for candidate in files:
-            if candidate.startswith(prefix) and candidate.endswith(ext):
-                candidate_path = f'auction_images/{candidate}'
-                if default_storage.exists(candidate_path):
-                    resolved_path = candidate_path
-                    break
 
-    if not resolved_path:
+@require_safe
+def serve_media(request, path, prefix=''):
+    """Serve any other uploaded file under MEDIA_ROOT with caching headers and ranges."""
+    path = posixpath.normpath(prefix + path).lstrip('/')
+    if path == '.' or path.startswith('../'):
         return HttpResponseNotFound('Not Found')
-
-    file_handle = default_storage.open(resolved_path, 'rb')
-    content_type, _ = mimetypes.guess_type(resolved_path)
-    return FileResponse(file_handle, content_type=content_type or 'application/octet-stream')
+    return media_response(request, path)
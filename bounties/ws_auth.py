@@ -3,20 +3,73 @@ JWT authentication middleware for Django Channels WebSocket connections.
 
 Allows frontend clients to authenticate using the same JWT token used by REST
 API requests by passing it as a `token` query parameter.
+
+Users are resolved through the shared user snapshot cache in
+bounties.authentication, and cache misses arriving together are loaded with a
+single query, so a reconnect storm after a deploy does not cost one user
+lookup per socket.
 """
 
+import asyncio
 from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 
-from .authentication import verify_jwt_token
+from .authentication import decode_jwt_token, user_cache
+
+
+class _UserBatchLoader:
+    """Coalesce user lookups issued within a short window into one query."""
+
+    def __init__(self, window=0.005):
+        self.window = window
+        self._loop = None
+        self._pending = {}
+
+    async def load(self, user_id):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+
+        if not self._pending:
+            loop.create_task(self._flush())
+
+        future = self._pending.get(user_id)
+        if future is None:
+            future = loop.create_future()
+            self._pending[user_id] = future
+        return await future
+
+    async def _flush(self):
+        await asyncio.sleep(self.window)
+        pending, self._pending = self._pending, {}
+        try:
+            users = await database_sync_to_async(user_cache.get_many)(list(pending))
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for user_id, future in pending.items():
+            if not future.done():
+                future.set_result(users.get(user_id))
+
+
+user_loader = _UserBatchLoader()
+
 
+async def get_user_from_token(token):
+    payload = decode_jwt_token(token)
+    if payload is None or 'user_id' not in payload:
+        return AnonymousUser()
 
-@database_sync_to_async
-def get_user_from_token(token):
-    user = verify_jwt_token(token)
+    # Process-local hits need no I/O, so skip the executor hop for them.
+    user = user_cache.get_local(payload['user_id'])
+    if user is None:
+        user = await user_loader.load(payload['user_id'])
     return user or AnonymousUser()
 
 
@@ -19,7 +19,7 @@ django.setup()
 
 from django.contrib.auth.models import User
 from bounties.models import UserProfile
-from bounties.auction_models import Auction
+from bounties.models import Auction
 
 def test_direct_database():
     """Test database directly to see what auctions exist."""
@@ -28,7 +28,7 @@ echo "3. Create a new Web Service and connect your repository"
 echo "4. Use the following settings:"
 echo "   - Environment: Python"
 echo "   - Build Command: pip install -r requirements.txt && python manage.py collectstatic --noinput"
-echo "   - Start Command: gunicorn playmarket.wsgi:application"
+echo "   - Start Command: gunicorn playmarket.asgi:application -c gunicorn.conf.py"
 echo "5. Add a PostgreSQL database service"
 echo "6. Configure environment variables in Render dashboard:"
 echo "   - DEBUG: false"
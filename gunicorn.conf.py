@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for serving playmarket over ASGI.
+
+Gunicorn manages the processes while each worker runs uvicorn, so HTTP and
+the Channels WebSocket routes in ``playmarket.asgi`` are served together.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# WebSocket connections are long-lived; only plain HTTP requests are bounded.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    """Refuse to start workers when broadcasts cannot cross processes."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+
+    import django
+    django.setup()
+
+    from bounties.checks import channel_layer_problem
+
+    problem = channel_layer_problem(server.cfg.workers)
+    if problem:
+        raise RuntimeError(problem)
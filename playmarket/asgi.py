@@ -10,21 +10,32 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-import bounties.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
 
 # Configure Django ASGI application
 django_asgi_app = get_asgi_application()
 
+import bounties.routing
+from bounties.ws_auth import JwtAuthMiddleware
+from bounties.checks import channel_layer_problem, configured_worker_count
+from bounties.lifecycle import lifespan_app
+
+# Refuse to serve when broadcasts could not reach sockets held by other workers.
+channel_layer_error = channel_layer_problem(configured_worker_count())
+if channel_layer_error:
+    raise ImproperlyConfigured(channel_layer_error)
+
 # Configure Channels application with WebSocket support
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
+    # Starts the auction lifecycle scheduler alongside the worker.
+    "lifespan": lifespan_app,
+    "websocket": JwtAuthMiddleware(
         URLRouter(
             bounties.routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+})
@@ -169,6 +169,21 @@ try:
 except ValueError:
     PLAYENGINE_TIMEOUT_SECONDS = 30
 
+# Reject bids below the cached auction high before taking any row locks.
+BID_PRECHECK_ENABLED = os.environ.get('BID_PRECHECK_ENABLED', 'True').lower() == 'true'
+
+# Bid sequencer: funnel bids for each auction through one ordered in-process
+# queue that rejects stale bids in memory and writes winners in batches.
+BID_SEQUENCER_ENABLED = os.environ.get('BID_SEQUENCER_ENABLED', 'False').lower() == 'true'
+try:
+    BID_SEQUENCER_BATCH_SIZE = int(os.environ.get('BID_SEQUENCER_BATCH_SIZE', '50'))
+except ValueError:
+    BID_SEQUENCER_BATCH_SIZE = 50
+try:
+    BID_SEQUENCER_STATE_TTL_SECONDS = float(os.environ.get('BID_SEQUENCER_STATE_TTL_SECONDS', '2'))
+except ValueError:
+    BID_SEQUENCER_STATE_TTL_SECONDS = 2.0
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -226,15 +241,27 @@ ASGI_APPLICATION = 'playmarket.asgi.application'
 
 # Redis configuration for Channels
 # Use Redis only when REDIS_URL is explicitly configured.
-# This prevents local crashes when Redis isn't running.
+# This prevents local crashes when Redis isn't running. The in-memory layer
+# only works with a single server process; bounties.checks refuses it when
+# WEB_CONCURRENCY is greater than one.
 REDIS_URL = os.environ.get('REDIS_URL', '').strip()
 
+# Per-channel queue size before group_send starts dropping messages for a
+# slow socket.
+try:
+    CHANNEL_LAYER_CAPACITY = int(os.environ.get('CHANNEL_LAYER_CAPACITY', '1500'))
+except ValueError:
+    CHANNEL_LAYER_CAPACITY = 1500
+
 if REDIS_URL:
     CHANNEL_LAYERS = {
         'default': {
             'BACKEND': 'channels_redis.core.RedisChannelLayer',
             'CONFIG': {
                 "hosts": [REDIS_URL],
+                "capacity": CHANNEL_LAYER_CAPACITY,
+                "expiry": 10,
+                "group_expiry": 86400,
             },
         },
     }
@@ -245,6 +272,111 @@ else:
         },
     }
 
+# Shared cache: with Redis configured, cached state (bid high-water marks,
+# WebSocket auth) is shared by every worker and survives restarts.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        },
+    }
+
+# Lifetime of a cached balance; ledger writes refresh it on commit.
+try:
+    BALANCE_CACHE_TTL_SECONDS = int(os.environ.get('BALANCE_CACHE_TTL_SECONDS', '3600'))
+except ValueError:
+    BALANCE_CACHE_TTL_SECONDS = 3600
+
+# Balance pushes to ws/balance/ are coalesced to one per user per interval.
+try:
+    BALANCE_PUSH_INTERVAL_MS = int(os.environ.get('BALANCE_PUSH_INTERVAL_MS', '250'))
+except ValueError:
+    BALANCE_PUSH_INTERVAL_MS = 250
+
+# Bid and leaderboard frames for an auction's sockets are coalesced to one per
+# auction per interval, carrying the latest state.
+try:
+    AUCTION_BROADCAST_INTERVAL_MS = int(os.environ.get('AUCTION_BROADCAST_INTERVAL_MS', '100'))
+except ValueError:
+    AUCTION_BROADCAST_INTERVAL_MS = 100
+
+# Authenticated-user cache used by token auth (REST and WebSockets): a
+# process-local LRU of user snapshots, optionally backed by the shared cache.
+try:
+    AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '10000'))
+except ValueError:
+    AUTH_USER_CACHE_SIZE = 10000
+try:
+    AUTH_USER_CACHE_TTL_SECONDS = int(os.environ.get('AUTH_USER_CACHE_TTL_SECONDS', '300'))
+except ValueError:
+    AUTH_USER_CACHE_TTL_SECONDS = 300
+try:
+    AUTH_USER_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get('AUTH_USER_CACHE_LOCAL_TTL_SECONDS', '15'))
+except ValueError:
+    AUTH_USER_CACHE_LOCAL_TTL_SECONDS = 15
+AUTH_USER_CACHE_SHARED = os.environ.get('AUTH_USER_CACHE_SHARED', str(bool(REDIS_URL))).lower() == 'true'
+
+# Media manifest consulted by the auction serializers instead of the storage
+# backend: a process-local LRU of path -> (exists, url, size, mtime) entries,
+# optionally backed by the shared cache. Entries are re-stat'd after the TTL.
+try:
+    MEDIA_MANIFEST_SIZE = int(os.environ.get('MEDIA_MANIFEST_SIZE', '50000'))
+except ValueError:
+    MEDIA_MANIFEST_SIZE = 50000
+try:
+    MEDIA_MANIFEST_TTL_SECONDS = int(os.environ.get('MEDIA_MANIFEST_TTL_SECONDS', '3600'))
+except ValueError:
+    MEDIA_MANIFEST_TTL_SECONDS = 3600
+try:
+    MEDIA_MANIFEST_LOCAL_TTL_SECONDS = int(os.environ.get('MEDIA_MANIFEST_LOCAL_TTL_SECONDS', '60'))
+except ValueError:
+    MEDIA_MANIFEST_LOCAL_TTL_SECONDS = 60
+MEDIA_MANIFEST_SHARED = os.environ.get('MEDIA_MANIFEST_SHARED', str(bool(REDIS_URL))).lower() == 'true'
+
+# Browser/CDN lifetime for media whose name is not unique per upload (legacy
+# files and links resolved by original name). Uniquely named uploads are
+# served as immutable for a year.
+try:
+    MEDIA_CACHE_MAX_AGE_SECONDS = int(os.environ.get('MEDIA_CACHE_MAX_AGE_SECONDS', '3600'))
+except ValueError:
+    MEDIA_CACHE_MAX_AGE_SECONDS = 3600
+
+# Resized WebP/JPEG copies rendered in a background thread pool after each
+# auction image upload. An empty width list turns rendering off.
+IMAGE_VARIANT_WIDTHS = [
+    int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')
+    if width.strip().isdigit()
+]
+try:
+    IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', '80'))
+except ValueError:
+    IMAGE_VARIANT_QUALITY = 80
+try:
+    IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', '2'))
+except ValueError:
+    IMAGE_VARIANT_WORKERS = 2
+
+# Auction lifecycle scheduler: runs inside each ASGI worker (one replica holds
+# the lease and fires start/end transitions at their deadlines). Disable it
+# here when running `manage.py run_auction_scheduler` as a separate process.
+AUCTION_SCHEDULER_ENABLED = os.environ.get('AUCTION_SCHEDULER_ENABLED', 'True').lower() == 'true'
+try:
+    AUCTION_SCHEDULER_LEASE_SECONDS = int(os.environ.get('AUCTION_SCHEDULER_LEASE_SECONDS', '15'))
+except ValueError:
+    AUCTION_SCHEDULER_LEASE_SECONDS = 15
+try:
+    AUCTION_SCHEDULER_RESYNC_SECONDS = int(os.environ.get('AUCTION_SCHEDULER_RESYNC_SECONDS', '60'))
+except ValueError:
+    AUCTION_SCHEDULER_RESYNC_SECONDS = 60
+
 # Production security settings
 if not DEBUG:
     # Security settings for production
@@ -16,10 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
-import os
-from bounties.views import serve_auction_image
+from bounties.views import serve_auction_image, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,22 +24,10 @@ urlpatterns = [
     path('api/', include('bounties.api_urls')),  # Include API endpoints
     # Legacy-friendly auction image route (handles Django auto-renamed files)
     path('media/auction_images/<path:filename>', serve_auction_image, name='serve_auction_image'),
+    # Uploaded media, served in every environment (Render runs with DEBUG=False,
+    # where Django's `static()` helper adds no routes) with ETag/304, byte
+    # ranges and long-lived cache headers.
+    path('media/<path:path>', serve_media, name='serve_media'),
+    # Backward compatibility for legacy image URLs stored as /auction_images/...
+    path('auction_images/<path:path>', serve_media, {'prefix': 'auction_images/'}),
 ]
-
-# Serve uploaded media files.
-#
-# In production on Render, DEBUG=False means Django's `static()` helper will
-# not add media routes unless `insecure=True` is provided. Without this,
-# auction image URLs return 404 in live environments.
-urlpatterns += static(
-    settings.MEDIA_URL,
-    document_root=settings.MEDIA_ROOT,
-    insecure=not settings.DEBUG,
-)
-
-# Backward compatibility for legacy image URLs stored as /auction_images/...
-urlpatterns += static(
-    '/auction_images/',
-    document_root=os.path.join(settings.MEDIA_ROOT, 'auction_images'),
-    insecure=not settings.DEBUG,
-)
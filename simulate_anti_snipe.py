@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+Replay thousands of last-second bids and check anti-snipe end times.
+
+Builds a seeded schedule of bids clustered around the closing deadline:
+bids in the final second, bids exactly on the window edge (which extend),
+bids a microsecond before the window opens (which do not), random gaps in
+between, and a last bid exactly at the deadline (which is refused). The
+schedule is generated from a plain-Python model of the soft-close rule,
+which also yields the expected extensions and final end time.
+
+The same schedule is then replayed on a virtual clock through each bid
+engine, bounties.bidding.place_bid (row locks) and the bid sequencer, on a
+throwaway test database. Every run must accept and refuse the same bids and
+record the same extension deadlines as the model.
+
+Usage:
+    python simulate_anti_snipe.py --bids 5000 --window 30 --extension 20 --seed 7
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+import django
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from bounties.models import Auction, UserProfile
+from bounties.auction_models import AuctionEvent
+from bounties.bidding import place_bid
+from bounties.bid_sequencer import bid_sequencer
+
+BIDDERS = 50
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def build_schedule(bids, window, extension, opens_at, seed):
+    """
+    Return ``(times, expected)`` for ``bids`` bids against a soft-close model.
+
+    ``expected`` holds, per bid, whether it is accepted, plus the list of
+    extension deadlines and the final end time.
+    """
+    rng = random.Random(seed)
+    window, extension = timedelta(seconds=window), timedelta(seconds=extension)
+    ends_at = opens_at + window
+    now = opens_at
+    times, accepted, extensions = [], [], []
+
+    for index in range(bids):
+        kind = rng.random()
+        if index == bids - 1:
+            candidate = ends_at  # exactly at the deadline: refused, closes the run
+        elif kind < 0.5:
+            candidate = ends_at - timedelta(microseconds=rng.randrange(1, 1000000))  # final second
+        elif kind < 0.7:
+            candidate = ends_at - window  # exactly on the window edge
+        elif kind < 0.85:
+            candidate = ends_at - window - ONE_MICROSECOND  # just before the window
+        else:
+            candidate = now + (ends_at - now) * rng.random()  # anywhere before the deadline
+        now = max(now, candidate)
+        times.append(now)
+
+        if now >= ends_at:
+            accepted.append(False)
+            continue
+        accepted.append(True)
+        if ends_at - now <= window:
+            ends_at += extension
+            extensions.append(ends_at)
+
+    return times, {'accepted': accepted, 'extensions': extensions, 'ends_at': ends_at}
+
+
+def create_auction(label, opens_at, window, extension):
+    admin = User.objects.create(username=f'{label}-admin')
+    return Auction.objects.create(
+        title=label, description=label, minimum_bid=1,
+        starts_at=opens_at - timedelta(hours=1), ends_at=opens_at + timedelta(seconds=window),
+        status='active', created_by=admin,
+        extension_window_seconds=window, extension_seconds=extension,
+    )
+
+
+def replay(auction, engine, bidders, times):
+    """Place one bid per scheduled time on a virtual clock; returns per-bid acceptance."""
+    accepted = []
+    amount = 0
+    for index, moment in enumerate(times):
+        amount += 1
+        with mock.patch.object(timezone, 'now', return_value=moment):
+            _, status_code = engine(bidders[index % len(bidders)], auction.id, amount)
+        accepted.append(status_code == 201)
+        if status_code != 201:
+            amount -= 1
+    return accepted
+
+
+def check(name, auction, accepted, expected, elapsed):
+    auction.refresh_from_db()
+    extensions = list(
+        AuctionEvent.objects.filter(auction=auction, kind='extended').values_list('ends_at', flat=True)
+    )
+    problems = []
+    if accepted != expected['accepted']:
+        first = next(i for i, (got, want) in enumerate(zip(accepted, expected['accepted'])) if got != want)
+        problems.append(f'bid {first} accepted={accepted[first]}, expected {expected["accepted"][first]}')
+    if extensions != expected['extensions']:
+        problems.append(f'{len(extensions)} extensions recorded, expected {len(expected["extensions"])}')
+    if auction.ends_at != expected['ends_at']:
+        problems.append(f'ends_at {auction.ends_at.isoformat()}, expected {expected["ends_at"].isoformat()}')
+
+    print(name)
+    print(f"  accepted / refused: {sum(accepted)} / {len(accepted) - sum(accepted)}")
+    print(f"  extensions:         {len(extensions)}")
+    print(f"  final ends_at:      {auction.ends_at.isoformat()}")
+    print(f"  wall time:          {elapsed:.1f} s")
+    print(f"  result:             {'OK' if not problems else 'MISMATCH: ' + '; '.join(problems)}")
+    print()
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bids', type=int, default=5000)
+    parser.add_argument('--window', type=int, default=30, help='anti-snipe window in seconds')
+    parser.add_argument('--extension', type=int, default=20, help='extension length in seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        test_db = os.path.join(tempfile.mkdtemp(), 'simulation.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = test_db
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        opens_at = timezone.now().replace(microsecond=0)
+        times, expected = build_schedule(args.bids, args.window, args.extension, opens_at, args.seed)
+        print(
+            f"Schedule: {args.bids} bids, window {args.window} s, extension {args.extension} s, seed {args.seed}; "
+            f"model expects {sum(expected['accepted'])} accepted, {len(expected['extensions'])} extensions, "
+            f"end {expected['ends_at'].isoformat()}\n"
+        )
+
+        User.objects.bulk_create([User(username=f'sniper-{i}') for i in range(BIDDERS)])
+        bidders = list(User.objects.filter(username__startswith='sniper-').order_by('id'))
+        UserProfile.objects.bulk_create([UserProfile(user=user, coin_balance=10 ** 9) for user in bidders])
+
+        ok = True
+        for name, engine in (('place_bid (row locks)', place_bid), ('bid sequencer', bid_sequencer.submit)):
+            cache.clear()
+            auction = create_auction(name.split()[0], opens_at, args.window, args.extension)
+            started = time.perf_counter()
+            accepted = replay(auction, engine, bidders, times)
+            ok = check(name, auction, accepted, expected, time.perf_counter() - started) and ok
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
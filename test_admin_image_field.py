@@ -21,7 +21,7 @@ django.setup()
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth.models import User
 from bounties.models import UserProfile
-from bounties.auction_models import Auction as AuctionModel
+from bounties.models import Auction as AuctionModel
 from bounties.admin import AuctionAdmin
 from django.utils import timezone
 
@@ -131,7 +131,7 @@ def test_admin_image_field():
         
         # Test form validation
         from django.forms import ModelForm
-        from bounties.auction_models import Auction
+        from bounties.models import Auction
         
         class TestAuctionForm(ModelForm):
             class Meta:
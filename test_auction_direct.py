@@ -16,7 +16,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'playmarket.settings')
 # Setup Django
 django.setup()
 
-from bounties.auction_models import Auction
+from bounties.models import Auction
 from django.utils import timezone
 
 def test_auction_direct():
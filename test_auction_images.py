@@ -20,7 +20,7 @@ django.setup()
 
 from django.contrib.auth.models import User
 from bounties.models import UserProfile
-from bounties.auction_models import Auction
+from bounties.models import Auction
 from bounties.serializers import AuctionSerializer
 from django.utils import timezone
 